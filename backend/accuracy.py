@@ -0,0 +1,384 @@
+"""传感器血糖准确性分析
+
+以指尖血数据为参比值，与同一人员在采集时刻正在使用的传感器配对：
+1. 参比值按采集时间匹配该人员开始时间最近、且尚未结束的传感器（merge_asof 向量化匹配）；
+2. 在该传感器的读数中取与采集时间最接近、相差不超过 PAIR_TOLERANCE 的读数作为测量值；
+3. 按传感器、人员和批次汇总 MARD、平均偏差以及 Clarke / Parkes（1 型）误差网格各区计数。
+
+配对结果按 (批次, 人员) 缓存，指尖血数据、传感器增删改或写入读数后只重新配对受影响的人员，
+汇总在缓存的配对结果上重新计算。
+"""
+
+import time
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event, inspect, select
+
+from database import SessionLocal
+from models import Batch, FingerBloodFile, Person, Sensor, SensorReading
+
+# 指尖血数据单位为 mmol/L，误差网格按 mg/dL 定义
+MGDL_PER_MMOL = 18.016
+# 参比值与传感器读数允许的最大时间差
+PAIR_TOLERANCE = pd.Timedelta(minutes=5)
+ZONES = ("A", "B", "C", "D", "E")
+
+# 缓存兜底过期时间（防止其他进程写入后长期不刷新）
+ACCURACY_CACHE_TTL_SECONDS = 600
+
+PAIR_COLUMNS = ["finger_blood_file_id", "person_id", "collection_time", "reference", "sensor_id", "sensor_value"]
+
+# Parkes 误差网格（1 型糖尿病）区域边界折线，坐标为 (参比值, 测量值)，单位 mg/dL。
+# 上边界依次为 A/B、B/C、C/D、D/E 分界，下边界依次为 A/B、B/C、C/D 分界
+_PARKES_UPPER = (
+    ((0, 50), (30, 50), (140, 170), (280, 380), (430, 550)),
+    ((0, 60), (30, 60), (50, 80), (70, 110), (260, 550)),
+    ((0, 100), (25, 100), (50, 125), (80, 215), (125, 550)),
+    ((0, 150), (35, 155), (50, 550)),
+)
+_PARKES_LOWER = (
+    ((50, 30), (170, 145), (385, 300), (550, 450)),
+    ((120, 30), (260, 130), (550, 250)),
+    ((250, 40), (550, 150)),
+)
+
+
+def _polyline(x: np.ndarray, points, below_start: float) -> np.ndarray:
+    """折线在 x 处的取值：起点左侧取 below_start，终点右侧沿最后一段外推"""
+    xs = np.array([p[0] for p in points], dtype=np.float64)
+    ys = np.array([p[1] for p in points], dtype=np.float64)
+    values = np.interp(x, xs, ys, left=below_start)
+    slope = (ys[-1] - ys[-2]) / (xs[-1] - xs[-2])
+    return np.where(x > xs[-1], ys[-1] + slope * (x - xs[-1]), values)
+
+
+def clarke_zones(reference: np.ndarray, measured: np.ndarray) -> np.ndarray:
+    """Clarke 误差网格分区，输入单位 mg/dL，返回各点所在区域（A-E）"""
+    r, m = reference, measured
+    zone_a = ((r <= 70) & (m <= 70)) | ((m <= 1.2 * r) & (m >= 0.8 * r))
+    zone_e = ((r >= 180) & (m <= 70)) | ((r <= 70) & (m >= 180))
+    zone_c = (((r >= 70) & (r <= 290)) & (m >= r + 110)) | (((r >= 130) & (r <= 180)) & (m <= 7 / 5 * r - 182))
+    zone_d = (
+        ((r >= 240) & (m >= 70) & (m <= 180))
+        | ((r <= 175 / 3) & (m <= 180) & (m >= 70))
+        | (((r >= 175 / 3) & (r <= 70)) & (m >= 6 / 5 * r))
+    )
+    return np.select([zone_a, zone_e, zone_c, zone_d], ["A", "E", "C", "D"], default="B")
+
+
+def parkes_zones(reference: np.ndarray, measured: np.ndarray) -> np.ndarray:
+    """Parkes（1 型糖尿病）误差网格分区，输入单位 mg/dL，返回各点所在区域（A-E）"""
+    r = np.asarray(reference, dtype=np.float64)
+    m = np.asarray(measured, dtype=np.float64)
+    level = np.zeros(len(r), dtype=np.int64)
+    for i, points in enumerate(_PARKES_UPPER):
+        level = np.maximum(level, np.where(m > _polyline(r, points, np.inf), i + 1, 0))
+    for i, points in enumerate(_PARKES_LOWER):
+        level = np.maximum(level, np.where(m < _polyline(r, points, -np.inf), i + 1, 0))
+    return np.array(ZONES)[level]
+
+
+def load_references(db, batch_id: int, person_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    query = select(
+        FingerBloodFile.finger_blood_file_id,
+        FingerBloodFile.person_id,
+        FingerBloodFile.collection_time,
+        FingerBloodFile.blood_glucose_value.label("reference"),
+    ).where(FingerBloodFile.batch_id == batch_id)
+    if person_ids is not None:
+        query = query.where(FingerBloodFile.person_id.in_(list(person_ids)))
+    df = pd.DataFrame(db.execute(query).all(), columns=["finger_blood_file_id", "person_id", "collection_time", "reference"])
+    df["collection_time"] = pd.to_datetime(df["collection_time"]).astype("datetime64[ns]")
+    df["reference"] = df["reference"].astype(np.float64)
+    return df
+
+
+def load_sensors(db, batch_id: int, person_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    query = select(Sensor.sensor_id, Sensor.person_id, Sensor.start_time, Sensor.end_time).where(Sensor.batch_id == batch_id)
+    if person_ids is not None:
+        query = query.where(Sensor.person_id.in_(list(person_ids)))
+    df = pd.DataFrame(db.execute(query).all(), columns=["sensor_id", "person_id", "start_time", "end_time"])
+    df["start_time"] = pd.to_datetime(df["start_time"]).astype("datetime64[ns]")
+    df["end_time"] = pd.to_datetime(df["end_time"]).astype("datetime64[ns]")
+    return df
+
+
+def load_readings(db, sensor_ids: Iterable[int], start_time=None, end_time=None) -> pd.DataFrame:
+    """读取传感器在时间范围内的血糖读数，返回 sensor_id / reading_time / value（mmol/L）三列"""
+    sensor_ids = list(sensor_ids)
+    rows = []
+    if sensor_ids:
+        query = select(SensorReading.sensor_id, SensorReading.reading_time, SensorReading.glucose_value).where(
+            SensorReading.sensor_id.in_(sensor_ids), SensorReading.glucose_value.is_not(None)
+        )
+        if start_time is not None:
+            query = query.where(SensorReading.reading_time >= start_time, SensorReading.reading_time <= end_time)
+        rows = db.execute(query).all()
+    df = pd.DataFrame(rows, columns=["sensor_id", "reading_time", "value"])
+    df["sensor_id"] = df["sensor_id"].astype(np.int64)
+    df["reading_time"] = pd.to_datetime(df["reading_time"]).astype("datetime64[ns]")
+    df["value"] = df["value"].astype(np.float64)
+    return df
+
+
+def pair_readings(references: pd.DataFrame, sensors: pd.DataFrame, readings: pd.DataFrame) -> pd.DataFrame:
+    """
+    将参比值与正在使用的传感器及其读数配对
+
+    返回每条参比值一行：sensor_id 为采集时刻正在使用的传感器（无则为空），
+    sensor_value 为时间差不超过 PAIR_TOLERANCE 的最近读数（无则为空）。
+    """
+    if references.empty:
+        return pd.DataFrame(columns=PAIR_COLUMNS)
+
+    refs = references.sort_values("collection_time", kind="stable")
+    refs = refs.astype({"person_id": np.int64})
+    if sensors.empty:
+        pairs = refs.assign(sensor_id=np.nan, sensor_value=np.nan)
+        return pairs[PAIR_COLUMNS].reset_index(drop=True)
+
+    # 取采集时刻之前开始的最近一个传感器，再排除已结束的
+    windows = sensors.sort_values("start_time", kind="stable").astype({"person_id": np.int64})
+    pairs = pd.merge_asof(
+        refs, windows, left_on="collection_time", right_on="start_time", by="person_id", direction="backward"
+    )
+    ended = pairs["end_time"].notna() & (pairs["collection_time"] > pairs["end_time"])
+    pairs.loc[ended, "sensor_id"] = np.nan
+
+    pairs["sensor_value"] = np.nan
+    active = pairs[pairs["sensor_id"].notna()]
+    if not active.empty and not readings.empty:
+        matched = pd.merge_asof(
+            active.reset_index().astype({"sensor_id": np.int64}),
+            readings.sort_values("reading_time", kind="stable").astype({"sensor_id": np.int64}),
+            left_on="collection_time",
+            right_on="reading_time",
+            by="sensor_id",
+            direction="nearest",
+            tolerance=PAIR_TOLERANCE,
+        )
+        pairs.loc[matched["index"].to_numpy(), "sensor_value"] = matched["value"].to_numpy()
+    return pairs[PAIR_COLUMNS].reset_index(drop=True)
+
+
+def summarize(pairs: pd.DataFrame, keys) -> pd.DataFrame:
+    """
+    按 keys 分组计算准确性指标
+
+    返回列：keys、references（落在传感器使用期内的参比值数）、pairs（有测量值的配对数）、
+    mard（%）、bias（测量值 - 参比值，mmol/L）、clarke_A..E、parkes_A..E。
+    """
+    zone_columns = [f"{grid}_{zone}" for grid in ("clarke", "parkes") for zone in ZONES]
+    in_window = pairs[pairs["sensor_id"].notna()]
+    if in_window.empty:
+        return pd.DataFrame(columns=[*keys, "references", "pairs", "mard", "bias", *zone_columns])
+
+    result = in_window.groupby(keys).size().rename("references").to_frame()
+    matched = in_window[in_window["sensor_value"].notna()]
+    if matched.empty:
+        result["pairs"] = 0
+        result["mard"] = np.nan
+        result["bias"] = np.nan
+        for column in zone_columns:
+            result[column] = 0
+        return result.reset_index()
+
+    reference = matched["reference"].to_numpy(np.float64)
+    measured = matched["sensor_value"].to_numpy(np.float64)
+    metrics = matched[keys].assign(
+        abs_rel=np.abs(measured - reference) / reference * 100,
+        diff=measured - reference,
+        clarke=clarke_zones(reference * MGDL_PER_MMOL, measured * MGDL_PER_MMOL),
+        parkes=parkes_zones(reference * MGDL_PER_MMOL, measured * MGDL_PER_MMOL),
+    )
+    grouped = metrics.groupby(keys)
+    result = result.join(grouped["diff"].size().rename("pairs"))
+    result = result.join(grouped["abs_rel"].mean().rename("mard"))
+    result = result.join(grouped["diff"].mean().rename("bias"))
+    for grid in ("clarke", "parkes"):
+        counts = metrics.groupby([*keys, grid]).size().unstack(fill_value=0)
+        counts = counts.reindex(columns=list(ZONES), fill_value=0).add_prefix(f"{grid}_")
+        result = result.join(counts)
+    result[["pairs", *zone_columns]] = result[["pairs", *zone_columns]].fillna(0).astype(np.int64)
+    return result.reset_index()
+
+
+def _metrics_dict(row) -> dict:
+    def _round(value):
+        return None if pd.isna(value) else round(float(value), 3)
+
+    return {
+        "references": int(row["references"]),
+        "pairs": int(row["pairs"]),
+        "mard": _round(row["mard"]),
+        "bias": _round(row["bias"]),
+        "clarke": {zone: int(row[f"clarke_{zone}"]) for zone in ZONES},
+        "parkes": {zone: int(row[f"parkes_{zone}"]) for zone in ZONES},
+    }
+
+
+def _empty_metrics() -> dict:
+    return {"references": 0, "pairs": 0, "mard": None, "bias": None,
+            "clarke": dict.fromkeys(ZONES, 0), "parkes": dict.fromkeys(ZONES, 0)}
+
+
+def compute_pairs(db, batch_id: int, person_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """计算批次（或其中部分人员）的参比值配对结果"""
+    references = load_references(db, batch_id, person_ids)
+    sensors = load_sensors(db, batch_id, person_ids)
+    if references.empty or sensors.empty:
+        readings = load_readings(db, [])
+    else:
+        # 只读取参比值时间范围（含配对容差）内的读数
+        readings = load_readings(
+            db,
+            sensors["sensor_id"].tolist(),
+            (references["collection_time"].min() - PAIR_TOLERANCE).to_pydatetime(),
+            (references["collection_time"].max() + PAIR_TOLERANCE).to_pydatetime(),
+        )
+    return pair_readings(references, sensors, readings)
+
+
+def build_report(db, batch_id: int, pairs: pd.DataFrame) -> dict:
+    """由配对结果生成批次准确性报告"""
+    batch_number = db.execute(select(Batch.batch_number).where(Batch.batch_id == batch_id)).scalar()
+    sensors = dict(db.execute(select(Sensor.sensor_id, Sensor.sensor_name).where(Sensor.batch_id == batch_id)).all())
+    person_ids = pairs["person_id"].unique().tolist()
+    persons = dict(db.execute(select(Person.person_id, Person.person_name).where(Person.person_id.in_(person_ids))).all()) if person_ids else {}
+
+    overall = summarize(pairs.assign(batch_id=batch_id), ["batch_id"])
+    by_sensor = summarize(pairs, ["sensor_id", "person_id"])
+    by_person = summarize(pairs, ["person_id"])
+    return {
+        "batch_id": batch_id,
+        "batch_number": batch_number,
+        "total_references": len(pairs),
+        "unmatched_references": int(pairs["sensor_id"].isna().sum()),
+        "overall": _metrics_dict(overall.iloc[0]) if not overall.empty else _empty_metrics(),
+        "by_sensor": [
+            {
+                "sensor_id": int(row["sensor_id"]),
+                "sensor_name": sensors.get(int(row["sensor_id"])),
+                "person_id": int(row["person_id"]),
+                "person_name": persons.get(int(row["person_id"])),
+                **_metrics_dict(row),
+            }
+            for _, row in by_sensor.iterrows()
+        ],
+        "by_person": [
+            {"person_id": int(row["person_id"]), "person_name": persons.get(int(row["person_id"])), **_metrics_dict(row)}
+            for _, row in by_person.iterrows()
+        ],
+    }
+
+
+class AccuracyCache:
+    """
+    按批次缓存配对结果（按人员分区）与报告
+
+    invalidate 只标记受影响的人员，下次读取时仅重新配对这些人员；
+    整个批次失效或超过 TTL 时重新配对全部人员。
+    """
+
+    def __init__(self, ttl_seconds: float = ACCURACY_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[int, dict] = {}
+        self._lock = Lock()
+
+    def invalidate(self, batch_id: int, person_ids: Optional[Iterable[int]] = None):
+        with self._lock:
+            entry = self._entries.get(batch_id)
+            if entry is None:
+                return
+            if person_ids is None:
+                del self._entries[batch_id]
+            else:
+                entry["stale"].update(person_ids)
+                entry["report"] = None
+
+    def invalidate_pairs(self, keys: Iterable[Tuple[int, int]]):
+        """按 (batch_id, person_id) 使缓存失效"""
+        by_batch: Dict[int, set] = {}
+        for batch_id, person_id in keys:
+            by_batch.setdefault(batch_id, set()).add(person_id)
+        for batch_id, person_ids in by_batch.items():
+            self.invalidate(batch_id, person_ids)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def report(self, db, batch_id: int) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(batch_id)
+            if entry is not None and entry["expires_at"] > now:
+                if entry["report"] is not None and not entry["stale"]:
+                    return entry["report"]
+                stale, entry["stale"] = entry["stale"], set()
+            else:
+                entry = {"persons": None, "stale": set(), "report": None, "expires_at": 0.0}
+                self._entries[batch_id] = entry
+                stale = None
+
+        if stale is None:
+            pairs = compute_pairs(db, batch_id)
+            partitions = {int(person_id): part for person_id, part in pairs.groupby("person_id")}
+        else:
+            updated = compute_pairs(db, batch_id, stale) if stale else pd.DataFrame(columns=PAIR_COLUMNS)
+            partitions = {int(person_id): part for person_id, part in updated.groupby("person_id")}
+            with self._lock:
+                current = dict(entry["persons"] or {})
+            for person_id in stale:
+                current.pop(person_id, None)
+            current.update(partitions)
+            partitions = current
+
+        pairs = pd.concat(partitions.values(), ignore_index=True) if partitions else pd.DataFrame(columns=PAIR_COLUMNS)
+        report = build_report(db, batch_id, pairs)
+        with self._lock:
+            # 计算期间整个批次被失效时不回填；期间新增的失效人员保留在 stale 中
+            if self._entries.get(batch_id) is entry:
+                entry["persons"] = partitions
+                if stale is None:
+                    entry["expires_at"] = now + self.ttl_seconds
+                entry["report"] = None if entry["stale"] else report
+        return report
+
+
+accuracy_cache = AccuracyCache()
+
+
+def _changed_keys(obj):
+    """对象变更前后所属的 (batch_id, person_id)"""
+    state = inspect(obj)
+    keys = set()
+    batch_history = state.attrs.batch_id.history
+    person_history = state.attrs.person_id.history
+    for batch_id in (*batch_history.unchanged, *batch_history.added, *batch_history.deleted):
+        for person_id in (*person_history.unchanged, *person_history.added, *person_history.deleted):
+            if batch_id is not None and person_id is not None:
+                keys.add((batch_id, person_id))
+    return keys
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_accuracy_dirty(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (FingerBloodFile, Sensor)):
+            session.info.setdefault("accuracy_dirty", set()).update(_changed_keys(obj))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_accuracy_on_commit(session):
+    keys = session.info.pop("accuracy_dirty", None)
+    if keys:
+        accuracy_cache.invalidate_pairs(keys)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _reset_accuracy_on_rollback(session):
+    session.info.pop("accuracy_dirty", None)
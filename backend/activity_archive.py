@@ -0,0 +1,174 @@
+"""活动日志归档
+
+超过保留期的活动记录按月分批迁移到 gzip 压缩的 JSONL 文件（archives/activities/YYYY-MM.jsonl.gz），
+并从 activities 表中删除，保持热表规模稳定；query_history 可跨热表与归档文件查询历史记录。
+
+每批先追加写入归档文件并落盘，再删除对应行；若两步之间中断，重跑时该批会被重复写入，
+读取归档时按 activity_id 去重，因此不会丢失也不会重复返回记录。
+"""
+
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, joinedload
+
+from config import settings
+from models import Activity, User
+
+ARCHIVE_DIR = settings.activity_archive_dir or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "archives", "activities"
+)
+
+
+def _month_key(value: datetime) -> str:
+    return value.strftime("%Y-%m")
+
+
+def _archive_path(month: str) -> str:
+    return os.path.join(ARCHIVE_DIR, f"{month}.jsonl.gz")
+
+
+def archive_activities(db: Session, retention_days: Optional[int] = None, batch_size: int = 1000) -> int:
+    """
+    将早于保留期的活动记录分批归档到按月文件，返回归档条数
+
+    Args:
+        db: 数据库会话
+        retention_days: 热表保留天数，默认取配置 activity_retention_days
+        batch_size: 每批迁移的行数（每批一个事务，避免长事务与大范围锁）
+    """
+    if retention_days is None:
+        retention_days = settings.activity_retention_days
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+
+    total = 0
+    while True:
+        rows = db.execute(
+            select(
+                Activity.activity_id, Activity.activity_type, Activity.description,
+                Activity.createTime, Activity.user_id, User.username
+            )
+            .outerjoin(User, Activity.user_id == User.user_id)
+            .where(Activity.createTime < cutoff)
+            .order_by(Activity.activity_id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return total
+
+        by_month = defaultdict(list)
+        for row in rows:
+            by_month[_month_key(row.createTime)].append({
+                "activity_id": row.activity_id,
+                "activity_type": row.activity_type,
+                "description": row.description,
+                "createTime": row.createTime.isoformat(),
+                "user_id": row.user_id,
+                "username": row.username,
+            })
+
+        for month, records in by_month.items():
+            # gzip 支持多成员追加，每批追加为一个独立成员
+            with gzip.open(_archive_path(month), "at", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+        db.execute(delete(Activity).where(Activity.activity_id.in_([row.activity_id for row in rows])))
+        db.commit()
+        total += len(rows)
+
+
+def _archive_months(start_time: Optional[datetime], end_time: Optional[datetime]) -> List[str]:
+    """列出与时间范围相交的归档月份（倒序）"""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    months = sorted(
+        (name[:-len(".jsonl.gz")] for name in os.listdir(ARCHIVE_DIR) if name.endswith(".jsonl.gz")),
+        reverse=True
+    )
+    if start_time:
+        months = [m for m in months if m >= _month_key(start_time)]
+    if end_time:
+        months = [m for m in months if m <= _month_key(end_time)]
+    return months
+
+
+def _read_archive_month(month: str) -> Iterator[dict]:
+    with gzip.open(_archive_path(month), "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                record["createTime"] = datetime.fromisoformat(record["createTime"])
+                yield record
+
+
+def query_history(
+    db: Session,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    activity_type: Optional[str] = None,
+    user_id: Optional[int] = None,
+    limit: int = 1000,
+) -> List[dict]:
+    """跨热表与归档文件查询活动记录，按创建时间倒序返回"""
+
+    def matches(record: dict) -> bool:
+        if start_time and record["createTime"] < start_time:
+            return False
+        if end_time and record["createTime"] > end_time:
+            return False
+        if activity_type and record["activity_type"] != activity_type:
+            return False
+        if user_id is not None and record["user_id"] != user_id:
+            return False
+        return True
+
+    query = select(Activity).options(joinedload(Activity.user))
+    if start_time:
+        query = query.where(Activity.createTime >= start_time)
+    if end_time:
+        query = query.where(Activity.createTime <= end_time)
+    if activity_type:
+        query = query.where(Activity.activity_type == activity_type)
+    if user_id is not None:
+        query = query.where(Activity.user_id == user_id)
+    query = query.order_by(Activity.createTime.desc(), Activity.activity_id.desc()).limit(limit)
+
+    results = {}
+    for activity in db.execute(query).scalars():
+        results[activity.activity_id] = {
+            "activity_id": activity.activity_id,
+            "activity_type": activity.activity_type,
+            "description": activity.description,
+            "createTime": activity.createTime,
+            "user_id": activity.user_id,
+            "username": activity.user.username if activity.user else None,
+        }
+
+    # 归档月份按时间倒序读取，已凑满 limit 且该月整体早于当前最旧记录时停止
+    for month in _archive_months(start_time, end_time):
+        if len(results) >= limit:
+            oldest = min(r["createTime"] for r in results.values())
+            if _month_key(oldest) > month:
+                break
+        for record in _read_archive_month(month):
+            if matches(record):
+                results.setdefault(record["activity_id"], record)
+        # 每读完一个月只保留最新的 limit 条，限制内存占用
+        if len(results) > limit:
+            kept = sorted(results.values(), key=_sort_key, reverse=True)[:limit]
+            results = {r["activity_id"]: r for r in kept}
+
+    return sorted(results.values(), key=_sort_key, reverse=True)[:limit]
+
+
+def _sort_key(record: dict):
+    return record["createTime"], record["activity_id"]
@@ -0,0 +1,169 @@
+"""活动日志异步批量写入
+
+请求处理中调用 log_activity 只将记录放入进程内有界队列，由后台线程按时间间隔
+或数量阈值批量执行多行插入，避免每次写操作/导出都额外提交一个同步事务，
+也不再与调用方共享会话状态。
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert
+
+from config import settings
+from database import SessionLocal
+from models import Activity
+
+# 刷写失败后重试间隔从 flush_interval 开始逐次翻倍，最长不超过该值（秒）
+MAX_RETRY_INTERVAL_SECONDS = 60.0
+
+
+class ActivityLogWriter:
+    """
+    活动日志批量写入器
+
+    队列达到 max_queue_size 时丢弃新记录（计入 dropped），保证内存有界；
+    后台线程每隔 flush_interval 秒或队列达到 batch_size 时刷写一次；
+    刷写失败后按指数退避等待再重试（不因队列已满而立即重试），成功后恢复正常间隔。
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int, max_queue_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_queue_size = max_queue_size
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        # 统计计数
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.flush_failures = 0
+        self.max_delay_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """停止后台线程，并将队列中剩余记录全部写入"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def enqueue(self, activity_type: str, description: str, user_id: Optional[int] = None) -> bool:
+        row = {
+            "activity_type": activity_type,
+            "description": description,
+            "user_id": user_id,
+            "createTime": datetime.now(),
+        }
+        with self._condition:
+            if len(self._queue) >= self.max_queue_size:
+                self.dropped += 1
+                return False
+            self._queue.append((time.monotonic(), row))
+            self.enqueued += 1
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify()
+        return True
+
+    def flush(self) -> int:
+        """将队列中的记录分批写入数据库，返回写入条数"""
+        total = 0
+        while True:
+            with self._condition:
+                if not self._queue:
+                    return total
+                count = min(self.batch_size, len(self._queue))
+                entries = [self._queue.popleft() for _ in range(count)]
+            try:
+                self._write([row for _, row in entries])
+            except Exception as e:
+                print(f"活动日志写入失败: {e}")
+                with self._condition:
+                    self.flush_failures += 1
+                    # 放回队首等待下次重试，超出容量的部分计为丢弃
+                    space = self.max_queue_size - len(self._queue)
+                    retained = entries[:max(space, 0)]
+                    self.dropped += len(entries) - len(retained)
+                    self._queue.extendleft(reversed(retained))
+                return total
+            now = time.monotonic()
+            with self._condition:
+                self.written += len(entries)
+                self.max_delay_seconds = max(self.max_delay_seconds, now - entries[0][0])
+            total += len(entries)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "running": self.running,
+                "pending": len(self._queue),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "flush_failures": self.flush_failures,
+                "max_delay_seconds": round(self.max_delay_seconds, 3),
+            }
+
+    def _write(self, rows):
+        db = SessionLocal()
+        try:
+            db.execute(insert(Activity), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run(self):
+        retry_interval = None
+        while True:
+            with self._condition:
+                if retry_interval is not None:
+                    # 失败后等满退避时间，入队触发的唤醒不提前重试，只响应停止
+                    deadline = time.monotonic() + retry_interval
+                    while not self._stopping:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                elif not self._stopping and len(self._queue) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                stopping = self._stopping
+                failures = self.flush_failures
+            self.flush()
+            if stopping:
+                return
+            with self._condition:
+                failed = self.flush_failures > failures
+            if failed:
+                retry_interval = (
+                    self.flush_interval if retry_interval is None
+                    else min(retry_interval * 2, max(MAX_RETRY_INTERVAL_SECONDS, self.flush_interval))
+                )
+            else:
+                retry_interval = None
+
+activity_writer = ActivityLogWriter(
+    flush_interval=settings.activity_log_flush_interval,
+    batch_size=settings.activity_log_batch_size,
+    max_queue_size=settings.activity_log_queue_size,
+)
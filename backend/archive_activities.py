@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+活动日志归档脚本 - 将超过保留期的活动记录迁移到按月压缩归档文件
+
+建议通过 cron 等定时任务每日执行:
+    python archive_activities.py --retention-days 90
+"""
+
+import argparse
+
+from activity_archive import ARCHIVE_DIR, archive_activities
+from config import settings
+from database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="活动日志归档")
+    parser.add_argument("--retention-days", type=int, default=settings.activity_retention_days, help="热表保留天数")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批迁移的行数")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        total = archive_activities(db, args.retention_days, args.batch_size)
+        print(f"已归档 {total} 条活动记录到 {ARCHIVE_DIR}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+查询索引基准测试脚本
+
+在种子数据集上分别测量未建索引与建索引后的查询计划和耗时，
+用于验证 models.py 中声明的复合索引对列表/导出查询的效果。
+
+用法:
+    python benchmark_indexes.py                                  # 临时 SQLite 数据库
+    python benchmark_indexes.py --database-url mysql+pymysql://... --rows 1000000
+
+注意：脚本会删除并重建目标数据库中的所有表，请勿对生产库运行。
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+
+from models import (
+    Base, Batch, Person, Experiment, ExperimentMember, FingerBloodFile, Sensor,
+    CompetitorFile, Activity, User, RoleEnum
+)
+
+# 本次新增的性能索引（主键索引与外键隐式索引不在其列）
+PERFORMANCE_INDEXES = {
+    "ix_finger_blood_files_person_time",
+    "ix_finger_blood_files_batch_time",
+    "ix_finger_blood_files_time",
+    "ix_sensors_batch_person",
+    "ix_sensors_person_start",
+    "ix_competitor_files_batch_person",
+    "ix_activities_create_time",
+    "uq_experiment_members_experiment_person",
+}
+
+INSERT_CHUNK = 5000
+
+
+def performance_indexes():
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in PERFORMANCE_INDEXES:
+                yield index
+
+
+def seed(engine, batches: int, persons: int, rows: int, activities: int):
+    """生成规模接近实际的种子数据"""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+
+    def chunked_insert(conn, model, records):
+        for i in range(0, len(records), INSERT_CHUNK):
+            conn.execute(insert(model), records[i:i + INSERT_CHUNK])
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{
+            "user_id": 1, "username": "bench", "password_hash": "-", "role": RoleEnum.Admin,
+            "createTime": start, "updateTime": start
+        }])
+        chunked_insert(conn, Batch, [
+            {"batch_id": b, "batch_number": f"BATCH{b:04d}", "start_time": start + timedelta(days=b)}
+            for b in range(1, batches + 1)
+        ])
+        person_batch = {p: rng.randint(1, batches) for p in range(1, persons + 1)}
+        chunked_insert(conn, Person, [
+            {"person_id": p, "person_name": f"受试者{p}", "batch_id": b} for p, b in person_batch.items()
+        ])
+        chunked_insert(conn, Sensor, [
+            {
+                "sensor_name": f"S{p}-{k}", "person_id": p, "batch_id": person_batch[p],
+                "start_time": start + timedelta(days=14 * k), "end_time": start + timedelta(days=14 * k + 14)
+            }
+            for p in person_batch for k in range(4)
+        ])
+        chunked_insert(conn, CompetitorFile, [
+            {
+                "person_id": p, "batch_id": person_batch[p], "file_path": f"/uploads/{p}-{k}.xlsx",
+                "upload_time": start + timedelta(days=k)
+            }
+            for p in person_batch for k in range(2)
+        ])
+        chunked_insert(conn, Experiment, [
+            {"experiment_id": e, "batch_id": rng.randint(1, batches), "created_time": start}
+            for e in range(1, batches * 10 + 1)
+        ])
+        chunked_insert(conn, ExperimentMember, [
+            {"experiment_id": e, "person_id": p}
+            for e in range(1, batches * 10 + 1)
+            for p in rng.sample(range(1, persons + 1), min(5, persons))
+        ])
+
+        person_ids = list(person_batch)
+        for offset in range(0, rows, INSERT_CHUNK):
+            records = []
+            for _ in range(min(INSERT_CHUNK, rows - offset)):
+                p = rng.choice(person_ids)
+                records.append({
+                    "person_id": p, "batch_id": person_batch[p],
+                    "collection_time": start + timedelta(minutes=rng.randint(0, 180 * 24 * 60)),
+                    "blood_glucose_value": round(rng.uniform(3.0, 15.0), 2)
+                })
+            conn.execute(insert(FingerBloodFile), records)
+
+        for offset in range(0, activities, INSERT_CHUNK):
+            conn.execute(insert(Activity), [
+                {
+                    "activity_type": "bench", "description": "benchmark", "user_id": 1,
+                    "createTime": start + timedelta(seconds=rng.randint(0, 180 * 24 * 3600))
+                }
+                for _ in range(min(INSERT_CHUNK, activities - offset))
+            ])
+
+
+def benchmark_queries(batches: int, persons: int):
+    """列表与导出接口实际使用的筛选/排序组合"""
+    mid = datetime(2024, 3, 1)
+    person_id = persons // 2
+    batch_id = batches // 2
+    return {
+        "指尖血-按人员按时间倒序": (
+            select(FingerBloodFile)
+            .where(FingerBloodFile.person_id == person_id)
+            .order_by(FingerBloodFile.collection_time.desc(), FingerBloodFile.finger_blood_file_id.desc())
+            .limit(100)
+        ),
+        "指尖血-按批次与时间范围": (
+            select(FingerBloodFile)
+            .where(
+                FingerBloodFile.batch_id == batch_id,
+                FingerBloodFile.collection_time >= mid,
+                FingerBloodFile.collection_time <= mid + timedelta(days=7)
+            )
+            .order_by(FingerBloodFile.collection_time.desc())
+            .limit(100)
+        ),
+        "指尖血-全局最新一页": (
+            select(FingerBloodFile)
+            .order_by(FingerBloodFile.collection_time.desc(), FingerBloodFile.finger_blood_file_id.desc())
+            .limit(100)
+        ),
+        "传感器-按批次与人员": (
+            select(Sensor).where(Sensor.batch_id == batch_id, Sensor.person_id == person_id)
+        ),
+        "竞品文件-按批次与人员": (
+            select(CompetitorFile).where(CompetitorFile.batch_id == batch_id, CompetitorFile.person_id == person_id)
+        ),
+        "活动-最近记录": (
+            select(Activity).order_by(Activity.createTime.desc(), Activity.activity_id.desc()).limit(50)
+        ),
+        "实验成员-按实验与人员": (
+            select(ExperimentMember).where(ExperimentMember.experiment_id == 1, ExperimentMember.person_id == person_id)
+        ),
+    }
+
+
+def explain(conn, stmt) -> str:
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    rows = conn.exec_driver_sql(prefix + str(compiled), params).all()
+    return "\n".join("      " + " | ".join(str(v) for v in row) for row in rows)
+
+
+def measure(conn, stmt, repeat: int) -> float:
+    """返回多次执行的耗时中位数（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(stmt).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run(engine, queries, repeat: int) -> dict:
+    results = {}
+    with engine.connect() as conn:
+        for name, stmt in queries.items():
+            plan = explain(conn, stmt)
+            results[name] = (measure(conn, stmt, repeat), plan)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="复合索引基准测试")
+    parser.add_argument("--database-url", default=None, help="目标数据库（默认临时 SQLite 文件）")
+    parser.add_argument("--batches", type=int, default=50)
+    parser.add_argument("--persons", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=500000, help="指尖血数据行数")
+    parser.add_argument("--activities", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    tmp_path = None
+    if not database_url:
+        fd, tmp_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        database_url = f"sqlite:///{tmp_path}"
+
+    engine = create_engine(database_url)
+    try:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            for index in performance_indexes():
+                index.drop(conn)
+
+        print(f"生成种子数据: {args.batches} 批次, {args.persons} 人员, {args.rows} 指尖血数据, {args.activities} 活动记录")
+        seed(engine, args.batches, args.persons, args.rows, args.activities)
+
+        queries = benchmark_queries(args.batches, args.persons)
+        before = run(engine, queries, args.repeat)
+
+        with engine.begin() as conn:
+            for index in performance_indexes():
+                index.create(conn)
+            if engine.dialect.name == "sqlite":
+                conn.exec_driver_sql("ANALYZE")
+            else:
+                for table in ("finger_blood_files", "sensors", "competitor_files", "activities", "experiment_members"):
+                    conn.exec_driver_sql(f"ANALYZE TABLE {table}")
+
+        after = run(engine, queries, args.repeat)
+
+        print()
+        print(f"{'查询':<24}{'无索引(ms)':>12}{'有索引(ms)':>12}{'加速比':>10}")
+        for name in queries:
+            b, a = before[name][0], after[name][0]
+            speedup = b / a if a > 0 else float("inf")
+            print(f"{name:<24}{b:>12.3f}{a:>12.3f}{speedup:>9.1f}x")
+
+        print()
+        print("查询计划对比:")
+        for name in queries:
+            print(f"  {name}")
+            print("    无索引:")
+            print(before[name][1])
+            print("    有索引:")
+            print(after[name][1])
+    finally:
+        engine.dispose()
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+列表接口序列化基准测试脚本
+
+在种子数据集上对比指尖血/传感器列表接口一页数据的两种响应构造方式，测量单次请求的 CPU 时间：
+
+- 常规路径：查询 ORM 对象（joinedload 关联），逐行构造响应模型，再经 FastAPI 按 response_model 校验并编码
+- 快速路径：只查询所需列（Row 元组），由 fast_json.RowSerializer 直接序列化（orjson / 预编译 TypeAdapter）
+
+两种方式的输出会解码后比对，确保响应内容一致。
+
+用法:
+    python benchmark_serialization.py                                  # 临时 SQLite 数据库
+    python benchmark_serialization.py --database-url mysql+pymysql://... --limit 1000
+
+注意：脚本会删除并重建目标数据库中的所有表，请勿对生产库运行。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+import fast_json
+from fast_json import RowSerializer
+from models import Base, Batch, Person, FingerBloodFile, Sensor
+from schemas import FingerBloodDataResponse, SensorResponse
+
+INSERT_CHUNK = 5000
+
+
+def seed(engine, persons: int, rows: int):
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Batch), [{"batch_id": 1, "batch_number": "BATCH0001", "start_time": start}])
+        conn.execute(insert(Person), [
+            {"person_id": p, "person_name": f"受试者{p}", "batch_id": 1} for p in range(1, persons + 1)
+        ])
+        conn.execute(insert(Sensor), [
+            {
+                "sensor_name": f"S{p}-{k}", "person_id": p, "batch_id": 1,
+                "start_time": start + timedelta(days=14 * k), "end_time": start + timedelta(days=14 * k + 14),
+                "end_reason": "到期"
+            }
+            for p in range(1, persons + 1) for k in range(4)
+        ])
+        for offset in range(0, rows, INSERT_CHUNK):
+            conn.execute(insert(FingerBloodFile), [
+                {
+                    "person_id": i % persons + 1, "batch_id": 1,
+                    "collection_time": start + timedelta(minutes=i), "blood_glucose_value": 3 + (i % 1200) / 100
+                }
+                for i in range(offset, min(offset + INSERT_CHUNK, rows))
+            ])
+
+
+def render(loop, field, content) -> bytes:
+    """按 FastAPI 处理 response_model 的方式校验、编码并渲染响应体"""
+    value = loop.run_until_complete(serialize_response(field=field, response_content=content))
+    return JSONResponse(value).body
+
+
+def legacy_finger_blood(db: Session, limit: int):
+    data = db.execute(
+        select(FingerBloodFile)
+        .options(joinedload(FingerBloodFile.batch, innerjoin=True), joinedload(FingerBloodFile.person, innerjoin=True))
+        .order_by(FingerBloodFile.collection_time.desc(), FingerBloodFile.finger_blood_file_id.desc())
+        .limit(limit)
+    ).scalars().all()
+    return [
+        FingerBloodDataResponse(
+            finger_blood_file_id=item.finger_blood_file_id,
+            person_id=item.person_id,
+            batch_id=item.batch_id,
+            collection_time=item.collection_time,
+            blood_glucose_value=float(item.blood_glucose_value),
+            person_name=item.person.person_name,
+            batch_number=item.batch.batch_number,
+        )
+        for item in data
+    ]
+
+
+def fast_finger_blood(db: Session, limit: int):
+    return db.execute(
+        select(
+            FingerBloodFile.person_id, FingerBloodFile.batch_id, FingerBloodFile.collection_time,
+            FingerBloodFile.blood_glucose_value, FingerBloodFile.finger_blood_file_id,
+            Person.person_name, Batch.batch_number,
+        )
+        .join(Person, Person.person_id == FingerBloodFile.person_id)
+        .join(Batch, Batch.batch_id == FingerBloodFile.batch_id)
+        .order_by(FingerBloodFile.collection_time.desc(), FingerBloodFile.finger_blood_file_id.desc())
+        .limit(limit)
+    ).all()
+
+
+def legacy_sensors(db: Session, limit: int):
+    sensors = db.execute(
+        select(Sensor)
+        .options(joinedload(Sensor.batch, innerjoin=True), joinedload(Sensor.person, innerjoin=True))
+        .order_by(Sensor.sensor_id)
+        .limit(limit)
+    ).scalars().all()
+    return [
+        SensorResponse(
+            sensor_id=sensor.sensor_id,
+            sensor_name=sensor.sensor_name,
+            person_id=sensor.person_id,
+            batch_id=sensor.batch_id,
+            start_time=sensor.start_time,
+            end_time=sensor.end_time,
+            end_reason=sensor.end_reason,
+            person_name=sensor.person.person_name,
+            batch_number=sensor.batch.batch_number,
+        )
+        for sensor in sensors
+    ]
+
+
+def fast_sensors(db: Session, limit: int):
+    return db.execute(
+        select(
+            Sensor.sensor_name, Sensor.person_id, Sensor.batch_id, Sensor.start_time, Sensor.end_time,
+            Sensor.end_reason, Sensor.sensor_id, Person.person_name, Batch.batch_number,
+        )
+        .join(Person, Person.person_id == Sensor.person_id)
+        .join(Batch, Batch.batch_id == Sensor.batch_id)
+        .order_by(Sensor.sensor_id)
+        .limit(limit)
+    ).all()
+
+
+def measure(fn, repeat: int):
+    """返回 (CPU 时间中位数, 墙钟时间中位数)（毫秒）及最后一次的输出"""
+    cpu, wall = [], []
+    for _ in range(repeat):
+        started_cpu, started_wall = time.process_time(), time.perf_counter()
+        body = fn()
+        cpu.append((time.process_time() - started_cpu) * 1000)
+        wall.append((time.perf_counter() - started_wall) * 1000)
+    return statistics.median(cpu), statistics.median(wall), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表接口序列化基准测试")
+    parser.add_argument("--database-url", default=None, help="目标数据库（默认临时 SQLite 文件）")
+    parser.add_argument("--persons", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=50000, help="指尖血数据行数")
+    parser.add_argument("--limit", type=int, default=1000, help="每页条数")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    tmp_path = None
+    if not database_url:
+        fd, tmp_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        database_url = f"sqlite:///{tmp_path}"
+
+    engine = create_engine(database_url)
+    loop = asyncio.new_event_loop()
+    try:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        print(f"生成种子数据: {args.persons} 人员, {args.persons * 4} 传感器, {args.rows} 指尖血数据")
+        seed(engine, args.persons, args.rows)
+
+        cases = [
+            ("指尖血列表", FingerBloodDataResponse, legacy_finger_blood, fast_finger_blood),
+            ("传感器列表", SensorResponse, legacy_sensors, fast_sensors),
+        ]
+        print()
+        print(f"每页 {args.limit} 条，重复 {args.repeat} 次取中位数（CPU 时间 / 墙钟时间，毫秒）")
+        if fast_json.orjson is None:
+            print("未安装 orjson，快速路径使用 TypeAdapter")
+        print(f"{'接口':<12}{'常规路径':>18}{'快速路径(orjson)':>22}{'快速路径(TypeAdapter)':>26}{'CPU 降低':>10}")
+        with Session(engine) as db:
+            for name, model, legacy, fast in cases:
+                field = create_response_field(name="Response_" + model.__name__, type_=List[model], mode="serialization")
+                serializer = RowSerializer(model)
+
+                def run_legacy():
+                    db.expunge_all()
+                    return render(loop, field, legacy(db, args.limit))
+
+                def run_adapter():
+                    return serializer.adapter.dump_json([row._asdict() for row in fast(db, args.limit)], warnings=False)
+
+                legacy_cpu, legacy_wall, legacy_body = measure(run_legacy, args.repeat)
+                fast_cpu, fast_wall, fast_body = measure(lambda: serializer.dumps(fast(db, args.limit)), args.repeat)
+                adapter_cpu, adapter_wall, adapter_body = measure(run_adapter, args.repeat)
+
+                if not json.loads(legacy_body) == json.loads(fast_body) == json.loads(adapter_body):
+                    raise SystemExit(f"{name}: 快速路径输出与常规路径不一致")
+                # 快速路径按应用实际使用的后端计算（未安装 orjson 时即 TypeAdapter）
+                reduction = 1 - fast_cpu / legacy_cpu if legacy_cpu > 0 else 0.0
+                print(
+                    f"{name:<12}{legacy_cpu:>9.2f} / {legacy_wall:<7.2f}{fast_cpu:>13.2f} / {fast_wall:<7.2f}"
+                    f"{adapter_cpu:>17.2f} / {adapter_wall:<7.2f}{reduction:>9.0%}"
+                )
+    finally:
+        loop.close()
+        engine.dispose()
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
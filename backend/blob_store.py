@@ -0,0 +1,153 @@
+"""竞品文件内容寻址存储
+
+文件内容按 SHA-256 存储为 ``<BLOB_DIR>/ab/cd/<sha256>``（取哈希前两级分片，避免单目录文件过多），
+file_blobs 表记录每个内容块的引用计数。相同内容重复上传只增加引用计数并插入元数据，
+删除、重命名文件记录只修改数据库；引用计数归零的内容块由 collect_garbage 在宽限期后清理。
+
+引用计数的增减与文件记录的增删在同一事务中执行，由调用方提交。
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from typing import BinaryIO, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import FileBlob
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BLOB_DIR = os.path.join(BASE_DIR, "uploads", "blobs")
+TMP_DIR = os.path.join(BLOB_DIR, "tmp")
+
+# 引用计数归零后保留的时间，期间重新上传相同内容无需再次写入
+GC_GRACE_SECONDS = 3600
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(BLOB_DIR, sha256[:2], sha256[2:4], sha256)
+
+
+def derived_dir(sha256: str) -> str:
+    """由内容块派生的数据（如解析后的列式文件）所在目录，随内容块一起回收"""
+    return blob_path(sha256) + ".derived"
+
+
+def write_temp(source: BinaryIO, chunk_size: int = 1024 * 1024) -> Tuple[str, str, int]:
+    """将数据流写入临时文件并同时计算 SHA-256，返回 (临时文件路径, sha256, 大小)"""
+    os.makedirs(TMP_DIR, exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=TMP_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, hasher.hexdigest(), size
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _place(src_path: str, sha256: str, move: bool):
+    target = blob_path(sha256)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if move:
+        os.replace(src_path, target)
+    else:
+        # 复制到同目录临时文件后原子替换，避免出现半写入的内容块
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+        with os.fdopen(fd, "wb") as dst, open(src_path, "rb") as src:
+            while True:
+                chunk = src.read(1024 * 1024)
+                if not chunk:
+                    break
+                dst.write(chunk)
+        os.replace(tmp_path, target)
+
+
+def acquire_blob(db, sha256: str, size: int, src_path: str, move: bool = True) -> int:
+    """
+    增加内容块引用计数，返回 blob_id
+
+    内容块已存在时只更新计数（move=True 时删除 src_path）；否则将 src_path 放入存储目录并插入记录。
+    db 可以是 Session 或 Connection，不提交事务。
+    """
+    while True:
+        blob_id = db.execute(select(FileBlob.blob_id).where(FileBlob.sha256 == sha256)).scalar()
+        if blob_id is not None:
+            # 行锁保证与 collect_garbage 互斥：计数已增加的内容块不会被回收
+            updated = db.execute(
+                update(FileBlob).where(FileBlob.blob_id == blob_id).values(ref_count=FileBlob.ref_count + 1)
+            ).rowcount
+            if updated:
+                if not os.path.exists(blob_path(sha256)):
+                    _place(src_path, sha256, move)
+                elif move:
+                    os.remove(src_path)
+                return blob_id
+            continue
+
+        _place(src_path, sha256, move)
+        try:
+            with db.begin_nested():
+                return db.execute(
+                    insert(FileBlob).values(sha256=sha256, size=size, ref_count=1, create_time=datetime.now())
+                ).inserted_primary_key[0]
+        except IntegrityError:
+            # 并发上传了相同内容，改为增加已有记录的计数
+            move = False
+            src_path = blob_path(sha256)
+
+
+def release_blob(db, blob_id: int):
+    """减少内容块引用计数（不删除文件），不提交事务"""
+    db.execute(
+        update(FileBlob)
+        .where(FileBlob.blob_id == blob_id)
+        .values(ref_count=FileBlob.ref_count - 1, release_time=datetime.now())
+    )
+
+
+def collect_garbage(db, grace_seconds: int = GC_GRACE_SECONDS) -> int:
+    """删除引用计数为 0 且超过宽限期的内容块，返回删除数量"""
+    cutoff = datetime.now() - timedelta(seconds=grace_seconds)
+    candidates = db.execute(
+        select(FileBlob.blob_id).where(FileBlob.ref_count <= 0, FileBlob.release_time < cutoff)
+    ).scalars().all()
+
+    removed = 0
+    for blob_id in candidates:
+        # 锁定该行后再次确认计数为 0，删除文件与记录在同一事务中完成
+        blob = db.execute(
+            select(FileBlob.blob_id, FileBlob.sha256)
+            .where(FileBlob.blob_id == blob_id, FileBlob.ref_count <= 0)
+            .with_for_update()
+        ).first()
+        if blob is None:
+            db.rollback()
+            continue
+        path = blob_path(blob.sha256)
+        if os.path.exists(path):
+            os.remove(path)
+        shutil.rmtree(derived_dir(blob.sha256), ignore_errors=True)
+        db.execute(delete(FileBlob).where(FileBlob.blob_id == blob_id))
+        db.commit()
+        removed += 1
+    return removed
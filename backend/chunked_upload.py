@@ -0,0 +1,145 @@
+"""分块可续传上传
+
+上传流程：init 创建上传会话 → 按偏移量 PUT 数据块 → complete 完成。
+数据块追加写入 ``<upload_dir>/.partial/<upload_id>.part``，会话信息保存在同名 .json 文件中，
+服务重启后仍可从已写入的偏移量继续上传。SHA-256 在写入时增量计算；
+若进程内的哈希状态丢失（如重启），会从已写入的部分文件重新计算。
+
+本模块中的方法均为阻塞文件 I/O，异步接口中应通过线程池调用。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+# 未完成的上传会话保留时间（秒），超时后在新建会话时清理
+STALE_UPLOAD_SECONDS = 7 * 24 * 3600
+
+
+class UploadError(Exception):
+    """上传会话错误，status_code 对应返回给客户端的 HTTP 状态码"""
+
+    def __init__(self, status_code: int, detail: str, offset: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.offset = offset
+
+
+class ChunkedUploadStore:
+    def __init__(self, upload_dir: str):
+        self.partial_dir = os.path.join(upload_dir, ".partial")
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._busy = set()
+        # upload_id -> (已计算哈希的字节数, sha256 对象)
+        self._hashers: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.partial_dir, f"{upload_id}.json")
+
+    def part_path(self, upload_id: str) -> str:
+        return os.path.join(self.partial_dir, f"{upload_id}.part")
+
+    def create(self, user_id: int, batch_id: int, person_id: int, filename: str, total_size: int) -> dict:
+        """创建上传会话"""
+        self.cleanup_stale()
+        upload_id = uuid.uuid4().hex
+        meta = {
+            "upload_id": upload_id,
+            "user_id": user_id,
+            "batch_id": batch_id,
+            "person_id": person_id,
+            "filename": filename,
+            "total_size": total_size,
+            "created_at": time.time(),
+        }
+        with open(self.part_path(upload_id), "wb"):
+            pass
+        with open(self._meta_path(upload_id), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        with self._lock:
+            self._hashers[upload_id] = (0, hashlib.sha256())
+        return {**meta, "offset": 0}
+
+    def get(self, upload_id: str, user_id: int) -> dict:
+        """获取上传会话及当前已写入的偏移量"""
+        if not upload_id.isalnum():
+            raise UploadError(404, "上传会话不存在")
+        try:
+            with open(self._meta_path(upload_id), encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise UploadError(404, "上传会话不存在")
+        if meta["user_id"] != user_id:
+            raise UploadError(403, "无权访问该上传会话")
+        meta["offset"] = os.path.getsize(self.part_path(upload_id))
+        return meta
+
+    def acquire(self, upload_id: str):
+        """同一会话同一时间只允许一个写入请求"""
+        with self._lock:
+            if upload_id in self._busy:
+                raise UploadError(409, "该上传会话正在写入中")
+            self._busy.add(upload_id)
+
+    def release(self, upload_id: str):
+        with self._lock:
+            self._busy.discard(upload_id)
+
+    def write(self, upload_id: str, offset: int, data: bytes) -> int:
+        """在指定偏移量写入数据块（须与当前文件末尾一致），返回新的偏移量"""
+        path = self.part_path(upload_id)
+        current = os.path.getsize(path)
+        if offset != current:
+            raise UploadError(409, f"偏移量不匹配，当前已上传 {current} 字节", offset=current)
+        with open(path, "ab") as f:
+            f.write(data)
+        hashed, hasher = self._hasher(upload_id, current)
+        hasher.update(data)
+        with self._lock:
+            self._hashers[upload_id] = (hashed + len(data), hasher)
+        return current + len(data)
+
+    def finalize(self, upload_id: str) -> Tuple[str, str, int]:
+        """返回 (部分文件路径, SHA-256, 文件大小)，调用方负责移动文件后调用 discard"""
+        path = self.part_path(upload_id)
+        size = os.path.getsize(path)
+        _, hasher = self._hasher(upload_id, size)
+        return path, hasher.hexdigest(), size
+
+    def discard(self, upload_id: str):
+        for path in (self.part_path(upload_id), self._meta_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+
+    def cleanup_stale(self):
+        now = time.time()
+        for name in os.listdir(self.partial_dir):
+            if name.endswith(".json"):
+                path = os.path.join(self.partial_dir, name)
+                if now - os.path.getmtime(path) > STALE_UPLOAD_SECONDS:
+                    self.discard(name[:-len(".json")])
+
+    def _hasher(self, upload_id: str, size: int):
+        """获取与已写入字节数一致的哈希状态，不一致时从部分文件重新计算"""
+        with self._lock:
+            state = self._hashers.get(upload_id)
+        if state is not None and state[0] == size:
+            return state
+        hasher = hashlib.sha256()
+        with open(self.part_path(upload_id), "rb") as f:
+            remaining = size
+            while remaining > 0:
+                block = f.read(min(1024 * 1024, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        return size, hasher
@@ -0,0 +1,212 @@
+"""响应压缩中间件
+
+按请求头 Accept-Encoding 协商压缩算法（zstd / br / gzip，按配置的优先级，q 值为 0 的不使用），
+对响应体进行流式压缩：
+
+- 响应体小于阈值且一次发送完毕时不压缩；流式响应无法预知大小，直接压缩
+- 流式响应每个数据块压缩后立即刷新（gzip 为 Z_SYNC_FLUSH），客户端可以边下载边解压，
+  流式导出不会因压缩而被缓冲到结束才发出
+- 已压缩的内容（xlsx 等 Office 文档、zip/gzip、图片、音视频、二进制文件）、
+  已带 Content-Encoding 的响应、206/204/304 响应及 HEAD 请求不压缩
+- 压缩后移除 Content-Length，添加 Vary: Accept-Encoding，强 ETag 改为弱 ETag
+
+brotli 与 zstandard 为可选依赖，未安装时对应算法不参与协商。
+"""
+
+import zlib
+from typing import Callable, Dict, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli 为可选依赖
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard 为可选依赖
+    zstandard = None
+
+# 本身已压缩、再压缩没有收益的内容类型（前缀匹配）
+UNCOMPRESSIBLE_CONTENT_TYPES = (
+    "application/vnd.openxmlformats-officedocument.",  # xlsx/docx/pptx 均为 zip 容器
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "application/x-brotli",
+    "application/pdf",
+    "application/octet-stream",
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+)
+# 不压缩的状态码：部分内容按原始字节区间返回，无响应体的状态码无需处理
+SKIP_STATUS_CODES = (204, 206, 304)
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if finish else self._compressor.flush())
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        out = self._compressor.compress(data)
+        if finish:
+            return out + self._compressor.flush()
+        return out + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+def available_encodings() -> Sequence[str]:
+    """当前环境可用的压缩算法"""
+    return tuple(
+        name for name, module in (("zstd", zstandard), ("br", brotli), ("gzip", zlib)) if module is not None
+    )
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """解析 Accept-Encoding，返回 {算法: q 值}"""
+    weights = {}
+    for part in value.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, raw = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(raw)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    return weights
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Sequence[str]) -> Optional[str]:
+    """按客户端 q 值选择算法，q 值相同时按 encodings 的顺序（服务端优先级）"""
+    weights = parse_accept_encoding(accept_encoding)
+    best, best_q = None, 0.0
+    for name in encodings:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return not any(content_type.startswith(prefix) for prefix in UNCOMPRESSIBLE_CONTENT_TYPES)
+
+
+class CompressionMiddleware:
+    """ASGI 响应压缩中间件"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Sequence[str] = ("zstd", "br", "gzip"),
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        supported = available_encodings()
+        self.encodings = tuple(name for name in encodings if name in supported)
+        self._factories: Dict[str, Callable[[], object]] = {
+            "gzip": lambda: _GzipEncoder(gzip_level),
+            "br": lambda: _BrotliEncoder(brotli_quality),
+            "zstd": lambda: _ZstdEncoder(zstd_level),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(send, encoding, self._factories[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """处理单个响应：缓存响应头直到第一个数据块，据此决定是否压缩"""
+
+    def __init__(self, send: Send, encoding: str, factory: Callable[[], object], minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.factory = factory
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                message["status"] in SKIP_STATUS_CODES
+                or "content-encoding" in headers
+                or "content-range" in headers
+                or not is_compressible(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self._send(message)
+            else:
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            self.encoder = self.factory()
+            headers["Content-Encoding"] = self.encoding
+            if "content-length" in headers:
+                del headers["content-length"]
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # 压缩后的字节与原始内容不同，强 ETag 不再成立
+                headers["ETag"] = "W/" + etag
+            await self._send(start)
+
+        await self._send({
+            "type": "http.response.body",
+            "body": self.encoder.compress(body, finish=not more_body),
+            "more_body": more_body,
+        })
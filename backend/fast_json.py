@@ -0,0 +1,72 @@
+"""列表接口的快速 JSON 序列化
+
+常规路径中每行先构造 ORM 对象与字典，再构造响应模型，FastAPI 还会按 response_model 再校验一遍整个列表，
+1000 行一页时 CPU 主要耗在这些 Pydantic 对象上。
+
+快速路径只查询响应需要的列（SQLAlchemy Row 元组，列名即响应字段名），由 RowSerializer 直接序列化：
+
+- 优先使用 orjson；datetime 与 Decimal 交给模型配置中的 json_encoders 处理，
+  保证输出与 BaseModelWithConfig 一致（'%Y-%m-%d %H:%M:%S'）
+- 未安装 orjson 时使用按响应模型字段预编译的 TypeAdapter（TypedDict，不做校验）序列化
+
+响应模型仍作为接口的 response_model 用于生成 OpenAPI 文档。
+对比见 benchmark_serialization.py。
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, List, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from sqlalchemy.engine import Row
+from typing_extensions import TypedDict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为可选依赖
+    orjson = None
+
+
+class RowSerializer:
+    """按响应模型把 Row 列表序列化为 JSON 字节串，每个模型创建一次并复用"""
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields = tuple(model.model_fields)
+        encoders = model.model_config.get("json_encoders") or {}
+        self._datetime_encoder = encoders.get(datetime)
+        row_type = TypedDict(
+            f"{model.__name__}Row",
+            {name: Optional[field.annotation] for name, field in model.model_fields.items()},
+            total=False,
+        )
+        row_type.__pydantic_config__ = ConfigDict(json_encoders=encoders)
+        self.adapter = TypeAdapter(List[row_type])
+
+    def _default(self, value):
+        if isinstance(value, datetime) and self._datetime_encoder is not None:
+            return self._datetime_encoder(value)
+        if isinstance(value, Decimal):
+            return float(value)
+        raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+    def dumps(self, rows: Iterable[Row]) -> bytes:
+        records = [row._asdict() for row in rows]
+        if orjson is not None:
+            option = orjson.OPT_PASSTHROUGH_DATETIME if self._datetime_encoder is not None else 0
+            return orjson.dumps(records, default=self._default, option=option)
+        return self.adapter.dump_json(records, warnings=False)
+
+    def response(self, rows: Iterable[Row], response: Optional[Response] = None) -> Response:
+        """
+        构造 JSON 响应
+
+        直接返回 Response 时 FastAPI 不会合并依赖注入的 response 上设置的头（如分页游标），传入后一并带上。
+        """
+        result = Response(content=self.dumps(rows), media_type="application/json")
+        if response is not None:
+            for name, value in response.headers.items():
+                if name != "content-length":
+                    result.headers[name] = value
+        return result
@@ -0,0 +1,161 @@
+"""竞品文件存储校验
+
+列表/导出接口只读取 competitor_files 中记录的元数据，本模块负责定期核对记录与实际存储是否一致：
+按内容块逐个 stat，文件缺失标记为 missing；大小不一致标记为 drifted；
+修改时间变化时重新计算 SHA-256，内容不一致标记为 drifted，一致则更新记录的修改时间。
+每个内容块只访问一次文件系统，引用同一内容的文件记录一并更新。
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import bindparam, func, select, update
+
+from blob_store import blob_path, hash_file
+from config import settings
+from database import SessionLocal
+from models import CompetitorFile, FileBlob
+
+STATUS_OK = "ok"
+STATUS_MISSING = "missing"
+STATUS_DRIFTED = "drifted"
+
+
+def reconcile_files(db, batch_size: int = 500, verify_hash: bool = False) -> dict:
+    """
+    校验全部竞品文件的存储状态，返回各状态计数
+
+    Args:
+        db: 数据库会话
+        batch_size: 每批校验的内容块数量（每批一个事务）
+        verify_hash: 为 True 时无论修改时间是否变化都重新计算哈希
+    """
+    started = time.monotonic()
+    result = {STATUS_OK: 0, STATUS_MISSING: 0, STATUS_DRIFTED: 0, "rehashed": 0}
+    table = CompetitorFile.__table__
+    statement = (
+        table.update()
+        .where(table.c.blob_id == bindparam("b_blob_id"))
+        .values(
+            storage_status=bindparam("b_status"),
+            file_mtime=bindparam("b_mtime"),
+            checked_time=bindparam("b_checked"),
+        )
+    )
+
+    last_id = 0
+    while True:
+        blobs = db.execute(
+            select(FileBlob.blob_id, FileBlob.sha256, FileBlob.size, func.max(CompetitorFile.file_mtime).label("mtime"))
+            .join(CompetitorFile, CompetitorFile.blob_id == FileBlob.blob_id)
+            .where(FileBlob.blob_id > last_id)
+            .group_by(FileBlob.blob_id, FileBlob.sha256, FileBlob.size)
+            .order_by(FileBlob.blob_id)
+            .limit(batch_size)
+        ).all()
+        if not blobs:
+            break
+
+        now = datetime.now()
+        params = []
+        for blob in blobs:
+            status, mtime = STATUS_OK, blob.mtime
+            try:
+                stat = os.stat(blob_path(blob.sha256))
+            except FileNotFoundError:
+                status = STATUS_MISSING
+            else:
+                mtime = datetime.fromtimestamp(int(stat.st_mtime))
+                if stat.st_size != blob.size:
+                    status = STATUS_DRIFTED
+                elif verify_hash or mtime != blob.mtime:
+                    result["rehashed"] += 1
+                    if hash_file(blob_path(blob.sha256)) != blob.sha256:
+                        status = STATUS_DRIFTED
+                if status == STATUS_DRIFTED:
+                    # 保留原修改时间，使后续每次校验都重新核对，文件恢复后自动回到 ok
+                    mtime = blob.mtime
+            result[status] += 1
+            params.append({"b_blob_id": blob.blob_id, "b_status": status, "b_mtime": mtime, "b_checked": now})
+
+        db.execute(statement, params)
+        db.commit()
+        last_id = blobs[-1].blob_id
+
+    # 未关联内容块的记录（迁移时原文件已缺失）
+    db.execute(
+        update(CompetitorFile)
+        .where(CompetitorFile.blob_id.is_(None))
+        .values(storage_status=STATUS_MISSING, checked_time=datetime.now())
+    )
+    db.commit()
+
+    result["elapsed_seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+
+class FileReconciler:
+    """按固定间隔在后台线程中执行 reconcile_files"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_result: Optional[dict] = None
+        self.last_run: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running or self.interval <= 0:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="file-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> dict:
+        db = SessionLocal()
+        try:
+            self.last_result = reconcile_files(db)
+            self.last_error = None
+            return self.last_result
+        except Exception as e:
+            db.rollback()
+            self.last_error = str(e)
+            print(f"竞品文件存储校验失败: {e}")
+            raise
+        finally:
+            self.last_run = datetime.now()
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "last_run": self.last_run.strftime("%Y-%m-%d %H:%M:%S") if self.last_run else None,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+    def _run(self):
+        # 启动后先等待一个间隔，避免与应用启动争用资源
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                pass
+
+
+file_reconciler = FileReconciler(interval=settings.file_reconcile_interval_seconds)
@@ -0,0 +1,204 @@
+"""支持条件请求与断点续传的文件响应
+
+- ETag / Last-Modified：客户端携带 If-None-Match / If-Modified-Since 且未变化时返回 304，不发送文件内容
+- Range：支持单区间 ``bytes=start-end`` / ``bytes=start-`` / ``bytes=-suffix``，返回 206；
+  If-Range 与当前版本不一致时忽略 Range 返回完整文件；多区间请求同样返回完整文件
+- RangeStaticFiles：替代 StaticFiles，使 /uploads 挂载同样支持以上能力，
+  内容块文件（文件名即 SHA-256）使用内容哈希作为强 ETag
+"""
+
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from hashlib import md5
+from typing import Mapping, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def make_etag(value: str) -> str:
+    return f'"{value}"'
+
+
+def _parse_http_date(value: str) -> Optional[int]:
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def is_not_modified(request_headers: Headers, etag: str, last_modified: float) -> bool:
+    """If-None-Match（弱比较）优先；未携带时按 If-Modified-Since 判断"""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is not None:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and int(last_modified) <= since
+    return False
+
+
+def if_range_matches(request_headers: Headers, etag: str, last_modified: float) -> bool:
+    """If-Range 为 ETag 时强比较，为日期时要求与 Last-Modified 完全一致"""
+    if_range = request_headers.get("if-range")
+    if if_range is None:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return _parse_http_date(if_range) == int(last_modified)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析 Range 请求头，返回闭区间 (start, end)
+
+    格式无法识别或包含多个区间时返回 None（按规范忽略 Range，返回完整内容）；
+    区间超出文件范围时抛出 RangeNotSatisfiable。
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, sep, end_text = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start_text == "":
+            suffix = int(end_text)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            start, end = max(size - suffix, 0), size - 1
+        else:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+            if start >= size:
+                raise RangeNotSatisfiable()
+            if end < start:
+                return None
+            end = min(end, size - 1)
+    except ValueError:
+        return None
+    if size == 0:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class RangeFileResponse(FileResponse):
+    """在 FileResponse 基础上支持只发送文件的一个字节区间（206 Partial Content）"""
+
+    def __init__(self, path, byte_range: Optional[Tuple[int, int]] = None, **kwargs):
+        self.byte_range = byte_range
+        if byte_range is not None:
+            stat_result = kwargs["stat_result"]
+            start, end = byte_range
+            headers = dict(kwargs.pop("headers", None) or {})
+            headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+            headers["content-length"] = str(end - start + 1)
+            kwargs.update(headers=headers, status_code=206)
+        super().__init__(path, **kwargs)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.byte_range is None:
+            await super().__call__(scope, receive, send)
+            return
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_header_only:
+            start, end = self.byte_range
+            remaining = end - start + 1
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(start)
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+def conditional_file_response(
+    request_headers: Headers,
+    method: str,
+    path: str,
+    etag: str,
+    last_modified: float,
+    stat_result: Optional[os.stat_result] = None,
+    filename: Optional[str] = None,
+    media_type: Optional[str] = None,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    按请求头返回 304 / 206 / 416 / 200 响应
+
+    条件判断只使用传入的 etag 与 last_modified，返回 304 时不访问文件系统；
+    未提供 stat_result 时在需要发送内容前才 stat 文件（文件不存在时抛出 FileNotFoundError）。
+    """
+    response_headers = {
+        "etag": etag,
+        "last-modified": formatdate(last_modified, usegmt=True),
+        "accept-ranges": "bytes",
+        **(headers or {}),
+    }
+    if method in ("GET", "HEAD") and is_not_modified(request_headers, etag, last_modified):
+        return Response(status_code=304, headers=response_headers)
+
+    if stat_result is None:
+        stat_result = os.stat(path)
+
+    byte_range = None
+    range_header = request_headers.get("range")
+    if range_header and method == "GET" and if_range_matches(request_headers, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, stat_result.st_size)
+        except RangeNotSatisfiable:
+            response_headers["content-range"] = f"bytes */{stat_result.st_size}"
+            return Response(status_code=416, headers=response_headers)
+
+    return RangeFileResponse(
+        path,
+        byte_range=byte_range,
+        stat_result=stat_result,
+        headers=response_headers,
+        filename=filename,
+        media_type=media_type,
+        method=method,
+    )
+
+
+class RangeStaticFiles(StaticFiles):
+    """支持条件请求与 Range 的静态文件服务"""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        if status_code != 200:
+            # html 模式下的 404 页面等，保持默认行为
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        name = os.path.basename(full_path)
+        if SHA256_PATTERN.match(name):
+            # 内容寻址存储中的文件，文件名即内容哈希
+            etag = make_etag(name)
+        else:
+            etag = make_etag(md5(f"{stat_result.st_mtime}-{stat_result.st_size}".encode()).hexdigest())
+        return conditional_file_response(
+            Headers(scope=scope),
+            scope["method"],
+            full_path,
+            etag=etag,
+            last_modified=stat_result.st_mtime,
+            stat_result=stat_result,
+        )
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+竞品文件内容块回收脚本 - 删除不再被任何文件记录引用的内容块
+
+删除/重命名文件记录只修改数据库，物理文件由本脚本定期清理:
+    python gc_blobs.py --grace-seconds 3600
+"""
+
+import argparse
+
+from blob_store import BLOB_DIR, GC_GRACE_SECONDS, collect_garbage
+from database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="竞品文件内容块回收")
+    parser.add_argument("--grace-seconds", type=int, default=GC_GRACE_SECONDS, help="引用计数归零后保留的秒数")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        removed = collect_garbage(db, args.grace_seconds)
+        print(f"已从 {BLOB_DIR} 回收 {removed} 个内容块")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
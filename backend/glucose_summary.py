@@ -0,0 +1,205 @@
+"""指尖血数据汇总表维护
+
+glucose_summaries 按 (批次, 人员) 保存条数、血糖值之和与平方和、最小/最大值及最早/最晚采集时间，
+均值与标准差由和与平方和推导。指尖血数据增删改时在同一事务中增量更新对应的一行：
+
+- 新增：一条原子 UPDATE 累加计数与和、比较更新极值，不存在时插入
+- 删除：扣减计数与和；被删除的值恰为极值（或采集时间为最早/最晚）时，按索引重新统计该组
+- 修改：按删除旧值、新增新值处理
+
+调用方需先 flush 数据变更，再调用本模块函数，最后一并提交。
+rebuild_summaries 按原表全量重建，用于修复或初始化。
+"""
+
+import math
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import Batch, FingerBloodFile, GlucoseSummary, Person
+
+# (batch_id, person_id, collection_time, blood_glucose_value)
+Reading = Tuple[int, int, datetime, float]
+
+
+def _group_filter(batch_id: int, person_id: int):
+    return (GlucoseSummary.batch_id == batch_id, GlucoseSummary.person_id == person_id)
+
+
+def _apply_added(db, batch_id: int, person_id: int, count: int, total: float, square_total: float,
+                 min_value, max_value, first_time: datetime, last_time: datetime):
+    """将一组新增数据的聚合值合并进汇总行（不存在时插入）"""
+    s = GlucoseSummary
+    while True:
+        updated = db.execute(
+            update(s)
+            .where(*_group_filter(batch_id, person_id))
+            .values(
+                data_count=s.data_count + count,
+                value_sum=s.value_sum + total,
+                value_square_sum=s.value_square_sum + square_total,
+                min_value=case((s.min_value <= min_value, s.min_value), else_=min_value),
+                max_value=case((s.max_value >= max_value, s.max_value), else_=max_value),
+                first_time=case((s.first_time <= first_time, s.first_time), else_=first_time),
+                last_time=case((s.last_time >= last_time, s.last_time), else_=last_time),
+                update_time=datetime.now(),
+            )
+        ).rowcount
+        if updated:
+            return
+        try:
+            with db.begin_nested():
+                db.execute(insert(s).values(
+                    batch_id=batch_id, person_id=person_id, data_count=count,
+                    value_sum=total, value_square_sum=square_total,
+                    min_value=min_value, max_value=max_value,
+                    first_time=first_time, last_time=last_time, update_time=datetime.now(),
+                ))
+            return
+        except IntegrityError:
+            # 并发插入了同一组，改为更新
+            continue
+
+
+def refresh_group(db, batch_id: int, person_id: int):
+    """按原表重新统计单个 (批次, 人员)，无数据时删除汇总行"""
+    row = db.execute(
+        select(
+            func.count(),
+            func.sum(FingerBloodFile.blood_glucose_value),
+            func.sum(FingerBloodFile.blood_glucose_value * FingerBloodFile.blood_glucose_value),
+            func.min(FingerBloodFile.blood_glucose_value),
+            func.max(FingerBloodFile.blood_glucose_value),
+            func.min(FingerBloodFile.collection_time),
+            func.max(FingerBloodFile.collection_time),
+        ).where(FingerBloodFile.batch_id == batch_id, FingerBloodFile.person_id == person_id)
+    ).one()
+    db.execute(delete(GlucoseSummary).where(*_group_filter(batch_id, person_id)))
+    if row[0]:
+        _apply_added(db, batch_id, person_id, row[0], float(row[1]), float(row[2]), *row[3:])
+
+
+def record_added(db, readings: Iterable[Reading]):
+    """新增数据后更新汇总，多条数据按组合并后每组执行一次更新"""
+    groups = {}
+    for batch_id, person_id, collection_time, value in readings:
+        value = float(value)
+        group = groups.get((batch_id, person_id))
+        if group is None:
+            groups[(batch_id, person_id)] = [1, value, value * value, value, value, collection_time, collection_time]
+            continue
+        group[0] += 1
+        group[1] += value
+        group[2] += value * value
+        group[3] = min(group[3], value)
+        group[4] = max(group[4], value)
+        group[5] = min(group[5], collection_time)
+        group[6] = max(group[6], collection_time)
+    for (batch_id, person_id), group in groups.items():
+        _apply_added(db, batch_id, person_id, *group)
+
+
+def record_removed(db, reading: Reading) -> bool:
+    """
+    删除数据后更新汇总
+
+    返回 True 表示该组已按原表重新统计（结果已反映当前数据，调用方无需再合并同组的新增）。
+    """
+    batch_id, person_id, collection_time, value = reading
+    value = float(value)
+    s = GlucoseSummary
+    summary = db.execute(
+        select(s.data_count, s.min_value, s.max_value, s.first_time, s.last_time)
+        .where(*_group_filter(batch_id, person_id))
+        .with_for_update()
+    ).first()
+    if (
+        summary is None
+        or summary.data_count <= 1
+        or value <= float(summary.min_value)
+        or value >= float(summary.max_value)
+        or collection_time <= summary.first_time
+        or collection_time >= summary.last_time
+    ):
+        refresh_group(db, batch_id, person_id)
+        return True
+
+    db.execute(
+        update(s)
+        .where(*_group_filter(batch_id, person_id))
+        .values(
+            data_count=s.data_count - 1,
+            value_sum=s.value_sum - value,
+            value_square_sum=s.value_square_sum - value * value,
+            update_time=datetime.now(),
+        )
+    )
+    return False
+
+
+def record_updated(db, old: Reading, new: Reading):
+    """修改数据后更新汇总"""
+    refreshed = record_removed(db, old)
+    if refreshed and old[:2] == new[:2]:
+        return
+    record_added(db, [new])
+
+
+def rebuild_summaries(db, batch_id: Optional[int] = None) -> int:
+    """按原表全量重建汇总（可限定批次），不提交事务，返回重建的组数"""
+    deleted = delete(GlucoseSummary)
+    source = (
+        select(
+            FingerBloodFile.batch_id,
+            FingerBloodFile.person_id,
+            func.count(),
+            func.sum(FingerBloodFile.blood_glucose_value),
+            func.sum(FingerBloodFile.blood_glucose_value * FingerBloodFile.blood_glucose_value),
+            func.min(FingerBloodFile.blood_glucose_value),
+            func.max(FingerBloodFile.blood_glucose_value),
+            func.min(FingerBloodFile.collection_time),
+            func.max(FingerBloodFile.collection_time),
+            literal(datetime.now(), GlucoseSummary.update_time.type),
+        )
+        .group_by(FingerBloodFile.batch_id, FingerBloodFile.person_id)
+    )
+    if batch_id is not None:
+        deleted = deleted.where(GlucoseSummary.batch_id == batch_id)
+        source = source.where(FingerBloodFile.batch_id == batch_id)
+    db.execute(deleted)
+    return db.execute(
+        insert(GlucoseSummary).from_select(
+            ["batch_id", "person_id", "data_count", "value_sum", "value_square_sum",
+             "min_value", "max_value", "first_time", "last_time", "update_time"],
+            source,
+        )
+    ).rowcount
+
+
+def summary_statistics(summary: GlucoseSummary) -> dict:
+    """由汇总行计算均值与（样本）标准差"""
+    count = summary.data_count
+    mean = summary.value_sum / count if count else None
+    std = None
+    if count > 1:
+        variance = (summary.value_square_sum - summary.value_sum * summary.value_sum / count) / (count - 1)
+        # 浮点累加误差可能使方差略小于 0
+        std = math.sqrt(max(variance, 0.0))
+    return {"mean": mean, "std": std}
+
+
+def list_summaries(db, batch_id: Optional[int] = None, person_id: Optional[int] = None):
+    """查询汇总行及批次编号、人员姓名"""
+    query = (
+        select(GlucoseSummary, Batch.batch_number, Person.person_name)
+        .join(Batch, Batch.batch_id == GlucoseSummary.batch_id)
+        .join(Person, Person.person_id == GlucoseSummary.person_id)
+        .order_by(GlucoseSummary.batch_id, GlucoseSummary.person_id)
+    )
+    if batch_id:
+        query = query.where(GlucoseSummary.batch_id == batch_id)
+    if person_id:
+        query = query.where(GlucoseSummary.person_id == person_id)
+    return db.execute(query).all()
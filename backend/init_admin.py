@@ -5,7 +5,8 @@
 
 from sqlalchemy.orm import Session
 from database import SessionLocal, engine
-from models import Base, User, RoleEnum
+from migrations import upgrade
+from models import User, RoleEnum
 from passlib.context import CryptContext
 
 # 密码加密
@@ -13,8 +14,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def init_database():
     """初始化数据库"""
-    # 创建所有表
-    Base.metadata.create_all(bind=engine)
+    # 执行数据库迁移（创建/升级所有表）
+    upgrade(engine)
     
     # 创建数据库会话
     db = SessionLocal()
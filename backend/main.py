@@ -1,13 +1,23 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from datetime import datetime
 import json
 import os
 
+from config import settings
+from database import engine, get_pool_metrics
+from migrations import check_schema_version, upgrade
+from activity_writer import activity_writer
+from file_reconcile import file_reconciler
+from file_responses import RangeStaticFiles
+from compression import CompressionMiddleware
+from workbook_ingest import workbook_ingestor
+from models import User
+from routers.auth import check_admin_permission
+
 # 导入路由
-from routers import batches, persons, experiments, competitor_files, finger_blood_data, sensors, auth, activities
+from routers import batches, persons, experiments, competitor_files, finger_blood_data, sensors, auth, activities, stats, accuracy
 
 # datetime格式统一配置已在schemas.py中的BaseModelWithConfig类中设置
 @asynccontextmanager
@@ -21,9 +31,25 @@ async def lifespan(app: FastAPI):
         os.makedirs(dir_path, exist_ok=True)
     print(f"上传目录创建完成: {upload_dirs}")
     
+    # 校验数据库结构版本（仅读取版本表，不反射业务表）
+    if settings.db_auto_migrate:
+        upgrade(engine)
+    print(f"数据库结构版本: {check_schema_version(engine)}")
+    
+    # 启动活动日志后台批量写入
+    activity_writer.start()
+    # 启动竞品文件存储后台校验
+    file_reconciler.start()
+    # 启动竞品工作簿后台解析
+    workbook_ingestor.start()
+    
     yield
     # 关闭时的清理工作
     print("应用正在关闭...")
+    # 写入队列中剩余的活动日志
+    activity_writer.stop()
+    file_reconciler.stop()
+    workbook_ingestor.stop()
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -40,13 +66,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # 键集分页的下一页游标
 )
 
-# 静态文件服务（用于文件下载）- 使用绝对路径
+# 响应压缩（按 Accept-Encoding 协商 zstd/br/gzip，流式响应逐块刷新，已压缩的内容如 xlsx 不处理）
+app.add_middleware(
+    CompressionMiddleware,
+    encodings=[name.strip() for name in settings.compression_encodings.split(",") if name.strip()],
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+    zstd_level=settings.compression_zstd_level,
+)
+
+# 静态文件服务（用于文件下载，支持 ETag 条件请求与 Range 断点续传）- 使用绝对路径
 base_dir = os.path.dirname(os.path.abspath(__file__))
 uploads_dir = os.path.join(base_dir, "uploads")
 if os.path.exists(uploads_dir):
-    app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
+    app.mount("/uploads", RangeStaticFiles(directory=uploads_dir), name="uploads")
 
 # 注册路由
 app.include_router(auth.router)
@@ -57,6 +94,8 @@ app.include_router(experiments.router)
 app.include_router(competitor_files.router)
 app.include_router(finger_blood_data.router)
 app.include_router(sensors.router)
+app.include_router(stats.router)
+app.include_router(accuracy.router)
 
 # 根路径
 @app.get("/")
@@ -73,6 +112,21 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+# 数据库连接池指标（仅管理员）
+@app.get("/health/db-pool")
+def db_pool_metrics(current_user: User = Depends(check_admin_permission)):
+    return get_pool_metrics()
+
+# 活动日志写入器状态（仅管理员）
+@app.get("/health/activity-log")
+def activity_log_metrics(current_user: User = Depends(check_admin_permission)):
+    return activity_writer.stats()
+
+# 竞品文件存储校验状态（仅管理员）
+@app.get("/health/file-storage")
+def file_storage_metrics(current_user: User = Depends(check_admin_permission)):
+    return {**file_reconciler.stats(), "workbook_ingest": workbook_ingestor.stats()}
+
 # 全局异常处理
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
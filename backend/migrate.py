@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+数据库迁移命令行入口
+
+用法:
+    python migrate.py upgrade [版本号]     # 升级到最新（或指定）版本
+    python migrate.py downgrade <版本号>   # 回退到指定版本
+    python migrate.py current             # 查看当前版本
+    python migrate.py history             # 查看迁移列表及执行状态
+"""
+
+import argparse
+import sys
+
+from database import engine
+from migrations import (
+    SchemaVersionError, applied_revisions, current_revision, downgrade, load_migrations, upgrade
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据库迁移工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    upgrade_parser = subparsers.add_parser("upgrade", help="升级数据库结构")
+    upgrade_parser.add_argument("target", nargs="?", default=None, help="目标版本，默认最新")
+
+    downgrade_parser = subparsers.add_parser("downgrade", help="回退数据库结构")
+    downgrade_parser.add_argument("target", help="目标版本")
+
+    subparsers.add_parser("current", help="查看当前版本")
+    subparsers.add_parser("history", help="查看迁移列表")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "upgrade":
+            executed = upgrade(engine, args.target)
+            print(f"已执行 {len(executed)} 个迁移" if executed else "数据库已是最新版本")
+        elif args.command == "downgrade":
+            reverted = downgrade(engine, args.target)
+            print(f"已回退 {len(reverted)} 个迁移" if reverted else "无需回退")
+        elif args.command == "current":
+            with engine.connect() as conn:
+                print(current_revision(conn) or "未初始化")
+        elif args.command == "history":
+            with engine.connect() as conn:
+                applied = set(applied_revisions(conn))
+            for migration in load_migrations():
+                mark = "x" if migration.revision in applied else " "
+                print(f"[{mark}] {migration.revision}  {migration.description}")
+    except SchemaVersionError as e:
+        print(f"迁移失败: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
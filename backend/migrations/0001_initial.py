@@ -0,0 +1,117 @@
+"""初始表结构
+
+建表语句固定为引入迁移前的表结构（内联定义，不随 models.py 变化），之后新增的表、列和索引由后续迁移添加。
+已有数据库中已存在的表会被跳过，后续迁移中的 DDL 工具函数均会检查对象是否已存在，保证两种情况结果一致。
+"""
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, DECIMAL, Enum, ForeignKey, Integer, MetaData, String, Table, Text,
+)
+
+revision = "0001"
+description = "初始表结构"
+
+metadata = MetaData()
+
+# 枚举列按枚举成员名存储，与模型中 Enum(GenderEnum) 等生成的列定义一致
+GENDERS = Enum("Male", "Female", "Other", name="genderenum")
+ROLES = Enum("Admin", "User", name="roleenum")
+MODULES = Enum(
+    "BATCH_MANAGEMENT", "PERSON_MANAGEMENT", "EXPERIMENT_MANAGEMENT",
+    "COMPETITOR_DATA", "FINGER_BLOOD_DATA", "SENSOR_DATA",
+    name="moduleenum",
+)
+
+Table(
+    "batches", metadata,
+    Column("batch_id", Integer, primary_key=True, index=True, comment="批次唯一标识符"),
+    Column("batch_number", String(50), unique=True, nullable=False, comment="批次号名，确保唯一性"),
+    Column("start_time", DateTime, nullable=False, comment="批次开始时间"),
+    Column("end_time", DateTime, nullable=True, comment="批次结束时间"),
+)
+
+Table(
+    "persons", metadata,
+    Column("person_id", Integer, primary_key=True, index=True, comment="人员唯一标识符"),
+    Column("person_name", String(100), nullable=False, comment="人员名字"),
+    Column("gender", GENDERS, nullable=True, comment="性别"),
+    Column("age", Integer, nullable=True, comment="年龄"),
+    Column("batch_id", Integer, ForeignKey("batches.batch_id"), nullable=True, comment="关联的批次ID"),
+)
+
+Table(
+    "experiments", metadata,
+    Column("experiment_id", Integer, primary_key=True, index=True, comment="实验唯一标识符"),
+    Column("batch_id", Integer, ForeignKey("batches.batch_id"), nullable=False, comment="关联的批次ID"),
+    Column("experiment_content", Text, nullable=True, comment="实验具体内容描述"),
+    Column("created_time", DateTime, nullable=False, comment="创建时间"),
+)
+
+Table(
+    "competitor_files", metadata,
+    Column("competitor_file_id", Integer, primary_key=True, index=True, comment="竞品文件唯一标识符"),
+    Column("person_id", Integer, ForeignKey("persons.person_id"), nullable=False, comment="关联的人员ID"),
+    Column("batch_id", Integer, ForeignKey("batches.batch_id"), nullable=False, comment="关联的批次ID"),
+    Column("file_path", String(512), nullable=False, comment="文件存储路径"),
+    Column("upload_time", DateTime, nullable=False, comment="文件上传时间"),
+)
+
+Table(
+    "finger_blood_files", metadata,
+    Column("finger_blood_file_id", Integer, primary_key=True, index=True, comment="指尖血文件唯一标识符"),
+    Column("person_id", Integer, ForeignKey("persons.person_id"), nullable=False, comment="关联的人员ID"),
+    Column("batch_id", Integer, ForeignKey("batches.batch_id"), nullable=False, comment="关联的批次ID"),
+    Column("collection_time", DateTime, nullable=False, comment="采集时间"),
+    Column("blood_glucose_value", DECIMAL(5, 2), nullable=False, comment="血糖值"),
+)
+
+Table(
+    "sensors", metadata,
+    Column("sensor_id", Integer, primary_key=True, index=True, comment="传感器唯一标识符"),
+    Column("sensor_name", String(100), nullable=False, comment="传感器名称"),
+    Column("person_id", Integer, ForeignKey("persons.person_id"), nullable=False, comment="关联的人员ID"),
+    Column("batch_id", Integer, ForeignKey("batches.batch_id"), nullable=False, comment="关联的批次ID"),
+    Column("start_time", DateTime, nullable=False, comment="传感器开始使用时间"),
+    Column("end_time", DateTime, nullable=True, comment="传感器结束使用时间"),
+    Column("end_reason", String(255), nullable=True, comment="传感器结束使用原因"),
+)
+
+Table(
+    "users", metadata,
+    Column("user_id", Integer, primary_key=True, index=True, comment="用户唯一标识符"),
+    Column("username", String(50), unique=True, nullable=False, comment="登录用户名"),
+    Column("password_hash", String(255), nullable=False, comment="哈希加密后的密码"),
+    Column("role", ROLES, nullable=False, comment="用户角色 (Admin/User)"),
+    Column("createTime", DateTime, nullable=False, comment="创建时间"),
+    Column("updateTime", DateTime, nullable=False, comment="最后更新时间"),
+)
+
+Table(
+    "user_permissions", metadata,
+    Column("permission_id", Integer, primary_key=True, index=True, comment="权限唯一标识符"),
+    Column("user_id", Integer, ForeignKey("users.user_id"), nullable=False, comment="关联的用户ID"),
+    Column("module", MODULES, nullable=False, comment="模块名称"),
+    Column("can_read", Boolean, comment="读取权限"),
+    Column("can_write", Boolean, comment="写入权限"),
+    Column("can_delete", Boolean, comment="删除权限"),
+)
+
+Table(
+    "activities", metadata,
+    Column("activity_id", Integer, primary_key=True, index=True, comment="活动唯一标识符"),
+    Column("activity_type", String(50), nullable=False, comment="活动类型"),
+    Column("description", Text, nullable=False, comment="活动描述"),
+    Column("createTime", DateTime, nullable=False, comment="创建时间"),
+    Column("user_id", Integer, ForeignKey("users.user_id"), nullable=True, comment="操作用户ID"),
+)
+
+Table(
+    "experiment_members", metadata,
+    Column("id", Integer, primary_key=True, index=True, comment="关联唯一标识符"),
+    Column("experiment_id", Integer, ForeignKey("experiments.experiment_id"), nullable=False, comment="实验ID"),
+    Column("person_id", Integer, ForeignKey("persons.person_id"), nullable=False, comment="人员ID"),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn)
@@ -0,0 +1,67 @@
+"""列表/导出接口筛选与排序列的复合索引"""
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, Table, func, select
+
+from migrations import create_index, drop_index
+
+revision = "0002"
+description = "筛选与排序列的复合索引"
+
+# 只声明本迁移用到的列，不建表
+metadata = MetaData()
+finger_blood_files = Table(
+    "finger_blood_files", metadata,
+    Column("person_id", Integer), Column("batch_id", Integer), Column("collection_time", DateTime),
+)
+sensors = Table("sensors", metadata, Column("person_id", Integer), Column("batch_id", Integer), Column("start_time", DateTime))
+competitor_files = Table("competitor_files", metadata, Column("person_id", Integer), Column("batch_id", Integer))
+activities = Table("activities", metadata, Column("createTime", DateTime))
+experiment_members = Table(
+    "experiment_members", metadata,
+    Column("id", Integer, primary_key=True), Column("experiment_id", Integer), Column("person_id", Integer),
+)
+
+INDEXES = [
+    Index("ix_activities_create_time", activities.c.createTime),
+    Index("ix_competitor_files_batch_person", competitor_files.c.batch_id, competitor_files.c.person_id),
+    Index(
+        "uq_experiment_members_experiment_person",
+        experiment_members.c.experiment_id, experiment_members.c.person_id, unique=True,
+    ),
+    Index("ix_finger_blood_files_batch_time", finger_blood_files.c.batch_id, finger_blood_files.c.collection_time),
+    Index("ix_finger_blood_files_person_time", finger_blood_files.c.person_id, finger_blood_files.c.collection_time),
+    Index("ix_finger_blood_files_time", finger_blood_files.c.collection_time),
+    Index("ix_sensors_batch_person", sensors.c.batch_id, sensors.c.person_id),
+    Index("ix_sensors_person_start", sensors.c.person_id, sensors.c.start_time),
+]
+
+
+def upgrade(conn):
+    members = experiment_members.c
+    duplicates = conn.execute(
+        select(members.experiment_id, members.person_id)
+        .group_by(members.experiment_id, members.person_id)
+        .having(func.count() > 1)
+    ).all()
+    if duplicates:
+        # 保留每组 (experiment_id, person_id) 中 id 最小的记录
+        # （MySQL 不允许在 DELETE 的子查询中引用目标表，先查出待删除的ID）
+        keep = (
+            select(func.min(members.id).label("id"))
+            .group_by(members.experiment_id, members.person_id)
+            .subquery()
+        )
+        redundant_ids = conn.execute(
+            select(members.id).where(members.id.not_in(select(keep.c.id)))
+        ).scalars().all()
+        conn.execute(experiment_members.delete().where(members.id.in_(redundant_ids)))
+        print(f"  已清理 {len(duplicates)} 组重复的实验成员记录")
+
+    for index in INDEXES:
+        if create_index(conn, index):
+            print(f"  已创建索引 {index.name}")
+
+
+def downgrade(conn):
+    for index in INDEXES:
+        drop_index(conn, index)
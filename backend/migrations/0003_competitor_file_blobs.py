@@ -0,0 +1,111 @@
+"""竞品文件内容寻址存储
+
+新增 file_blobs 表与 competitor_files.file_name / blob_id 列，
+并将已有文件按内容哈希导入内容块存储（相同内容只保存一份）。
+原文件在迁移事务提交后才删除：提交失败时记录回滚，原文件仍可用。
+原文件不存在的记录保持 blob_id 为空。
+"""
+
+import os
+import tempfile
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, MetaData, String, Table, select, update
+
+from blob_store import blob_path, hash_file
+from migrations import add_column
+
+revision = "0003"
+description = "竞品文件内容寻址存储"
+
+metadata = MetaData()
+file_blobs = Table(
+    "file_blobs", metadata,
+    Column("blob_id", Integer, primary_key=True, index=True, comment="内容块唯一标识符"),
+    Column("sha256", String(64), nullable=False, unique=True, comment="内容SHA-256"),
+    Column("size", BigInteger, nullable=False, comment="内容大小（字节）"),
+    Column("ref_count", Integer, nullable=False, comment="引用该内容块的文件记录数"),
+    Column("create_time", DateTime, nullable=False, comment="创建时间"),
+    Column("release_time", DateTime, nullable=True, comment="最近一次引用减少的时间，用于回收宽限期"),
+)
+NEW_COLUMNS = [
+    Column("file_name", String(255), nullable=True, comment="文件名（为空时取存储路径中的文件名）"),
+    Column("blob_id", Integer, nullable=True, comment="引用的内容块ID"),
+]
+# 只声明本迁移用到的列，不建表
+competitor_files = Table(
+    "competitor_files", MetaData(),
+    Column("competitor_file_id", Integer, primary_key=True),
+    Column("file_path", String(512)),
+    Column("file_name", String(255)),
+    Column("blob_id", Integer),
+)
+
+
+def _copy_to_store(path: str, sha256: str):
+    """复制到同目录临时文件后原子替换，避免出现半写入的内容块"""
+    target = blob_path(sha256)
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+    with os.fdopen(fd, "wb") as dst, open(path, "rb") as src:
+        for chunk in iter(lambda: src.read(1024 * 1024), b""):
+            dst.write(chunk)
+    os.replace(tmp_path, target)
+
+
+def upgrade(conn):
+    file_blobs.create(conn, checkfirst=True)
+    for column in NEW_COLUMNS:
+        add_column(conn, "competitor_files", column)
+
+    files = competitor_files.c
+    rows = conn.execute(select(files.competitor_file_id, files.file_path).where(files.blob_id.is_(None))).all()
+    by_path = defaultdict(list)
+    for row in rows:
+        by_path[row.file_path].append(row.competitor_file_id)
+
+    # 按内容哈希归并：每个内容块只写入一次，引用计数为引用它的记录数
+    by_hash = defaultdict(list)
+    for path, file_ids in by_path.items():
+        if os.path.isfile(path):
+            by_hash[hash_file(path)].append((path, file_ids))
+
+    imported = []
+    for sha256, entries in by_hash.items():
+        references = sum(len(file_ids) for _, file_ids in entries)
+        path = entries[0][0]
+        _copy_to_store(path, sha256)
+        blob_id = conn.execute(select(file_blobs.c.blob_id).where(file_blobs.c.sha256 == sha256)).scalar()
+        if blob_id is None:
+            blob_id = conn.execute(file_blobs.insert().values(
+                sha256=sha256, size=os.path.getsize(path), ref_count=references, create_time=datetime.now()
+            )).inserted_primary_key[0]
+        else:
+            conn.execute(
+                update(file_blobs).where(file_blobs.c.blob_id == blob_id)
+                .values(ref_count=file_blobs.c.ref_count + references)
+            )
+        for path, file_ids in entries:
+            conn.execute(
+                update(competitor_files)
+                .where(files.competitor_file_id.in_(file_ids))
+                .values(blob_id=blob_id, file_name=os.path.basename(path), file_path=blob_path(sha256))
+            )
+            if os.path.abspath(path) != os.path.abspath(blob_path(sha256)):
+                imported.append(path)
+
+    if imported:
+        print(f"  已将 {len(imported)} 个文件导入内容块存储")
+
+    def remove_originals():
+        for path in imported:
+            try:
+                os.remove(path)
+            except OSError as e:
+                # 记录已指向内容块，原文件删除失败不影响使用
+                print(f"  删除原文件失败 {path}: {e}")
+
+    return remove_originals
@@ -0,0 +1,73 @@
+"""竞品文件元数据列
+
+新增文件大小、哈希、MIME 类型、修改时间及校验状态列，并按内容块记录回填；
+回填时每个内容块只 stat 一次，原文件缺失的记录标记为 missing。
+"""
+
+import mimetypes
+import os
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, MetaData, String, Table, select, update
+
+from blob_store import blob_path
+from migrations import add_column
+
+revision = "0004"
+description = "竞品文件元数据列"
+
+COLUMNS = [
+    Column("file_size", BigInteger, nullable=True, comment="文件大小（字节）"),
+    Column("sha256", String(64), nullable=True, comment="内容SHA-256"),
+    Column("mime_type", String(127), nullable=True, comment="MIME类型"),
+    Column("file_mtime", DateTime, nullable=True, comment="存储文件的修改时间（秒精度）"),
+    Column("storage_status", String(16), nullable=True, comment="存储校验状态"),
+    Column("checked_time", DateTime, nullable=True, comment="最近一次校验时间"),
+]
+
+# 只声明本迁移用到的列，不建表
+metadata = MetaData()
+competitor_files = Table(
+    "competitor_files", metadata,
+    Column("competitor_file_id", Integer, primary_key=True),
+    Column("file_path", String(512)),
+    Column("file_name", String(255)),
+    Column("blob_id", Integer),
+    *(Column(column.name, column.type) for column in COLUMNS),
+)
+file_blobs = Table(
+    "file_blobs", metadata,
+    Column("blob_id", Integer, primary_key=True),
+    Column("sha256", String(64)),
+    Column("size", BigInteger),
+)
+
+
+def upgrade(conn):
+    for column in COLUMNS:
+        add_column(conn, "competitor_files", column)
+
+    now = datetime.now()
+    mtimes = {}
+    files, blobs = competitor_files.c, file_blobs.c
+    rows = conn.execute(
+        select(files.competitor_file_id, files.file_name, files.file_path, blobs.blob_id, blobs.sha256, blobs.size)
+        .select_from(competitor_files)
+        .outerjoin(file_blobs, files.blob_id == blobs.blob_id)
+    ).all()
+    for row in rows:
+        values = {"checked_time": now, "storage_status": "missing"}
+        if row.blob_id is not None:
+            if row.blob_id not in mtimes:
+                path = blob_path(row.sha256)
+                mtimes[row.blob_id] = (
+                    datetime.fromtimestamp(int(os.path.getmtime(path))) if os.path.exists(path) else None
+                )
+            values.update(file_size=row.size, sha256=row.sha256, file_mtime=mtimes[row.blob_id])
+            if mtimes[row.blob_id] is not None:
+                values["storage_status"] = "ok"
+        name = row.file_name or os.path.basename(row.file_path)
+        values["mime_type"] = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        conn.execute(
+            update(competitor_files).where(files.competitor_file_id == row.competitor_file_id).values(**values)
+        )
@@ -0,0 +1,68 @@
+"""指尖血数据汇总表
+
+新增 glucose_summaries 表，并按已有指尖血数据全量生成汇总。
+"""
+
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, DateTime, DECIMAL, Double, ForeignKey, Integer, MetaData, Table, func, literal, select,
+)
+
+revision = "0005"
+description = "指尖血数据汇总表"
+
+metadata = MetaData()
+# 外键引用的表只声明主键，不建表
+Table("batches", metadata, Column("batch_id", Integer, primary_key=True))
+Table("persons", metadata, Column("person_id", Integer, primary_key=True))
+finger_blood_files = Table(
+    "finger_blood_files", metadata,
+    Column("finger_blood_file_id", Integer, primary_key=True),
+    Column("person_id", Integer),
+    Column("batch_id", Integer),
+    Column("collection_time", DateTime),
+    Column("blood_glucose_value", DECIMAL(5, 2)),
+)
+glucose_summaries = Table(
+    "glucose_summaries", metadata,
+    Column("batch_id", Integer, ForeignKey("batches.batch_id"), primary_key=True, comment="批次ID"),
+    Column("person_id", Integer, ForeignKey("persons.person_id"), primary_key=True, comment="人员ID"),
+    Column("data_count", Integer, nullable=False, comment="数据条数"),
+    Column("value_sum", Double, nullable=False, comment="血糖值之和"),
+    Column("value_square_sum", Double, nullable=False, comment="血糖值平方和（用于计算标准差）"),
+    Column("min_value", DECIMAL(5, 2), nullable=True, comment="最小血糖值"),
+    Column("max_value", DECIMAL(5, 2), nullable=True, comment="最大血糖值"),
+    Column("first_time", DateTime, nullable=True, comment="最早采集时间"),
+    Column("last_time", DateTime, nullable=True, comment="最晚采集时间"),
+    Column("update_time", DateTime, nullable=False, comment="最后更新时间"),
+)
+
+
+def upgrade(conn):
+    glucose_summaries.create(conn, checkfirst=True)
+    data = finger_blood_files.c
+    conn.execute(glucose_summaries.delete())
+    groups = conn.execute(
+        glucose_summaries.insert().from_select(
+            ["batch_id", "person_id", "data_count", "value_sum", "value_square_sum",
+             "min_value", "max_value", "first_time", "last_time", "update_time"],
+            select(
+                data.batch_id,
+                data.person_id,
+                func.count(),
+                func.sum(data.blood_glucose_value),
+                func.sum(data.blood_glucose_value * data.blood_glucose_value),
+                func.min(data.blood_glucose_value),
+                func.max(data.blood_glucose_value),
+                func.min(data.collection_time),
+                func.max(data.collection_time),
+                literal(datetime.now(), DateTime),
+            ).group_by(data.batch_id, data.person_id),
+        )
+    ).rowcount
+    print(f"  已生成 {groups} 组血糖汇总")
+
+
+def downgrade(conn):
+    glucose_summaries.drop(conn, checkfirst=True)
@@ -0,0 +1,29 @@
+"""传感器读数表
+
+新增 sensor_readings 窄表，主键 (sensor_id, reading_time) 作为聚簇索引，按传感器和时间范围读取读数。
+"""
+
+from sqlalchemy import Column, DateTime, DECIMAL, Double, ForeignKey, Integer, MetaData, Table
+
+revision = "0006"
+description = "传感器读数表"
+
+metadata = MetaData()
+# 外键引用的表只声明主键，不建表
+Table("sensors", metadata, Column("sensor_id", Integer, primary_key=True))
+sensor_readings = Table(
+    "sensor_readings", metadata,
+    Column("sensor_id", Integer, ForeignKey("sensors.sensor_id"), primary_key=True, comment="传感器ID"),
+    Column("reading_time", DateTime, primary_key=True, comment="读数时间"),
+    Column("current", Double, nullable=True, comment="电流值"),
+    Column("glucose_value", DECIMAL(5, 2), nullable=True, comment="血糖值 (mmol/L)"),
+    Column("temperature", Double, nullable=True, comment="温度"),
+)
+
+
+def upgrade(conn):
+    sensor_readings.create(conn, checkfirst=True)
+
+
+def downgrade(conn):
+    sensor_readings.drop(conn, checkfirst=True)
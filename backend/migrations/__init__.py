@@ -0,0 +1,178 @@
+"""数据库版本化迁移
+
+迁移脚本位于本包内，文件名形如 ``0002_performance_indexes.py``，每个脚本定义：
+
+    revision = "0002"          # 版本号，按字典序递增
+    description = "..."        # 说明
+    def upgrade(conn): ...     # 升级操作，conn 为已开启事务的 Connection；
+                               # 可返回一个无参函数，在事务（含版本记录）提交成功后调用，
+                               # 用于删除文件等无法随事务回滚的操作
+    def downgrade(conn): ...   # 可选，回退操作
+
+已执行的版本记录在 schema_migrations 表中。应用启动时只读取该表校验版本，
+不再通过 create_all 反射所有表；结构变更通过 ``python migrate.py upgrade`` 执行。
+"""
+
+import importlib
+import pkgutil
+from datetime import datetime
+from types import ModuleType
+from typing import List, Optional
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, func
+from sqlalchemy.schema import CreateColumn
+
+VERSION_TABLE = "schema_migrations"
+
+_version_metadata = MetaData()
+schema_migrations = Table(
+    VERSION_TABLE,
+    _version_metadata,
+    Column("version", String(32), primary_key=True, comment="已执行的迁移版本号"),
+    Column("description", String(255), nullable=True, comment="迁移说明"),
+    Column("applied_at", DateTime, nullable=False, default=datetime.now, comment="执行时间"),
+)
+
+
+class SchemaVersionError(RuntimeError):
+    """数据库结构版本与代码不一致"""
+
+
+def load_migrations() -> List[ModuleType]:
+    """按版本号顺序加载全部迁移脚本"""
+    modules = []
+    for info in pkgutil.iter_modules(__path__):
+        if info.name[:4].isdigit():
+            modules.append(importlib.import_module(f"{__name__}.{info.name}"))
+    modules.sort(key=lambda m: m.revision)
+    return modules
+
+
+def head_revision() -> Optional[str]:
+    migrations = load_migrations()
+    return migrations[-1].revision if migrations else None
+
+
+def applied_revisions(conn) -> List[str]:
+    if not inspect(conn).has_table(VERSION_TABLE):
+        return []
+    return [row[0] for row in conn.execute(select(schema_migrations.c.version).order_by(schema_migrations.c.version))]
+
+
+def current_revision(conn) -> Optional[str]:
+    """当前数据库结构版本（单条查询，不反射业务表）"""
+    try:
+        return conn.execute(select(func.max(schema_migrations.c.version))).scalar()
+    except Exception:
+        # 版本表不存在，视为未初始化
+        conn.rollback()
+        return None
+
+
+def upgrade(engine, target: Optional[str] = None) -> List[str]:
+    """执行所有未执行的迁移（直到 target 版本），返回本次执行的版本号"""
+    with engine.begin() as conn:
+        _version_metadata.create_all(conn)
+
+    executed = []
+    for migration in load_migrations():
+        if target is not None and migration.revision > target:
+            break
+        with engine.begin() as conn:
+            if migration.revision in applied_revisions(conn):
+                continue
+            print(f"执行迁移 {migration.revision}: {migration.description}")
+            after_commit = migration.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=migration.revision,
+                description=migration.description,
+                applied_at=datetime.now()
+            ))
+        if after_commit is not None:
+            after_commit()
+        executed.append(migration.revision)
+    return executed
+
+
+def downgrade(engine, target: str) -> List[str]:
+    """回退到 target 版本（不含），返回本次回退的版本号"""
+    reverted = []
+    for migration in reversed(load_migrations()):
+        if migration.revision <= target:
+            break
+        with engine.begin() as conn:
+            if migration.revision not in applied_revisions(conn):
+                continue
+            if not hasattr(migration, "downgrade"):
+                raise SchemaVersionError(f"迁移 {migration.revision} 不支持回退")
+            print(f"回退迁移 {migration.revision}: {migration.description}")
+            migration.downgrade(conn)
+            conn.execute(schema_migrations.delete().where(schema_migrations.c.version == migration.revision))
+        reverted.append(migration.revision)
+    return reverted
+
+
+def check_schema_version(engine):
+    """校验数据库结构版本是否为最新，落后时抛出 SchemaVersionError"""
+    head = head_revision()
+    with engine.connect() as conn:
+        current = current_revision(conn)
+    if current != head:
+        raise SchemaVersionError(
+            f"数据库结构版本 {current or '未初始化'} 与代码版本 {head} 不一致，请先执行: python migrate.py upgrade"
+        )
+    return current
+
+
+# ---- 迁移脚本使用的 DDL 工具函数 ----
+# MySQL 下对大表（finger_blood_files、activities 等）使用在线 DDL，避免锁表阻塞读写
+
+def index_exists(conn, table_name: str, index_name: str) -> bool:
+    return any(ix["name"] == index_name for ix in inspect(conn).get_indexes(table_name))
+
+
+def column_exists(conn, table_name: str, column_name: str) -> bool:
+    return any(col["name"] == column_name for col in inspect(conn).get_columns(table_name))
+
+
+def create_index(conn, index) -> bool:
+    """创建索引（已存在则跳过）；MySQL 使用 ALGORITHM=INPLACE, LOCK=NONE 在线创建"""
+    table_name = index.table.name
+    if index_exists(conn, table_name, index.name):
+        return False
+    if conn.dialect.name == "mysql":
+        preparer = conn.dialect.identifier_preparer
+        columns = ", ".join(preparer.quote(col.name) for col in index.columns)
+        kind = "UNIQUE INDEX" if index.unique else "INDEX"
+        conn.exec_driver_sql(
+            f"ALTER TABLE {preparer.quote(table_name)} ADD {kind} {preparer.quote(index.name)} ({columns}), "
+            f"ALGORITHM=INPLACE, LOCK=NONE"
+        )
+    else:
+        index.create(conn)
+    return True
+
+
+def drop_index(conn, index) -> bool:
+    if not index_exists(conn, index.table.name, index.name):
+        return False
+    index.drop(conn)
+    return True
+
+
+def add_column(conn, table_name: str, column: Column) -> bool:
+    """新增列（已存在则跳过）；MySQL 8 优先使用 ALGORITHM=INSTANT，仅修改元数据"""
+    if column_exists(conn, table_name, column.name):
+        return False
+    preparer = conn.dialect.identifier_preparer
+    column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+    statement = f"ALTER TABLE {preparer.quote(table_name)} ADD COLUMN {column_ddl}"
+    if conn.dialect.name == "mysql":
+        try:
+            conn.exec_driver_sql(statement + ", ALGORITHM=INSTANT")
+            return True
+        except Exception:
+            # 不支持 INSTANT 的情况（如旧版本 MySQL）退回在线 INPLACE
+            statement += ", ALGORITHM=INPLACE, LOCK=NONE"
+    conn.exec_driver_sql(statement)
+    return True
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, DECIMAL, Enum, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, DECIMAL, Double, Enum, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
+import os
 
 Base = declarative_base()
 
@@ -68,19 +69,54 @@ class Experiment(Base):
 
 class CompetitorFile(Base):
     __tablename__ = "competitor_files"
+    __table_args__ = (
+        Index("ix_competitor_files_batch_person", "batch_id", "person_id"),
+    )
     
     competitor_file_id = Column(Integer, primary_key=True, index=True, comment="竞品文件唯一标识符")
     person_id = Column(Integer, ForeignKey("persons.person_id"), nullable=False, comment="关联的人员ID")
     batch_id = Column(Integer, ForeignKey("batches.batch_id"), nullable=False, comment="关联的批次ID")
     file_path = Column(String(512), nullable=False, comment="文件存储路径")
     upload_time = Column(DateTime, nullable=False, default=datetime.now, comment="文件上传时间")
+    file_name = Column(String(255), nullable=True, comment="文件名（为空时取存储路径中的文件名）")
+    blob_id = Column(Integer, ForeignKey("file_blobs.blob_id"), nullable=True, comment="引用的内容块ID")
+    # 上传时记录的文件元数据，列表/导出接口直接读取，无需访问文件系统
+    file_size = Column(BigInteger, nullable=True, comment="文件大小（字节）")
+    sha256 = Column(String(64), nullable=True, comment="内容SHA-256")
+    mime_type = Column(String(127), nullable=True, comment="MIME类型")
+    file_mtime = Column(DateTime, nullable=True, comment="存储文件的修改时间（秒精度）")
+    # 后台校验结果：ok / missing（文件缺失）/ drifted（大小或内容与记录不一致），为空表示未校验
+    storage_status = Column(String(16), nullable=True, comment="存储校验状态")
+    checked_time = Column(DateTime, nullable=True, comment="最近一次校验时间")
     
     # 关系
     person = relationship("Person", back_populates="competitor_files")
     batch = relationship("Batch", back_populates="competitor_files")
+    blob = relationship("FileBlob")
+
+    @property
+    def display_name(self) -> str:
+        return self.file_name or os.path.basename(self.file_path)
+
+class FileBlob(Base):
+    """按内容哈希去重存储的文件内容块，由 blob_store 维护引用计数"""
+    __tablename__ = "file_blobs"
+    
+    blob_id = Column(Integer, primary_key=True, index=True, comment="内容块唯一标识符")
+    sha256 = Column(String(64), nullable=False, unique=True, comment="内容SHA-256")
+    size = Column(BigInteger, nullable=False, comment="内容大小（字节）")
+    ref_count = Column(Integer, nullable=False, default=0, comment="引用该内容块的文件记录数")
+    create_time = Column(DateTime, nullable=False, default=datetime.now, comment="创建时间")
+    release_time = Column(DateTime, nullable=True, comment="最近一次引用减少的时间，用于回收宽限期")
 
 class FingerBloodFile(Base):
     __tablename__ = "finger_blood_files"
+    __table_args__ = (
+        # 按人员/批次筛选并按采集时间排序；InnoDB 二级索引隐含主键，可直接支持键集分页
+        Index("ix_finger_blood_files_person_time", "person_id", "collection_time"),
+        Index("ix_finger_blood_files_batch_time", "batch_id", "collection_time"),
+        Index("ix_finger_blood_files_time", "collection_time"),
+    )
     
     finger_blood_file_id = Column(Integer, primary_key=True, index=True, comment="指尖血文件唯一标识符")
     person_id = Column(Integer, ForeignKey("persons.person_id"), nullable=False, comment="关联的人员ID")
@@ -92,8 +128,27 @@ class FingerBloodFile(Base):
     person = relationship("Person", back_populates="finger_blood_files")
     batch = relationship("Batch", back_populates="finger_blood_files")
 
+class GlucoseSummary(Base):
+    """按 (批次, 人员) 汇总的指尖血数据统计，由 glucose_summary 随数据增删改增量维护"""
+    __tablename__ = "glucose_summaries"
+    
+    batch_id = Column(Integer, ForeignKey("batches.batch_id"), primary_key=True, comment="批次ID")
+    person_id = Column(Integer, ForeignKey("persons.person_id"), primary_key=True, comment="人员ID")
+    data_count = Column(Integer, nullable=False, default=0, comment="数据条数")
+    value_sum = Column(Double, nullable=False, default=0, comment="血糖值之和")
+    value_square_sum = Column(Double, nullable=False, default=0, comment="血糖值平方和（用于计算标准差）")
+    min_value = Column(DECIMAL(5, 2), nullable=True, comment="最小血糖值")
+    max_value = Column(DECIMAL(5, 2), nullable=True, comment="最大血糖值")
+    first_time = Column(DateTime, nullable=True, comment="最早采集时间")
+    last_time = Column(DateTime, nullable=True, comment="最晚采集时间")
+    update_time = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now, comment="最后更新时间")
+
 class Sensor(Base):
     __tablename__ = "sensors"
+    __table_args__ = (
+        Index("ix_sensors_batch_person", "batch_id", "person_id"),
+        Index("ix_sensors_person_start", "person_id", "start_time"),
+    )
     
     sensor_id = Column(Integer, primary_key=True, index=True, comment="传感器唯一标识符")
     sensor_name = Column(String(100), nullable=False, comment="传感器名称")
@@ -107,6 +162,16 @@ class Sensor(Base):
     person = relationship("Person", back_populates="sensors")
     batch = relationship("Batch", back_populates="sensors")
 
+class SensorReading(Base):
+    """传感器原始读数。主键 (sensor_id, reading_time) 即 InnoDB 聚簇索引，同一传感器的读数按时间连续存储"""
+    __tablename__ = "sensor_readings"
+    
+    sensor_id = Column(Integer, ForeignKey("sensors.sensor_id"), primary_key=True, comment="传感器ID")
+    reading_time = Column(DateTime, primary_key=True, comment="读数时间")
+    current = Column(Double, nullable=True, comment="电流值")
+    glucose_value = Column(DECIMAL(5, 2), nullable=True, comment="血糖值 (mmol/L)")
+    temperature = Column(Double, nullable=True, comment="温度")
+
 class User(Base):
     __tablename__ = "users"
     
@@ -135,6 +200,9 @@ class UserPermission(Base):
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        Index("ix_activities_create_time", "createTime"),
+    )
     
     activity_id = Column(Integer, primary_key=True, index=True, comment="活动唯一标识符")
     activity_type = Column(String(50), nullable=False, comment="活动类型")
@@ -147,6 +215,9 @@ class Activity(Base):
 
 class ExperimentMember(Base):
     __tablename__ = "experiment_members"
+    __table_args__ = (
+        Index("uq_experiment_members_experiment_person", "experiment_id", "person_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True, comment="关联唯一标识符")
     experiment_id = Column(Integer, ForeignKey("experiments.experiment_id"), nullable=False, comment="实验ID")
@@ -0,0 +1,84 @@
+"""键集（游标）分页工具
+
+列表接口在保留 skip/limit 偏移分页的同时支持 cursor 参数：
+游标对排序列的最后一行取值进行编码，下一页通过 WHERE 条件定位，
+无论翻到第几页，查询代价都与第一页相同，且并发写入时不会出现行错位。
+下一页游标通过响应头 X-Next-Cursor 返回，响应体格式保持不变。
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# 排序键：(列, 是否降序)
+SortKey = Tuple[Any, bool]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """将排序键取值编码为不透明的游标字符串"""
+    payload = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_keys: Sequence[SortKey]) -> List[Any]:
+    """解码游标，并按排序列类型还原取值"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        if not isinstance(values, list) or len(values) != len(sort_keys):
+            raise ValueError("cursor length mismatch")
+        result = []
+        for value, (column, _) in zip(values, sort_keys):
+            if value is not None and isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            result.append(value)
+        return result
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+
+def paginate(query, sort_keys: Sequence[SortKey], skip: int, limit: int, cursor: Optional[str] = None):
+    """
+    对查询应用排序与分页
+
+    Args:
+        query: SQLAlchemy 查询（ORM Query 或 select() 语句）
+        sort_keys: 排序键列表，最后一列必须唯一（通常为主键）以保证顺序稳定
+        skip: 偏移量（仅在未提供游标时生效，兼容旧接口）
+        limit: 每页条数
+        cursor: 上一页返回的游标
+
+    Returns:
+        应用排序与分页后的查询
+    """
+    query = query.order_by(*[column.desc() if desc else column.asc() for column, desc in sort_keys])
+
+    if cursor:
+        values = decode_cursor(cursor, sort_keys)
+        # 展开为 (a > va) OR (a = va AND b > vb) ... 形式，可利用复合索引做范围扫描
+        conditions = []
+        for i, (column, desc) in enumerate(sort_keys):
+            prefix = [sort_keys[j][0] == values[j] for j in range(i)]
+            compare = column < values[i] if desc else column > values[i]
+            conditions.append(and_(*prefix, compare))
+        return query.filter(or_(*conditions)).limit(limit)
+
+    return query.offset(skip).limit(limit)
+
+
+def set_next_cursor(response: Response, rows: Sequence[Any], limit: int, key_fn) -> Optional[str]:
+    """若本页已满，根据最后一行生成下一页游标并写入响应头"""
+    if len(rows) < limit:
+        return None
+    next_cursor = encode_cursor(key_fn(rows[-1]))
+    response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return next_cursor
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+指尖血数据汇总重建脚本 - 按 finger_blood_files 全量重建 glucose_summaries
+
+汇总表随指尖血数据增删改增量维护，直接修改数据库等情况导致不一致时执行本脚本修复:
+    python rebuild_glucose_summary.py [--batch-id 1]
+"""
+
+import argparse
+
+from database import SessionLocal
+from glucose_summary import rebuild_summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="指尖血数据汇总重建")
+    parser.add_argument("--batch-id", type=int, default=None, help="只重建指定批次（默认重建全部）")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        groups = rebuild_summaries(db, args.batch_id)
+        db.commit()
+        print(f"已重建 {groups} 组血糖汇总")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+竞品文件存储校验脚本 - 核对文件记录与实际存储是否一致
+
+应用运行时会按 FILE_RECONCILE_INTERVAL_SECONDS 在后台定期执行，也可手动执行:
+    python reconcile_files.py [--verify-hash]
+"""
+
+import argparse
+
+from database import SessionLocal
+from file_reconcile import reconcile_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="竞品文件存储校验")
+    parser.add_argument("--verify-hash", action="store_true", help="重新计算所有文件的哈希（默认仅修改时间变化时计算）")
+    parser.add_argument("--batch-size", type=int, default=500, help="每批校验的内容块数量")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = reconcile_files(db, args.batch_size, args.verify_hash)
+        print(
+            f"校验完成：正常 {result['ok']}，缺失 {result['missing']}，不一致 {result['drifted']}，"
+            f"重新计算哈希 {result['rehashed']}，耗时 {result['elapsed_seconds']} 秒"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
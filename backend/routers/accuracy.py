@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from accuracy import accuracy_cache
+from database import get_db
+from models import Batch, User, ModuleEnum
+from schemas import AccuracyReport
+from routers.auth import check_module_permission
+
+router = APIRouter(prefix="/api/accuracy", tags=["准确性分析"])
+
+@router.get("/{batch_id}", response_model=AccuracyReport)
+def get_batch_accuracy(
+    batch_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.SENSOR_DATA, "read"))
+):
+    """
+    获取批次的传感器准确性分析
+
+    以指尖血数据为参比值，与采集时刻正在使用的传感器读数配对，
+    按批次、人员、传感器汇总 MARD、平均偏差及 Clarke / Parkes 误差网格分区计数。
+    """
+    if db.get(Batch, batch_id) is None:
+        raise HTTPException(status_code=404, detail="批次不存在")
+    return accuracy_cache.report(db, batch_id)
@@ -1,33 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from database import get_db
+from database import get_db, get_async_db
 from models import Activity, User
 from schemas import ActivityResponse, ActivityCreate
-from routers.auth import get_current_user
+from routers.auth import get_current_user, check_admin_permission
+from pagination import paginate, set_next_cursor
+from activity_writer import activity_writer
+from activity_archive import query_history
 
 router = APIRouter(prefix="/api/activities", tags=["activities"])
 
 @router.get("/", response_model=List[ActivityResponse])
-def get_activities(
+async def get_activities(
+    response: Response,
     limit: int = 50,
     skip: int = 0,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     获取最近活动列表
     """
-    activities = (
-        db.query(Activity)
-        .outerjoin(User, Activity.user_id == User.user_id)
-        .order_by(Activity.createTime.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    query = select(Activity).options(joinedload(Activity.user))
+    sort_keys = [(Activity.createTime, True), (Activity.activity_id, True)]
+    query = paginate(query, sort_keys, skip, limit, cursor)
+    activities = (await db.execute(query)).scalars().all()
+    set_next_cursor(response, activities, limit, lambda a: [a.createTime, a.activity_id])
     
     result = []
     for activity in activities:
@@ -43,6 +47,22 @@ def get_activities(
     
     return result
 
+@router.get("/history", response_model=List[ActivityResponse])
+def get_activity_history(
+    start_time: Optional[datetime] = Query(None, description="开始时间"),
+    end_time: Optional[datetime] = Query(None, description="结束时间"),
+    activity_type: Optional[str] = Query(None, description="按活动类型筛选"),
+    user_id: Optional[int] = Query(None, description="按操作用户筛选"),
+    limit: int = Query(1000, ge=1, le=10000, description="返回的记录数"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin_permission)
+):
+    """
+    查询历史活动记录（跨热表与归档文件，仅管理员）
+    """
+    records = query_history(db, start_time, end_time, activity_type, user_id, limit)
+    return [ActivityResponse(**record) for record in records]
+
 @router.post("/", response_model=ActivityResponse)
 def create_activity(
     activity: ActivityCreate,
@@ -81,7 +101,14 @@ def create_activity(
 def log_activity(db: Session, activity_type: str, description: str, user_id: Optional[int] = None):
     """
     记录活动的辅助函数
+
+    后台写入器运行时仅将记录放入队列，由其批量写入；
+    未启动时（如脚本中调用）退回为使用调用方会话同步写入。
     """
+    if activity_writer.running:
+        activity_writer.enqueue(activity_type, description, user_id)
+        return None
+    
     activity = Activity(
         activity_type=activity_type,
         description=description,
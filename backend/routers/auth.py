@@ -5,6 +5,7 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional, List
 from sqlalchemy.orm import Session
+from config import settings
 from database import get_db
 from models import User, UserPermission, RoleEnum, ModuleEnum
 from schemas import (
@@ -12,6 +13,7 @@ from schemas import (
     UserListResponse, UserPermissionCreate, UserPermissionResponse,
     AssignPermissionsRequest, MessageResponse
 )
+from utils import TTLCache
 
 router = APIRouter(prefix="/api/auth", tags=["认证管理"])
 
@@ -24,6 +26,31 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# 用户与权限缓存：避免每个请求都查询 User / UserPermission
+# 用户、权限变更时显式失效，TTL 用于兜底（多进程部署时其他进程的写入）
+AUTH_CACHE_TTL_SECONDS = settings.auth_cache_ttl_seconds
+_user_cache = TTLCache(AUTH_CACHE_TTL_SECONDS)        # username -> 用户字段快照
+_permission_cache = TTLCache(AUTH_CACHE_TTL_SECONDS)  # user_id -> {module: UserPermission字段}
+
+_USER_CACHE_FIELDS = ("user_id", "username", "password_hash", "role", "createTime", "updateTime")
+
+def invalidate_auth_cache(user_id: int):
+    """使指定用户的用户信息与权限缓存失效"""
+    _user_cache.pop_where(lambda snapshot: snapshot["user_id"] == user_id)
+    _permission_cache.pop(user_id)
+
+def _get_user_permissions(db: Session, user_id: int) -> dict:
+    """获取用户各模块权限（带缓存）"""
+    permissions = _permission_cache.get(user_id)
+    if permissions is None:
+        rows = db.query(UserPermission).filter(UserPermission.user_id == user_id).all()
+        permissions = {
+            row.module: {"can_read": row.can_read, "can_write": row.can_write, "can_delete": row.can_delete}
+            for row in rows
+        }
+        _permission_cache.set(user_id, permissions)
+    return permissions
+
 def verify_password(plain_password, hashed_password):
     """验证密码"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -67,10 +94,15 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    snapshot = _user_cache.get(username)
+    if snapshot is None:
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            raise credentials_exception
+        snapshot = {field: getattr(user, field) for field in _USER_CACHE_FIELDS}
+        _user_cache.set(username, snapshot)
+    # 每个请求构造独立的（未关联会话的）用户对象，避免跨请求共享可变状态
+    return User(**snapshot)
 
 def check_admin_permission(current_user: User = Depends(get_current_user)):
     """检查管理员权限"""
@@ -81,41 +113,49 @@ def check_admin_permission(current_user: User = Depends(get_current_user)):
         )
     return current_user
 
+def _require_permission(db: Session, current_user: User, module: ModuleEnum, permission_type: str):
+    """校验用户对模块的权限，不满足时抛出 403"""
+    # 管理员拥有所有权限
+    if current_user.role == RoleEnum.Admin:
+        return
+    
+    # 检查用户权限
+    user_permission = _get_user_permissions(db, current_user.user_id).get(module)
+    
+    if not user_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"没有访问 {module.value} 模块的权限"
+        )
+    
+    if permission_type == "read" and not user_permission["can_read"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"没有读取 {module.value} 模块的权限"
+        )
+    elif permission_type == "write" and not user_permission["can_write"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"没有写入 {module.value} 模块的权限"
+        )
+    elif permission_type == "delete" and not user_permission["can_delete"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"没有删除 {module.value} 模块的权限"
+        )
+
 def check_module_permission(module: ModuleEnum, permission_type: str = "read"):
     """检查模块权限"""
     def permission_checker(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-        # 管理员拥有所有权限
-        if current_user.role == RoleEnum.Admin:
-            return current_user
-        
-        # 检查用户权限
-        user_permission = db.query(UserPermission).filter(
-            UserPermission.user_id == current_user.user_id,
-            UserPermission.module == module
-        ).first()
-        
-        if not user_permission:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"没有访问 {module.value} 模块的权限"
-            )
-        
-        if permission_type == "read" and not user_permission.can_read:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"没有读取 {module.value} 模块的权限"
-            )
-        elif permission_type == "write" and not user_permission.can_write:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"没有写入 {module.value} 模块的权限"
-            )
-        elif permission_type == "delete" and not user_permission.can_delete:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"没有删除 {module.value} 模块的权限"
-            )
-        
+        _require_permission(db, current_user, module, permission_type)
+        return current_user
+    return permission_checker
+
+def check_modules_permission(modules: List[ModuleEnum], permission_type: str = "read"):
+    """检查多个模块的权限（跨模块的批量接口使用）"""
+    def permission_checker(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+        for module in modules:
+            _require_permission(db, current_user, module, permission_type)
         return current_user
     return permission_checker
 
@@ -195,8 +235,14 @@ def get_current_user_info(current_user: User = Depends(get_current_user), db: Se
     """获取当前用户信息"""
     # 加载用户权限
     permissions = db.query(UserPermission).filter(UserPermission.user_id == current_user.user_id).all()
-    current_user.permissions = permissions
-    return current_user
+    return UserResponse(
+        user_id=current_user.user_id,
+        username=current_user.username,
+        role=current_user.role,
+        createTime=current_user.createTime,
+        updateTime=current_user.updateTime,
+        permissions=[UserPermissionResponse.model_validate(p) for p in permissions]
+    )
 
 @router.post("/logout")
 def logout():
@@ -262,6 +308,7 @@ def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_d
         db_user.role = user_data.role
     
     db.commit()
+    invalidate_auth_cache(user_id)
     db.refresh(db_user)
     
     return db_user
@@ -287,6 +334,7 @@ def delete_user(user_id: int, db: Session = Depends(get_db), current_user: User
     # 删除用户
     db.delete(db_user)
     db.commit()
+    invalidate_auth_cache(user_id)
     
     return MessageResponse(message="用户删除成功")
 
@@ -323,5 +371,6 @@ def assign_permissions(request: AssignPermissionsRequest, db: Session = Depends(
         db.add(db_permission)
     
     db.commit()
+    invalidate_auth_cache(request.user_id)
     
     return MessageResponse(message="权限分配成功")
\ No newline at end of file
@@ -1,29 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from database import get_db
-from models import Batch, User
-from schemas import BatchCreate, BatchUpdate, BatchResponse, MessageResponse
-from routers.auth import get_current_user, check_module_permission
+import time
+from database import get_db, get_async_db
+from models import Batch, Person, Sensor, Experiment, ExperimentMember, User
+from schemas import (
+    BatchCreate, BatchUpdate, BatchResponse, MessageResponse,
+    BatchOnboardRequest, BatchOnboardResponse
+)
+from routers.auth import get_current_user, check_module_permission, check_modules_permission
+from routers.activities import log_activity
+from pagination import paginate, set_next_cursor
 from models import ModuleEnum
 
 router = APIRouter(prefix="/api/batches", tags=["批次管理"])
 
 @router.get("/", response_model=List[BatchResponse])
-def get_batches(
+async def get_batches(
+    response: Response,
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
     search: Optional[str] = Query(None, description="按批次号搜索"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="分页游标（来自上一页响应头 X-Next-Cursor），提供时忽略 skip"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(check_module_permission(ModuleEnum.BATCH_MANAGEMENT, "read"))
 ):
     """获取批次列表"""
-    query = db.query(Batch)
+    query = select(Batch)
     
     if search:
         query = query.filter(Batch.batch_number.contains(search))
     
-    batches = query.offset(skip).limit(limit).all()
+    query = paginate(query, [(Batch.batch_id, False)], skip, limit, cursor)
+    batches = (await db.execute(query)).scalars().all()
+    set_next_cursor(response, batches, limit, lambda b: [b.batch_id])
     return batches
 
 @router.post("/", response_model=BatchResponse)
@@ -44,6 +57,136 @@ def create_batch(
     db.refresh(db_batch)
     return db_batch
 
+# 建档请求校验错误最多返回的条数
+MAX_ONBOARD_ERRORS = 20
+
+def _validate_onboard(document: BatchOnboardRequest) -> List[str]:
+    """校验建档文档内的临时ID引用与传感器时间窗口，返回错误信息列表"""
+    errors = []
+    temp_ids = set()
+    for i, person in enumerate(document.persons):
+        if not person.temp_id:
+            errors.append(f"persons[{i}] 缺少 temp_id")
+        elif person.temp_id in temp_ids:
+            errors.append(f"persons[{i}] 的 temp_id {person.temp_id} 重复")
+        temp_ids.add(person.temp_id)
+    
+    windows = {}
+    for i, sensor in enumerate(document.sensors):
+        if sensor.person_ref not in temp_ids:
+            errors.append(f"sensors[{i}] 引用的人员 {sensor.person_ref} 不存在")
+            continue
+        if sensor.end_time is not None and sensor.end_time <= sensor.start_time:
+            errors.append(f"sensors[{i}] 的结束时间必须晚于开始时间")
+            continue
+        windows.setdefault(sensor.person_ref, []).append((sensor.start_time, i, sensor.end_time))
+    
+    # 同一人员的传感器使用时间不能重叠（首尾相接允许），新批次无需与库中已有传感器比较
+    for person_ref, person_windows in windows.items():
+        person_windows.sort(key=lambda w: (w[0], w[1]))
+        latest_end, latest_index = None, None
+        for start, i, end in person_windows:
+            if latest_index is not None and (latest_end is None or start < latest_end):
+                errors.append(f"sensors[{i}] 与 sensors[{latest_index}] 的使用时间重叠（人员 {person_ref}）")
+            if latest_index is None or (latest_end is not None and (end is None or end > latest_end)):
+                latest_end, latest_index = end, i
+    
+    for i, experiment in enumerate(document.experiments):
+        if not experiment.member_refs:
+            errors.append(f"experiments[{i}] 至少需要一个实验成员")
+        for ref in dict.fromkeys(experiment.member_refs):
+            if ref not in temp_ids:
+                errors.append(f"experiments[{i}] 引用的人员 {ref} 不存在")
+    return errors
+
+def _ids_in_batch(db: Session, column, batch_id: int) -> List[int]:
+    """按主键顺序读取新批次下刚插入记录的ID"""
+    return db.execute(select(column).where(column.table.c.batch_id == batch_id).order_by(column)).scalars().all()
+
+@router.post("/onboard", response_model=BatchOnboardResponse)
+def onboard_batch(
+    document: BatchOnboardRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_modules_permission([
+        ModuleEnum.BATCH_MANAGEMENT, ModuleEnum.PERSON_MANAGEMENT,
+        ModuleEnum.SENSOR_DATA, ModuleEnum.EXPERIMENT_MANAGEMENT,
+    ], "write"))
+):
+    """
+    批次建档：一次请求创建批次及其人员、传感器与实验
+    
+    文档内用客户端临时ID（temp_id）引用人员，所有记录在同一事务中批量插入，任一校验失败则全部不写入。
+    新批次下的记录只来自本次请求，插入后按主键顺序读回ID即可与请求顺序一一对应（MySQL 不支持 RETURNING）。
+    """
+    started = time.perf_counter()
+    errors = _validate_onboard(document)
+    if errors:
+        raise HTTPException(status_code=400, detail="；".join(errors[:MAX_ONBOARD_ERRORS]))
+    
+    if db.execute(select(Batch.batch_id).where(Batch.batch_number == document.batch.batch_number)).first():
+        raise HTTPException(status_code=400, detail="批次号已存在")
+    
+    try:
+        # 批次经 ORM flush，提交后统计缓存随之失效；其余记录使用 Core 批量插入
+        db_batch = Batch(**document.batch.dict())
+        db.add(db_batch)
+        db.flush()
+        batch_id = db_batch.batch_id
+        
+        person_ids = {}
+        if document.persons:
+            db.execute(insert(Person.__table__), [
+                {"person_name": p.person_name, "gender": p.gender.value if p.gender else None,
+                 "age": p.age, "batch_id": batch_id}
+                for p in document.persons
+            ])
+            ids = _ids_in_batch(db, Person.person_id, batch_id)
+            person_ids = {p.temp_id: person_id for p, person_id in zip(document.persons, ids)}
+        
+        sensor_ids = []
+        if document.sensors:
+            db.execute(insert(Sensor.__table__), [
+                {"sensor_name": s.sensor_name, "person_id": person_ids[s.person_ref], "batch_id": batch_id,
+                 "start_time": s.start_time, "end_time": s.end_time, "end_reason": s.end_reason}
+                for s in document.sensors
+            ])
+            sensor_ids = _ids_in_batch(db, Sensor.sensor_id, batch_id)
+        
+        experiment_ids = []
+        if document.experiments:
+            db.execute(insert(Experiment.__table__), [
+                {"batch_id": batch_id, "experiment_content": e.experiment_content}
+                for e in document.experiments
+            ])
+            experiment_ids = _ids_in_batch(db, Experiment.experiment_id, batch_id)
+            # 去除重复成员（实验成员表有唯一约束）
+            db.execute(insert(ExperimentMember.__table__), [
+                {"experiment_id": experiment_id, "person_id": person_ids[ref]}
+                for e, experiment_id in zip(document.experiments, experiment_ids)
+                for ref in dict.fromkeys(e.member_refs)
+            ])
+        
+        result = BatchOnboardResponse(
+            batch=BatchResponse.model_validate(db_batch),
+            person_ids=person_ids,
+            sensor_ids=sensor_ids,
+            experiment_ids=experiment_ids,
+            elapsed_seconds=0,
+        )
+        db.commit()
+    except IntegrityError:
+        # 并发创建了同名批次
+        db.rollback()
+        raise HTTPException(status_code=400, detail="批次号已存在")
+    
+    log_activity(
+        db, "batch_onboard",
+        f"批次建档：{document.batch.batch_number}，人员 {len(person_ids)} 人，"
+        f"传感器 {len(sensor_ids)} 个，实验 {len(experiment_ids)} 个"
+    )
+    result.elapsed_seconds = round(time.perf_counter() - started, 3)
+    return result
+
 @router.get("/{batch_id}", response_model=BatchResponse)
 def get_batch(
     batch_id: int, 
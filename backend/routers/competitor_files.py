@@ -1,18 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy.orm import Session, contains_eager
 from typing import List, Optional
+import mimetypes
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import os
-import shutil
+import re
 from datetime import datetime
 import pandas as pd
 import tempfile
 from database import get_db
 from models import CompetitorFile, Batch, Person, User, ModuleEnum
-from schemas import CompetitorFileResponse, MessageResponse
+from schemas import (
+    CompetitorFileResponse, MessageResponse,
+    ChunkedUploadCreate, ChunkedUploadComplete, ChunkedUploadStatus
+)
 from routers.activities import log_activity
 from routers.auth import get_current_user, check_module_permission
 from utils import format_file_size
+from pagination import paginate, set_next_cursor
+from chunked_upload import ChunkedUploadStore, UploadError
+from blob_store import acquire_blob, release_blob, blob_path, write_temp
+from file_reconcile import STATUS_OK
+from file_responses import conditional_file_response, make_etag
+from workbook_ingest import (
+    workbook_ingestor, load_manifest, load_error, open_sheet, STATUS_READY, STATUS_FAILED, STATUS_UNSUPPORTED
+)
 
 router = APIRouter(prefix="/api/competitorFiles", tags=["竞品数据管理"])
 
@@ -21,17 +37,32 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 UPLOAD_DIR = os.path.join(BASE_DIR, "uploads", "competitor_files")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# 分块上传会话（未完成的数据保存在 UPLOAD_DIR/.partial 下，重启后可续传）
+upload_store = ChunkedUploadStore(UPLOAD_DIR)
+# 写入磁盘前在内存中累积的字节数，减少线程池切换次数
+CHUNK_WRITE_BUFFER = 1024 * 1024
+
+FILENAME_PATTERN = re.compile(r'^[^<>:"/\\|?*]+$')
+
 @router.get("/", response_model=List[CompetitorFileResponse])
 def get_competitor_files(
+    response: Response,
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
     batch_id: Optional[int] = Query(None, description="按批次筛选"),
     person_id: Optional[int] = Query(None, description="按人员筛选"),
+    cursor: Optional[str] = Query(None, description="分页游标（来自上一页响应头 X-Next-Cursor），提供时忽略 skip"),
     db: Session = Depends(get_db),
     current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "read"))
 ):
     """获取竞品文件列表"""
-    query = db.query(CompetitorFile).join(Batch).join(Person)
+    query = db.query(CompetitorFile).join(
+        Batch, CompetitorFile.batch_id == Batch.batch_id
+    ).join(
+        Person, CompetitorFile.person_id == Person.person_id
+    ).options(
+        contains_eager(CompetitorFile.batch), contains_eager(CompetitorFile.person)
+    )
     
     if batch_id:
         query = query.filter(CompetitorFile.batch_id == batch_id)
@@ -39,44 +70,14 @@ def get_competitor_files(
     if person_id:
         query = query.filter(CompetitorFile.person_id == person_id)
     
-    files = query.offset(skip).limit(limit).all()
+    files = paginate(query, [(CompetitorFile.competitor_file_id, False)], skip, limit, cursor).all()
+    set_next_cursor(response, files, limit, lambda f: [f.competitor_file_id])
     
-    # 添加关联信息
-    result = []
-    for file in files:
-        # 获取文件大小
-        file_size = None
-        if os.path.exists(file.file_path):
-            try:
-                file_size = os.path.getsize(file.file_path)
-            except OSError:
-                file_size = None
-        
-        file_dict = {
-            "competitor_file_id": file.competitor_file_id,
-            "person_id": file.person_id,
-            "batch_id": file.batch_id,
-            "file_path": file.file_path,
-            "upload_time": file.upload_time,
-            "person_name": file.person.person_name if file.person else None,
-            "batch_number": file.batch.batch_number if file.batch else None,
-            "file_size": file_size,
-            "filename": os.path.basename(file.file_path)
-        }
-        result.append(CompetitorFileResponse(**file_dict))
-    
-    return result
+    # 文件大小等元数据在上传时已记录，列表无需访问文件系统
+    return [_build_file_response(file, file.batch, file.person) for file in files]
 
-@router.post("/upload", response_model=CompetitorFileResponse)
-async def upload_competitor_file(
-    batch_id: int = Form(...),
-    person_id: int = Form(...),
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "write"))
-):
-    """上传竞品文件"""
-    # 验证批次和人员是否存在
+def _get_batch_and_person(db: Session, batch_id: int, person_id: int):
+    """验证批次和人员是否存在"""
     batch = db.query(Batch).filter(Batch.batch_id == batch_id).first()
     if not batch:
         raise HTTPException(status_code=400, detail="指定的批次不存在")
@@ -84,82 +85,398 @@ async def upload_competitor_file(
     person = db.query(Person).filter(Person.person_id == person_id).first()
     if not person:
         raise HTTPException(status_code=400, detail="指定的人员不存在")
-    
-    # 使用原始文件名，如果重名则覆盖
-    filename = file.filename
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    
-    # 检查是否已存在相同的文件记录
+    return batch, person
+
+def _validate_filename(filename: Optional[str]) -> str:
+    if not filename:
+        raise HTTPException(status_code=400, detail="文件名不能为空")
+    if not FILENAME_PATTERN.match(filename):
+        raise HTTPException(status_code=400, detail="文件名包含非法字符")
+    return filename
+
+def _save_file_record(
+    db: Session, batch: Batch, person: Person, filename: str, src_path: str, sha256: str, size: int,
+    mime_type: Optional[str] = None
+) -> CompetitorFile:
+    """
+    将已写入 src_path 的内容存入内容块存储并创建文件记录（src_path 会被移走或删除）
+    
+    相同内容已存在时只增加引用计数；同一批次、人员下同名同内容的记录已存在时直接返回该记录。
+    """
     existing_file = db.query(CompetitorFile).filter(
-        CompetitorFile.file_path == file_path,
-        CompetitorFile.batch_id == batch_id,
-        CompetitorFile.person_id == person_id
+        CompetitorFile.sha256 == sha256,
+        CompetitorFile.file_name == filename,
+        CompetitorFile.batch_id == batch.batch_id,
+        CompetitorFile.person_id == person.person_id
     ).first()
+    if existing_file:
+        os.remove(src_path)
+        return existing_file
     
-    # 保存文件
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
+        blob_id = acquire_blob(db, sha256, size, src_path)
+        file_mtime = datetime.fromtimestamp(int(os.path.getmtime(blob_path(sha256))))
+    except OSError as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=f"文件保存失败: {str(e)}")
-    
-    # 如果存在相同记录，直接返回现有记录；否则创建新记录
-    if existing_file:
-        db_file = existing_file
-    else:
-        db_file = CompetitorFile(
-            person_id=person_id,
-            batch_id=batch_id,
-            file_path=file_path
-        )
-        db.add(db_file)
-        db.commit()
-        db.refresh(db_file)
-    
-    # 获取上传文件的大小
-    file_size = None
-    if os.path.exists(file_path):
-        try:
-            file_size = os.path.getsize(file_path)
-        except OSError:
-            file_size = None
-    
-    result = CompetitorFileResponse(
+    db_file = CompetitorFile(
+        person_id=person.person_id,
+        batch_id=batch.batch_id,
+        file_path=blob_path(sha256),
+        file_name=filename,
+        blob_id=blob_id,
+        file_size=size,
+        sha256=sha256,
+        mime_type=_guess_mime_type(filename, mime_type),
+        file_mtime=file_mtime,
+        storage_status=STATUS_OK,
+        checked_time=datetime.now()
+    )
+    db.add(db_file)
+    db.commit()
+    db.refresh(db_file)
+    # 工作簿在后台解析为列式文件，供 /{file_id}/data 查询
+    workbook_ingestor.enqueue(sha256, filename)
+    return db_file
+
+def _guess_mime_type(filename: str, content_type: Optional[str] = None) -> str:
+    """优先使用客户端声明的类型，未声明或为通用二进制类型时按扩展名推断"""
+    if content_type and content_type != "application/octet-stream":
+        return content_type
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+def _build_file_response(db_file: CompetitorFile, batch: Batch, person: Person):
+    """由数据库中记录的元数据构造响应，不访问文件系统"""
+    return CompetitorFileResponse(
         competitor_file_id=db_file.competitor_file_id,
         person_id=db_file.person_id,
         batch_id=db_file.batch_id,
         file_path=db_file.file_path,
         upload_time=db_file.upload_time,
-        person_name=person.person_name,
-        batch_number=batch.batch_number,
-        file_size=file_size,
-        filename=os.path.basename(db_file.file_path)
+        person_name=person.person_name if person else None,
+        batch_number=batch.batch_number if batch else None,
+        file_size=db_file.file_size,
+        filename=db_file.display_name,
+        sha256=db_file.sha256,
+        mime_type=db_file.mime_type,
+        file_mtime=db_file.file_mtime,
+        storage_status=db_file.storage_status
     )
+
+@router.post("/upload", response_model=CompetitorFileResponse)
+def upload_competitor_file(
+    batch_id: int = Form(...),
+    person_id: int = Form(...),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "write"))
+):
+    """上传竞品文件（单次上传；大文件请使用 /uploads 分块上传）"""
+    # 同步接口在线程池中执行，文件复制与数据库查询不会阻塞事件循环
+    batch, person = _get_batch_and_person(db, batch_id, person_id)
+    
+    filename = _validate_filename(file.filename)
+    
+    # 写入临时文件并计算哈希，再按内容存入内容块存储（同名文件不再互相覆盖）
+    try:
+        tmp_path, sha256, size = write_temp(file.file, CHUNK_WRITE_BUFFER)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"文件保存失败: {str(e)}")
     
-    return result
+    db_file = _save_file_record(db, batch, person, filename, tmp_path, sha256, size, file.content_type)
+    return _build_file_response(db_file, batch, person)
+
+def _upload_status(meta: dict) -> ChunkedUploadStatus:
+    return ChunkedUploadStatus(
+        upload_id=meta["upload_id"],
+        filename=meta["filename"],
+        total_size=meta["total_size"],
+        offset=meta["offset"]
+    )
+
+def _raise_upload_error(e: UploadError):
+    headers = {"Upload-Offset": str(e.offset)} if e.offset is not None else None
+    raise HTTPException(status_code=e.status_code, detail=e.detail, headers=headers)
+
+@router.post("/uploads", response_model=ChunkedUploadStatus)
+def create_chunked_upload(
+    upload_data: ChunkedUploadCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "write"))
+):
+    """创建分块上传会话，之后按偏移量 PUT 数据块，最后调用 complete"""
+    _get_batch_and_person(db, upload_data.batch_id, upload_data.person_id)
+    filename = _validate_filename(upload_data.filename)
+    meta = upload_store.create(
+        current_user.user_id, upload_data.batch_id, upload_data.person_id, filename, upload_data.total_size
+    )
+    return _upload_status(meta)
+
+@router.get("/uploads/{upload_id}", response_model=ChunkedUploadStatus)
+def get_chunked_upload(
+    upload_id: str,
+    current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "write"))
+):
+    """查询上传进度，中断后从返回的 offset 继续上传"""
+    try:
+        return _upload_status(upload_store.get(upload_id, current_user.user_id))
+    except UploadError as e:
+        _raise_upload_error(e)
+
+@router.put("/uploads/{upload_id}", response_model=ChunkedUploadStatus)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="本数据块在文件中的起始偏移量"),
+    current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "write"))
+):
+    """
+    上传数据块（请求体为原始字节）
+    
+    offset 必须等于服务端已接收的字节数，否则返回 409 并在 Upload-Offset 响应头中给出正确偏移量。
+    请求体边接收边写入，连接中断时已写入的部分保留，可通过 GET 查询进度后续传。
+    """
+    try:
+        meta = await run_in_threadpool(upload_store.get, upload_id, current_user.user_id)
+        upload_store.acquire(upload_id)
+    except UploadError as e:
+        _raise_upload_error(e)
+    
+    try:
+        total_size = meta["total_size"]
+        buffer = bytearray()
+        
+        async def flush():
+            nonlocal offset
+            if offset + len(buffer) > total_size:
+                raise UploadError(400, "数据超出文件总大小")
+            offset = await run_in_threadpool(upload_store.write, upload_id, offset, bytes(buffer))
+            buffer.clear()
+        
+        async for chunk in request.stream():
+            buffer.extend(chunk)
+            if len(buffer) >= CHUNK_WRITE_BUFFER:
+                await flush()
+        if buffer:
+            await flush()
+        meta["offset"] = offset
+    except UploadError as e:
+        _raise_upload_error(e)
+    finally:
+        upload_store.release(upload_id)
+    
+    return _upload_status(meta)
+
+@router.post("/uploads/{upload_id}/complete", response_model=CompetitorFileResponse)
+def complete_chunked_upload(
+    upload_id: str,
+    complete_data: Optional[ChunkedUploadComplete] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "write"))
+):
+    """完成分块上传：校验大小与哈希，存入内容块存储并创建文件记录"""
+    try:
+        meta = upload_store.get(upload_id, current_user.user_id)
+        upload_store.acquire(upload_id)
+    except UploadError as e:
+        _raise_upload_error(e)
+    
+    try:
+        if meta["offset"] != meta["total_size"]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"文件未上传完整（{meta['offset']}/{meta['total_size']} 字节）",
+                headers={"Upload-Offset": str(meta["offset"])}
+            )
+        
+        part_path, sha256, size = upload_store.finalize(upload_id)
+        if complete_data and complete_data.sha256 and complete_data.sha256.lower() != sha256:
+            upload_store.discard(upload_id)
+            raise HTTPException(status_code=400, detail="文件校验失败，SHA-256 不一致，请重新上传")
+        
+        batch, person = _get_batch_and_person(db, meta["batch_id"], meta["person_id"])
+        db_file = _save_file_record(db, batch, person, meta["filename"], part_path, sha256, size)
+        upload_store.discard(upload_id)
+    finally:
+        upload_store.release(upload_id)
+    
+    log_activity(db, "file_upload", f"分块上传了竞品文件：{meta['filename']}")
+    return _build_file_response(db_file, batch, person)
+
+@router.delete("/uploads/{upload_id}", response_model=MessageResponse)
+def abort_chunked_upload(
+    upload_id: str,
+    current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "write"))
+):
+    """取消分块上传并删除已上传的数据"""
+    try:
+        upload_store.get(upload_id, current_user.user_id)
+        upload_store.acquire(upload_id)
+    except UploadError as e:
+        _raise_upload_error(e)
+    try:
+        upload_store.discard(upload_id)
+    finally:
+        upload_store.release(upload_id)
+    return MessageResponse(message="上传已取消")
 
 @router.get("/download/{file_id}")
 def download_competitor_file(
     file_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "read"))
 ):
-    """下载竞品文件"""
+    """
+    下载竞品文件
+    
+    以内容哈希作为强 ETag：If-None-Match / If-Modified-Since 命中时返回 304（不访问文件系统），
+    支持 Range 断点续传（206）。
+    """
     file_record = db.query(CompetitorFile).filter(CompetitorFile.competitor_file_id == file_id).first()
     if not file_record:
         raise HTTPException(status_code=404, detail="文件不存在")
     
-    if not os.path.exists(file_record.file_path):
-        raise HTTPException(status_code=404, detail="文件已被删除或移动")
+    stat_result = None
+    if file_record.sha256 and file_record.file_mtime:
+        etag = make_etag(file_record.sha256)
+        last_modified = file_record.file_mtime.timestamp()
+    else:
+        # 未记录元数据的旧记录，按文件状态生成
+        try:
+            stat_result = os.stat(file_record.file_path)
+        except OSError:
+            raise HTTPException(status_code=404, detail="文件已被删除或移动")
+        etag = make_etag(f"{int(stat_result.st_mtime)}-{stat_result.st_size}")
+        last_modified = stat_result.st_mtime
     
-    # 从文件路径提取文件名
-    filename = os.path.basename(file_record.file_path)
+    try:
+        return conditional_file_response(
+            request.headers,
+            request.method,
+            file_record.file_path,
+            etag=etag,
+            last_modified=last_modified,
+            stat_result=stat_result,
+            filename=file_record.display_name,
+            media_type=file_record.mime_type or 'application/octet-stream',
+            # 需要认证的内容只允许客户端私有缓存，每次使用前通过 ETag 重新验证
+            headers={"cache-control": "private, no-cache"}
+        )
+    except OSError:
+        raise HTTPException(status_code=404, detail="文件已被删除或移动")
+
+def _get_parsed_manifest(db: Session, file_id: int):
+    """返回 (文件记录, manifest)；未解析完成时返回 202 并加入解析队列"""
+    file_record = db.query(CompetitorFile).filter(CompetitorFile.competitor_file_id == file_id).first()
+    if not file_record:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    if not file_record.sha256:
+        raise HTTPException(status_code=404, detail="文件已被删除或移动")
     
-    return FileResponse(
-        path=file_record.file_path,
-        filename=filename,
-        media_type='application/octet-stream'
-    )
+    status = workbook_ingestor.enqueue(file_record.sha256, file_record.display_name)
+    if status == STATUS_UNSUPPORTED:
+        raise HTTPException(status_code=400, detail="仅支持解析 xlsx/xls/csv 文件")
+    if status == STATUS_FAILED:
+        raise HTTPException(status_code=422, detail=f"文件解析失败: {load_error(file_record.sha256)}")
+    if status != STATUS_READY:
+        return file_record, None
+    return file_record, load_manifest(file_record.sha256)
+
+def _parsing_response():
+    return JSONResponse(status_code=202, content={"status": "pending", "message": "文件正在解析，请稍后重试"})
+
+@router.get("/{file_id}/sheets")
+def get_competitor_file_sheets(
+    file_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "read"))
+):
+    """获取已解析工作簿的工作表、列名与行数"""
+    file_record, manifest = _get_parsed_manifest(db, file_id)
+    if manifest is None:
+        return _parsing_response()
+    return {"file_id": file_id, "filename": file_record.display_name, "sheets": manifest["sheets"]}
+
+@router.get("/{file_id}/data")
+def get_competitor_file_data(
+    file_id: int,
+    sheet: Optional[str] = Query(None, description="工作表序号或名称，默认第一个工作表"),
+    columns: Optional[str] = Query(None, description="返回的列名，逗号分隔，默认全部（时间列始终返回）"),
+    start_time: Optional[datetime] = Query(None, description="开始时间"),
+    end_time: Optional[datetime] = Query(None, description="结束时间"),
+    max_points: int = Query(2000, ge=0, le=100000, description="最多返回的行数，超出时等间隔抽样，0 表示不抽样"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "read"))
+):
+    """
+    查询已解析工作簿中的数据（按列返回）
+    
+    数据来自上传后后台解析生成的 Arrow 文件，以内存映射方式读取，只处理请求的列和时间范围；
+    尚未解析完成时返回 202。
+    """
+    file_record, manifest = _get_parsed_manifest(db, file_id)
+    if manifest is None:
+        return _parsing_response()
+    if not manifest["sheets"]:
+        raise HTTPException(status_code=404, detail="文件中没有可解析的数据")
+    
+    if sheet is None:
+        sheet_info = manifest["sheets"][0]
+    else:
+        sheet_info = next(
+            (s for s in manifest["sheets"] if s["name"] == sheet or (sheet.isdigit() and s["index"] == int(sheet))),
+            None
+        )
+        if sheet_info is None:
+            raise HTTPException(status_code=404, detail="工作表不存在")
+    
+    table = open_sheet(file_record.sha256, sheet_info)
+    time_column = sheet_info["time_column"]
+    
+    if columns:
+        selected = [name.strip() for name in columns.split(",") if name.strip()]
+        missing = [name for name in selected if name not in table.column_names]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"列不存在: {', '.join(missing)}")
+        if time_column and time_column not in selected:
+            selected.insert(0, time_column)
+        table = table.select(selected)
+    
+    if start_time or end_time:
+        if not time_column:
+            raise HTTPException(status_code=400, detail="该工作表没有时间列，不能按时间筛选")
+        times = table.column(time_column)
+        mask = None
+        if start_time:
+            mask = pc.greater_equal(times, pa.scalar(start_time, type=times.type))
+        if end_time:
+            upper = pc.less_equal(times, pa.scalar(end_time, type=times.type))
+            mask = upper if mask is None else pc.and_(mask, upper)
+        table = table.filter(mask)
+    
+    total_rows = table.num_rows
+    if max_points and total_rows > max_points:
+        # 等间隔抽样，保留首尾行
+        indices = np.unique(np.linspace(0, total_rows - 1, max_points).round().astype(np.int64))
+        table = table.take(pa.array(indices))
+    
+    data = {}
+    for name in table.column_names:
+        column = table.column(name)
+        if name == time_column:
+            column = pc.strftime(pc.cast(column, pa.timestamp("s"), safe=False), format="%Y-%m-%d %H:%M:%S")
+        data[name] = column.to_pylist()
+    
+    return JSONResponse(content={
+        "file_id": file_id,
+        "sheet": sheet_info["name"],
+        "time_column": time_column,
+        "total_rows": total_rows,
+        "returned_rows": table.num_rows,
+        "columns": table.column_names,
+        "data": data
+    })
 
 @router.put("/{file_id}/rename", response_model=CompetitorFileResponse)
 def rename_competitor_file(
@@ -178,30 +495,21 @@ def rename_competitor_file(
         raise HTTPException(status_code=400, detail="新文件名不能为空")
     
     # 验证文件名格式
-    import re
-    if not re.match(r'^[^<>:"/\\|?*]+$', new_file_name):
-        raise HTTPException(status_code=400, detail="文件名包含非法字符")
-    
-    # 获取原文件路径和目录
-    old_file_path = file_record.file_path
-    file_dir = os.path.dirname(old_file_path)
-    
-    # 构建新文件路径
-    new_file_path = os.path.join(file_dir, new_file_name)
-    
-    # 检查新文件是否已存在
-    if os.path.exists(new_file_path) and new_file_path != old_file_path:
+    _validate_filename(new_file_name)
+    
+    # 检查同一批次、人员下是否已有同名文件
+    duplicate = db.query(CompetitorFile).filter(
+        CompetitorFile.competitor_file_id != file_id,
+        CompetitorFile.batch_id == file_record.batch_id,
+        CompetitorFile.person_id == file_record.person_id,
+        CompetitorFile.file_name == new_file_name
+    ).first()
+    if duplicate:
         raise HTTPException(status_code=400, detail="目标文件名已存在")
     
-    # 重命名物理文件
-    if os.path.exists(old_file_path):
-        try:
-            os.rename(old_file_path, new_file_path)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"文件重命名失败: {str(e)}")
-    
-    # 更新数据库记录
-    file_record.file_path = new_file_path
+    # 内容按哈希存储，重命名只修改文件名，不移动物理文件
+    file_record.file_name = new_file_name
+    file_record.mime_type = _guess_mime_type(new_file_name)
     db.commit()
     db.refresh(file_record)
     
@@ -209,27 +517,7 @@ def rename_competitor_file(
     batch = db.query(Batch).filter(Batch.batch_id == file_record.batch_id).first()
     person = db.query(Person).filter(Person.person_id == file_record.person_id).first()
     
-    # 获取文件大小
-    file_size = None
-    if os.path.exists(new_file_path):
-        try:
-            file_size = os.path.getsize(new_file_path)
-        except OSError:
-            file_size = None
-    
-    result = CompetitorFileResponse(
-        competitor_file_id=file_record.competitor_file_id,
-        person_id=file_record.person_id,
-        batch_id=file_record.batch_id,
-        file_path=file_record.file_path,
-        upload_time=file_record.upload_time,
-        person_name=person.person_name if person else None,
-        batch_number=batch.batch_number if batch else None,
-        file_size=file_size,
-        filename=os.path.basename(file_record.file_path)
-    )
-    
-    return result
+    return _build_file_response(file_record, batch, person)
 
 @router.delete("/{file_id}", response_model=MessageResponse)
 def delete_competitor_file(
@@ -242,14 +530,9 @@ def delete_competitor_file(
     if not file_record:
         raise HTTPException(status_code=404, detail="文件不存在")
     
-    # 删除物理文件
-    if os.path.exists(file_record.file_path):
-        try:
-            os.remove(file_record.file_path)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"文件删除失败: {str(e)}")
-    
-    # 删除数据库记录
+    # 只删除记录并减少内容块引用计数，不再被引用的内容由垃圾回收清理
+    if file_record.blob_id is not None:
+        release_blob(db, file_record.blob_id)
     db.delete(file_record)
     db.commit()
     
@@ -263,7 +546,13 @@ def export_competitor_files(
     current_user: User = Depends(check_module_permission(ModuleEnum.COMPETITOR_DATA, "read"))
 ):
     """导出竞品文件数据为Excel"""
-    query = db.query(CompetitorFile).join(Batch).join(Person)
+    query = db.query(CompetitorFile).join(
+        Batch, CompetitorFile.batch_id == Batch.batch_id
+    ).join(
+        Person, CompetitorFile.person_id == Person.person_id
+    ).options(
+        contains_eager(CompetitorFile.batch), contains_eager(CompetitorFile.person)
+    )
     
     if batch_id:
         query = query.filter(CompetitorFile.batch_id == batch_id)
@@ -276,19 +565,11 @@ def export_competitor_files(
     # 准备导出数据
     export_data = []
     for file in files:
-        # 获取文件大小
-        file_size = None
-        if os.path.exists(file.file_path):
-            try:
-                file_size = os.path.getsize(file.file_path)
-            except OSError:
-                file_size = None
-        
-        # 格式化文件大小
-        file_size_str = format_file_size(file_size)
+        # 格式化文件大小（上传时记录）
+        file_size_str = format_file_size(file.file_size)
         
         # 从文件路径获取文件名
-        filename = os.path.basename(file.file_path) if file.file_path else "未知文件"
+        filename = file.display_name if file.file_path else "未知文件"
         
         export_data.append({
             "文件ID": file.competitor_file_id,
@@ -1,60 +1,99 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from database import get_db
+from database import get_db, get_async_db
 from models import Experiment, Batch, Person, ExperimentMember, User, ModuleEnum
 from schemas import ExperimentCreate, ExperimentUpdate, ExperimentResponse, MessageResponse, ExperimentMemberResponse
 from routers.activities import log_activity
 from routers.auth import get_current_user, check_module_permission
+from pagination import paginate, set_next_cursor
+from routers.stats import invalidate_stats_cache
 
 router = APIRouter(prefix="/api/experiments", tags=["实验管理"])
 
+def _experiment_load_options():
+    """实验查询的预加载选项：批次随主查询JOIN，成员及人员姓名通过一次IN查询批量加载"""
+    return (
+        joinedload(Experiment.batch),
+        selectinload(Experiment.members).joinedload(ExperimentMember.person),
+    )
+
+def _build_experiment_response(exp: Experiment) -> ExperimentResponse:
+    """根据已预加载关联的实验对象构建响应，不再发起额外查询"""
+    members = [
+        ExperimentMemberResponse(
+            id=member.id,
+            experiment_id=member.experiment_id,
+            person_id=member.person_id,
+            person_name=member.person.person_name if member.person else None
+        )
+        for member in exp.members
+    ]
+    return ExperimentResponse(
+        experiment_id=exp.experiment_id,
+        batch_id=exp.batch_id,
+        experiment_content=exp.experiment_content,
+        created_time=exp.created_time,
+        batch_number=exp.batch.batch_number if exp.batch else None,
+        members=members
+    )
+
+def _load_persons(db: Session, person_ids: List[int]) -> dict:
+    """一次查询批量校验人员是否存在，返回 person_id -> Person 映射"""
+    if not person_ids:
+        return {}
+    persons = db.query(Person).filter(Person.person_id.in_(set(person_ids))).all()
+    found = {person.person_id: person for person in persons}
+    for person_id in person_ids:
+        if person_id not in found:
+            raise HTTPException(status_code=400, detail=f"人员ID {person_id} 不存在")
+    return found
+
+def _insert_members(db: Session, experiment_id: int, person_ids: List[int]):
+    """批量插入实验成员（单条 executemany 语句，无需逐行取回主键）"""
+    if person_ids:
+        db.execute(
+            insert(ExperimentMember.__table__),
+            [{"experiment_id": experiment_id, "person_id": person_id} for person_id in person_ids]
+        )
+
+def _get_experiment_with_relations(db: Session, experiment_id: int) -> Optional[Experiment]:
+    return (
+        db.query(Experiment)
+        .options(*_experiment_load_options())
+        .filter(Experiment.experiment_id == experiment_id)
+        .first()
+    )
+
 @router.get("/", response_model=List[ExperimentResponse])
-def get_experiments(
+async def get_experiments(
+    response: Response,
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
     batch_id: Optional[int] = Query(None, description="按批次筛选"),
     person_id: Optional[int] = Query(None, description="按人员筛选"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="分页游标（来自上一页响应头 X-Next-Cursor），提供时忽略 skip"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(check_module_permission(ModuleEnum.EXPERIMENT_MANAGEMENT, "read"))
 ):
     """获取实验列表"""
-    query = db.query(Experiment).join(Batch)
+    query = select(Experiment).options(*_experiment_load_options())
     
     if batch_id:
         query = query.filter(Experiment.batch_id == batch_id)
     
     if person_id:
-        query = query.join(ExperimentMember).filter(ExperimentMember.person_id == person_id)
-    
-    experiments = query.order_by(Experiment.experiment_id.desc()).offset(skip).limit(limit).all()
-    
-    # 添加关联信息
-    result = []
-    for exp in experiments:
-        # 获取实验成员
-        members = []
-        for member in exp.members:
-            person = db.query(Person).filter(Person.person_id == member.person_id).first()
-            member_dict = {
-                "id": member.id,
-                "experiment_id": member.experiment_id,
-                "person_id": member.person_id,
-                "person_name": person.person_name if person else None
-            }
-            members.append(ExperimentMemberResponse(**member_dict))
-        
-        exp_dict = {
-            "experiment_id": exp.experiment_id,
-            "batch_id": exp.batch_id,
-            "experiment_content": exp.experiment_content,
-            "created_time": exp.created_time,
-            "batch_number": exp.batch.batch_number if exp.batch else None,
-            "members": members
-        }
-        result.append(ExperimentResponse(**exp_dict))
+        query = query.filter(
+            Experiment.members.any(ExperimentMember.person_id == person_id)
+        )
     
-    return result
+    query = paginate(query, [(Experiment.experiment_id, True)], skip, limit, cursor)
+    experiments = (await db.execute(query)).scalars().all()
+    set_next_cursor(response, experiments, limit, lambda e: [e.experiment_id])
+    
+    return [_build_experiment_response(exp) for exp in experiments]
 
 @router.post("/", response_model=ExperimentResponse)
 def create_experiment(
@@ -68,68 +107,37 @@ def create_experiment(
     if not batch:
         raise HTTPException(status_code=400, detail="指定的批次不存在")
     
-    # 验证所有成员是否存在
-    for person_id in experiment.member_ids:
-        person = db.query(Person).filter(Person.person_id == person_id).first()
-        if not person:
-            raise HTTPException(status_code=400, detail=f"人员ID {person_id} 不存在")
-    
     # 验证至少有一个成员
     if not experiment.member_ids:
         raise HTTPException(status_code=400, detail="至少需要一个实验成员")
     
-    # 创建实验记录
+    # 去除重复成员（实验成员表有唯一约束）
+    member_ids = list(dict.fromkeys(experiment.member_ids))
+    
+    # 验证所有成员是否存在（单次IN查询）
+    persons = _load_persons(db, member_ids)
+    
+    # 创建实验记录及成员，一次提交（成员批量插入，条数与成员数无关）
     db_experiment = Experiment(
         batch_id=experiment.batch_id,
         experiment_content=experiment.experiment_content
     )
     db.add(db_experiment)
-    db.commit()
-    db.refresh(db_experiment)
-    
-    # 添加实验成员
-    members = []
-    for person_id in experiment.member_ids:
-        member = ExperimentMember(
-            experiment_id=db_experiment.experiment_id,
-            person_id=person_id
-        )
-        db.add(member)
-        members.append(member)
+    db.flush()
+    experiment_id = db_experiment.experiment_id
+    _insert_members(db, experiment_id, member_ids)
     
+    # 提交前记录活动描述，避免提交后逐个刷新人员对象
+    member_names = [persons[person_id].person_name for person_id in member_ids]
+    activity_desc = f"创建了实验 {experiment_id}，批次：{batch.batch_number}，成员：{', '.join(member_names)}"
     db.commit()
     
-    # 记录活动
-    member_names = []
-    for member in members:
-        person = db.query(Person).filter(Person.person_id == member.person_id).first()
-        if person:
-            member_names.append(person.person_name)
+    # 重新加载实验及其关联（固定查询条数）
+    result = _build_experiment_response(_get_experiment_with_relations(db, experiment_id))
     
-    activity_desc = f"创建了实验 {db_experiment.experiment_id}，批次：{batch.batch_number}，成员：{', '.join(member_names)}"
+    # 记录活动
     log_activity(db, "experiment_create", activity_desc)
     
-    # 构建响应
-    member_responses = []
-    for member in members:
-        person = db.query(Person).filter(Person.person_id == member.person_id).first()
-        member_dict = {
-            "id": member.id,
-            "experiment_id": member.experiment_id,
-            "person_id": member.person_id,
-            "person_name": person.person_name if person else None
-        }
-        member_responses.append(ExperimentMemberResponse(**member_dict))
-    
-    result = ExperimentResponse(
-        experiment_id=db_experiment.experiment_id,
-        batch_id=db_experiment.batch_id,
-        experiment_content=db_experiment.experiment_content,
-        created_time=db_experiment.created_time,
-        batch_number=batch.batch_number,
-        members=member_responses
-    )
-    
     return result
 
 @router.get("/{experiment_id}", response_model=ExperimentResponse)
@@ -139,32 +147,11 @@ def get_experiment(
     current_user: User = Depends(check_module_permission(ModuleEnum.EXPERIMENT_MANAGEMENT, "read"))
 ):
     """获取单个实验详情"""
-    experiment = db.query(Experiment).filter(Experiment.experiment_id == experiment_id).first()
+    experiment = _get_experiment_with_relations(db, experiment_id)
     if not experiment:
         raise HTTPException(status_code=404, detail="实验不存在")
     
-    # 获取实验成员
-    members = []
-    for member in experiment.members:
-        person = db.query(Person).filter(Person.person_id == member.person_id).first()
-        member_dict = {
-            "id": member.id,
-            "experiment_id": member.experiment_id,
-            "person_id": member.person_id,
-            "person_name": person.person_name if person else None
-        }
-        members.append(ExperimentMemberResponse(**member_dict))
-    
-    result = ExperimentResponse(
-        experiment_id=experiment.experiment_id,
-        batch_id=experiment.batch_id,
-        experiment_content=experiment.experiment_content,
-        created_time=experiment.created_time,
-        batch_number=experiment.batch.batch_number if experiment.batch else None,
-        members=members
-    )
-    
-    return result
+    return _build_experiment_response(experiment)
 
 @router.put("/{experiment_id}", response_model=ExperimentResponse)
 def update_experiment(
@@ -189,50 +176,31 @@ def update_experiment(
     
     # 更新成员列表（如果提供）
     if experiment.member_ids is not None:
-        # 验证所有成员是否存在
-        for person_id in experiment.member_ids:
-            person = db.query(Person).filter(Person.person_id == person_id).first()
-            if not person:
-                raise HTTPException(status_code=400, detail=f"人员ID {person_id} 不存在")
+        member_ids = list(dict.fromkeys(experiment.member_ids))
         
-        # 删除现有成员
-        db.query(ExperimentMember).filter(ExperimentMember.experiment_id == experiment_id).delete()
+        # 验证所有成员是否存在（单次IN查询）
+        persons = _load_persons(db, member_ids)
         
-        # 添加新成员
-        for person_id in experiment.member_ids:
-            member = ExperimentMember(
-                experiment_id=experiment_id,
-                person_id=person_id
-            )
-            db.add(member)
+        # 替换现有成员：先删后插避免唯一约束冲突，均为单条批量语句
+        db.execute(
+            delete(ExperimentMember)
+            .where(ExperimentMember.experiment_id == experiment_id)
+            .execution_options(synchronize_session=False)
+        )
+        _insert_members(db, experiment_id, member_ids)
     
     db.commit()
-    db.refresh(db_experiment)
+    if experiment.member_ids is not None:
+        # 成员通过 Core 语句替换，不经过 ORM flush，需显式使统计缓存失效
+        invalidate_stats_cache()
+    
+    # 重新加载实验及其关联（固定两条查询）
+    db_experiment = _get_experiment_with_relations(db, experiment_id)
+    result = _build_experiment_response(db_experiment)
     
     # 记录活动
     log_activity(db, "experiment_update", f"更新了实验 {experiment_id}")
     
-    # 获取更新后的成员信息
-    members = []
-    for member in db_experiment.members:
-        person = db.query(Person).filter(Person.person_id == member.person_id).first()
-        member_dict = {
-            "id": member.id,
-            "experiment_id": member.experiment_id,
-            "person_id": member.person_id,
-            "person_name": person.person_name if person else None
-        }
-        members.append(ExperimentMemberResponse(**member_dict))
-    
-    result = ExperimentResponse(
-        experiment_id=db_experiment.experiment_id,
-        batch_id=db_experiment.batch_id,
-        experiment_content=db_experiment.experiment_content,
-        created_time=db_experiment.created_time,
-        batch_number=batch.batch_number,
-        members=members
-    )
-    
     return result
 
 @router.delete("/{experiment_id}", response_model=MessageResponse)
@@ -1,35 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, Body, UploadFile, File
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
+from sqlalchemy import select, insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from pydantic import ValidationError
 from datetime import datetime
+from urllib.parse import quote
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import tempfile
+import csv
+import io
 import os
+import time
 
-from database import get_db
+from openpyxl import Workbook
+
+from database import get_db, get_async_db, SessionLocal
 from models import FingerBloodFile, Batch, Person, User
-from schemas import FingerBloodDataResponse, FingerBloodDataCreate, FingerBloodDataUpdate, MessageResponse
+from schemas import (
+    FingerBloodDataResponse, FingerBloodDataCreate, FingerBloodDataUpdate, MessageResponse,
+    BulkImportResponse, BulkImportError, GlucoseSummaryResponse
+)
 from routers.activities import log_activity
 from routers.auth import get_current_user, check_module_permission
 from models import ModuleEnum
+from pagination import paginate, set_next_cursor
+from fast_json import RowSerializer
+from routers.stats import invalidate_stats_cache
+from accuracy import accuracy_cache
+from glucose_summary import list_summaries, record_added, record_removed, record_updated, summary_statistics
+from timeseries import ARROW_STREAM_MEDIA_TYPE, METHOD_LTTB, METHODS, arrow_stream_bytes, downsample, to_epoch_ms
 
 router = APIRouter(prefix="/api/fingerBloodData", tags=["指尖血数据管理"])
 
-@router.get("/", response_model=List[FingerBloodDataResponse])
-def get_finger_blood_data(
-    skip: int = Query(0, ge=0, description="跳过的记录数"),
-    limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
-    batch_id: Optional[int] = Query(None, description="按批次筛选"),
-    person_id: Optional[int] = Query(None, description="按人员筛选"),
-    start_time: Optional[datetime] = Query(None, description="开始时间筛选"),
-    end_time: Optional[datetime] = Query(None, description="结束时间筛选"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(check_module_permission(ModuleEnum.FINGER_BLOOD_DATA, "read"))
-):
-    """获取指尖血数据列表"""
-    query = db.query(FingerBloodFile).join(Batch).join(Person)
-    
+# 流式导出时每批从数据库游标读取的行数
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_HEADERS = ["指尖血数据ID", "人员姓名", "批次编号", "采集时间", "血糖值"]
+_list_serializer = RowSerializer(FingerBloodDataResponse)
+
+# 批量导入时每个事务插入的行数
+IMPORT_CHUNK_SIZE = 1000
+# 导入文件支持的中文列名
+IMPORT_COLUMN_ALIASES = {
+    "人员ID": "person_id",
+    "批次ID": "batch_id",
+    "采集时间": "collection_time",
+    "血糖值": "blood_glucose_value",
+}
+
+# 曲线接口每个人员最多返回的点数
+TIMESERIES_MAX_POINTS = 5000
+
+def _apply_filters(query, batch_id=None, person_id=None, start_time=None, end_time=None):
+    """应用指尖血数据的通用筛选条件"""
     if batch_id:
         query = query.filter(FingerBloodFile.batch_id == batch_id)
     
@@ -42,23 +69,47 @@ def get_finger_blood_data(
     if end_time:
         query = query.filter(FingerBloodFile.collection_time <= end_time)
     
-    data = query.order_by(FingerBloodFile.collection_time.desc()).offset(skip).limit(limit).all()
-    
-    # 添加关联信息
-    result = []
-    for item in data:
-        data_dict = {
-            "finger_blood_file_id": item.finger_blood_file_id,
-            "person_id": item.person_id,
-            "batch_id": item.batch_id,
-            "collection_time": item.collection_time,
-            "blood_glucose_value": float(item.blood_glucose_value),
-            "person_name": item.person.person_name if item.person else None,
-            "batch_number": item.batch.batch_number if item.batch else None
-        }
-        result.append(FingerBloodDataResponse(**data_dict))
+    return query
+
+def _reading(data: FingerBloodFile):
+    """汇总表维护所需的 (批次, 人员, 采集时间, 血糖值)"""
+    return (data.batch_id, data.person_id, data.collection_time, data.blood_glucose_value)
+
+@router.get("/", response_model=List[FingerBloodDataResponse])
+async def get_finger_blood_data(
+    response: Response,
+    skip: int = Query(0, ge=0, description="跳过的记录数"),
+    limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
+    batch_id: Optional[int] = Query(None, description="按批次筛选"),
+    person_id: Optional[int] = Query(None, description="按人员筛选"),
+    start_time: Optional[datetime] = Query(None, description="开始时间筛选"),
+    end_time: Optional[datetime] = Query(None, description="结束时间筛选"),
+    cursor: Optional[str] = Query(None, description="分页游标（来自上一页响应头 X-Next-Cursor），提供时忽略 skip"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.FINGER_BLOOD_DATA, "read"))
+):
+    """获取指尖血数据列表"""
+    # 只查询响应所需的列，结果为 Row 元组，直接序列化（见 fast_json.py）
+    query = (
+        select(
+            FingerBloodFile.person_id,
+            FingerBloodFile.batch_id,
+            FingerBloodFile.collection_time,
+            FingerBloodFile.blood_glucose_value,
+            FingerBloodFile.finger_blood_file_id,
+            Person.person_name,
+            Batch.batch_number,
+        )
+        .join(Person, Person.person_id == FingerBloodFile.person_id)
+        .join(Batch, Batch.batch_id == FingerBloodFile.batch_id)
+    )
+    query = _apply_filters(query, batch_id, person_id, start_time, end_time)
     
-    return result
+    sort_keys = [(FingerBloodFile.collection_time, True), (FingerBloodFile.finger_blood_file_id, True)]
+    query = paginate(query, sort_keys, skip, limit, cursor)
+    rows = (await db.execute(query)).all()
+    set_next_cursor(response, rows, limit, lambda r: [r.collection_time, r.finger_blood_file_id])
+    return _list_serializer.response(rows, response)
 
 @router.post("/", response_model=FingerBloodDataResponse)
 def create_finger_blood_data(
@@ -78,6 +129,8 @@ def create_finger_blood_data(
     
     db_data = FingerBloodFile(**data.dict())
     db.add(db_data)
+    db.flush()
+    record_added(db, [_reading(db_data)])
     db.commit()
     db.refresh(db_data)
     
@@ -93,6 +146,219 @@ def create_finger_blood_data(
     
     return result
 
+def _bulk_import(db: Session, records: List[dict]) -> BulkImportResponse:
+    """
+    批量校验并导入指尖血数据
+
+    批次和人员ID各通过一次IN查询集中校验，合法行按块使用 executemany 插入，
+    每块单独提交；非法行不影响其他行，错误按行号返回。
+    某块写入失败时只回滚该块并将其各行计为失败，已提交的块照常生效并使缓存失效。
+    """
+    started = time.perf_counter()
+    errors = []
+    valid_rows = []
+    
+    for index, record in enumerate(records, start=1):
+        try:
+            item = FingerBloodDataCreate(**record)
+        except (ValidationError, TypeError) as e:
+            message = "; ".join(err["msg"] for err in e.errors()) if isinstance(e, ValidationError) else str(e)
+            errors.append(BulkImportError(row=index, error=message))
+            continue
+        valid_rows.append((index, item))
+    
+    batch_ids = {item.batch_id for _, item in valid_rows}
+    person_ids = {item.person_id for _, item in valid_rows}
+    existing_batches = set()
+    existing_persons = set()
+    if batch_ids:
+        existing_batches = set(db.scalars(select(Batch.batch_id).where(Batch.batch_id.in_(batch_ids))))
+    if person_ids:
+        existing_persons = set(db.scalars(select(Person.person_id).where(Person.person_id.in_(person_ids))))
+    
+    rows_to_insert = []
+    for index, item in valid_rows:
+        if item.batch_id not in existing_batches:
+            errors.append(BulkImportError(row=index, error=f"批次ID {item.batch_id} 不存在"))
+        elif item.person_id not in existing_persons:
+            errors.append(BulkImportError(row=index, error=f"人员ID {item.person_id} 不存在"))
+        else:
+            rows_to_insert.append((index, item.dict()))
+    
+    inserted = 0
+    committed_pairs = set()
+    try:
+        for start in range(0, len(rows_to_insert), IMPORT_CHUNK_SIZE):
+            chunk = [row for _, row in rows_to_insert[start:start + IMPORT_CHUNK_SIZE]]
+            try:
+                db.execute(insert(FingerBloodFile), chunk)
+                record_added(db, [
+                    (row["batch_id"], row["person_id"], row["collection_time"], row["blood_glucose_value"])
+                    for row in chunk
+                ])
+                db.commit()
+            except SQLAlchemyError as e:
+                db.rollback()
+                message = f"写入数据库失败: {e.__class__.__name__}"
+                errors.extend(
+                    BulkImportError(row=index, error=message)
+                    for index, _ in rows_to_insert[start:start + IMPORT_CHUNK_SIZE]
+                )
+                continue
+            inserted += len(chunk)
+            committed_pairs.update((row["batch_id"], row["person_id"]) for row in chunk)
+    finally:
+        if inserted:
+            # Core 批量插入不经过 ORM flush，需显式使统计与准确性分析缓存失效（后续块出现异常时同样执行）
+            invalidate_stats_cache()
+            accuracy_cache.invalidate_pairs(committed_pairs)
+            log_activity(db, "指尖血数据批量导入", f"批量导入了{inserted}条指尖血数据")
+    
+    errors.sort(key=lambda err: err.row)
+    elapsed = time.perf_counter() - started
+    return BulkImportResponse(
+        total=len(records),
+        inserted=inserted,
+        failed=len(errors),
+        errors=errors,
+        elapsed_seconds=round(elapsed, 3),
+        rows_per_second=round(inserted / elapsed, 1) if elapsed > 0 else float(inserted)
+    )
+
+@router.post("/bulk", response_model=BulkImportResponse)
+def bulk_create_finger_blood_data(
+    records: List[dict] = Body(..., description="指尖血数据数组，字段同单条新增接口"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.FINGER_BLOOD_DATA, "write"))
+):
+    """批量新增指尖血数据（JSON数组）"""
+    return _bulk_import(db, records)
+
+@router.post("/bulk/upload", response_model=BulkImportResponse)
+def bulk_upload_finger_blood_data(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.FINGER_BLOOD_DATA, "write"))
+):
+    """批量导入指尖血数据（CSV / XLSX 文件）"""
+    filename = (file.filename or "").lower()
+    try:
+        if filename.endswith(".csv"):
+            df = pd.read_csv(file.file, encoding="utf-8-sig")
+        elif filename.endswith((".xlsx", ".xls")):
+            df = pd.read_excel(file.file)
+        else:
+            raise HTTPException(status_code=400, detail="仅支持 CSV 或 Excel 文件")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"文件解析失败: {str(e)}")
+    
+    df = df.rename(columns=IMPORT_COLUMN_ALIASES)
+    missing = [col for col in IMPORT_COLUMN_ALIASES.values() if col not in df.columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"缺少必要的列: {', '.join(missing)}")
+    
+    # 空单元格转为 None，交由逐行校验报告
+    df = df[list(IMPORT_COLUMN_ALIASES.values())].astype(object).where(df.notna(), None)
+    return _bulk_import(db, df.to_dict(orient="records"))
+
+@router.get("/summary", response_model=List[GlucoseSummaryResponse])
+def get_finger_blood_summary(
+    batch_id: Optional[int] = Query(None, description="按批次筛选"),
+    person_id: Optional[int] = Query(None, description="按人员筛选"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.FINGER_BLOOD_DATA, "read"))
+):
+    """获取按批次、人员汇总的血糖统计（条数、均值、最小/最大值、标准差、首末采集时间）"""
+    result = []
+    for summary, batch_number, person_name in list_summaries(db, batch_id, person_id):
+        result.append(GlucoseSummaryResponse(
+            batch_id=summary.batch_id,
+            batch_number=batch_number,
+            person_id=summary.person_id,
+            person_name=person_name,
+            count=summary.data_count,
+            min_value=float(summary.min_value),
+            max_value=float(summary.max_value),
+            first_time=summary.first_time,
+            last_time=summary.last_time,
+            **summary_statistics(summary)
+        ))
+    return result
+
+@router.get("/timeseries")
+async def get_finger_blood_timeseries(
+    batch_id: Optional[int] = Query(None, description="按批次筛选"),
+    person_id: Optional[int] = Query(None, description="按人员筛选"),
+    start_time: Optional[datetime] = Query(None, description="开始时间筛选"),
+    end_time: Optional[datetime] = Query(None, description="结束时间筛选"),
+    max_points: int = Query(1000, ge=3, le=TIMESERIES_MAX_POINTS, description="每个人员返回的最大点数"),
+    method: str = Query(METHOD_LTTB, description="降采样方法：lttb / minmax"),
+    format: str = Query("json", description="返回格式：json（列式数组）/ arrow（Arrow IPC 流）"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.FINGER_BLOOD_DATA, "read"))
+):
+    """
+    获取按人员分组、降采样后的血糖曲线
+
+    JSON 格式按列返回：t 为毫秒时间戳（采集时间按服务器本地时区解释），v 为血糖值，
+    total_points 为降采样前的点数。
+    """
+    if method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"不支持的降采样方法: {method}")
+    if format not in ("json", "arrow"):
+        raise HTTPException(status_code=400, detail=f"不支持的返回格式: {format}")
+
+    query = (
+        select(
+            FingerBloodFile.person_id,
+            Person.person_name,
+            FingerBloodFile.collection_time,
+            FingerBloodFile.blood_glucose_value,
+        )
+        .join(Person, Person.person_id == FingerBloodFile.person_id)
+    )
+    query = _apply_filters(query, batch_id, person_id, start_time, end_time)
+    query = query.order_by(FingerBloodFile.person_id, FingerBloodFile.collection_time)
+    rows = (await db.execute(query)).all()
+
+    series = []
+    if rows:
+        person_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        times = to_epoch_ms(np.array([row[2] for row in rows], dtype="datetime64[ms]"))
+        values = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+        # 结果已按人员排序，按人员切分为连续区间
+        bounds = np.flatnonzero(np.diff(person_ids)) + 1
+        for start, end in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(rows)]))):
+            t, v = downsample(times[start:end], values[start:end], max_points, method)
+            series.append({
+                "person_id": int(person_ids[start]),
+                "person_name": rows[start][1],
+                "total_points": int(end - start),
+                "t": t,
+                "v": v,
+            })
+
+    if format == "arrow":
+        # 长表：每个点一行，人员姓名以字典编码存储
+        lengths = [len(item["t"]) for item in series]
+        table = pa.table({
+            "person_id": pa.array(np.repeat([item["person_id"] for item in series], lengths).astype(np.int32)),
+            "person_name": pa.DictionaryArray.from_arrays(
+                pa.array(np.repeat(np.arange(len(series)), lengths).astype(np.int32)),
+                pa.array([item["person_name"] for item in series], pa.string()),
+            ),
+            "t": pa.array(np.concatenate([item["t"] for item in series] or [np.array([], np.int64)]), pa.timestamp("ms", tz="UTC")),
+            "v": pa.array(np.concatenate([item["v"] for item in series] or [np.array([], np.float64)]), pa.float64()),
+        })
+        return Response(content=arrow_stream_bytes(table), media_type=ARROW_STREAM_MEDIA_TYPE)
+
+    for item in series:
+        item["t"] = item["t"].tolist()
+        item["v"] = item["v"].tolist()
+    return JSONResponse({"method": method, "max_points": max_points, "series": series})
+
 @router.get("/{data_id}", response_model=FingerBloodDataResponse)
 def get_finger_blood_data_item(
     data_id: int,
@@ -137,8 +403,11 @@ def update_finger_blood_data(
     if not person:
         raise HTTPException(status_code=400, detail="指定的人员不存在")
     
+    old_reading = _reading(db_data)
     for field, value in data.dict().items():
         setattr(db_data, field, value)
+    db.flush()
+    record_updated(db, old_reading, _reading(db_data))
     
     db.commit()
     db.refresh(db_data)
@@ -166,7 +435,10 @@ def delete_finger_blood_data(
     if not db_data:
         raise HTTPException(status_code=404, detail="数据不存在")
     
+    reading = _reading(db_data)
     db.delete(db_data)
+    db.flush()
+    record_removed(db, reading)
     db.commit()
     return MessageResponse(message="数据删除成功")
 
@@ -183,18 +455,7 @@ def export_finger_blood_data(
     try:
         # 构建查询
         query = db.query(FingerBloodFile).join(Batch).join(Person)
-        
-        if batch_id:
-            query = query.filter(FingerBloodFile.batch_id == batch_id)
-        
-        if person_id:
-            query = query.filter(FingerBloodFile.person_id == person_id)
-        
-        if start_time:
-            query = query.filter(FingerBloodFile.collection_time >= start_time)
-        
-        if end_time:
-            query = query.filter(FingerBloodFile.collection_time <= end_time)
+        query = _apply_filters(query, batch_id, person_id, start_time, end_time)
         
         data = query.order_by(FingerBloodFile.collection_time.desc()).all()
         
@@ -232,4 +493,115 @@ def export_finger_blood_data(
         )
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
+
+def _iter_export_rows(db: Session, batch_id, person_id, start_time, end_time):
+    """
+    以服务端游标分批读取导出行，只查询所需列，不构造ORM对象
+    """
+    stmt = (
+        select(
+            FingerBloodFile.finger_blood_file_id,
+            Person.person_name,
+            Batch.batch_number,
+            FingerBloodFile.collection_time,
+            FingerBloodFile.blood_glucose_value
+        )
+        .join(Person, FingerBloodFile.person_id == Person.person_id)
+        .join(Batch, FingerBloodFile.batch_id == Batch.batch_id)
+    )
+    stmt = _apply_filters(stmt, batch_id, person_id, start_time, end_time)
+    stmt = stmt.order_by(FingerBloodFile.collection_time.desc(), FingerBloodFile.finger_blood_file_id.desc())
+    
+    result = db.execute(stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    for partition in result.partitions():
+        yield [
+            (
+                row[0],
+                row[1] or "",
+                row[2] or "",
+                row[3].strftime("%Y-%m-%d %H:%M:%S") if row[3] else "",
+                float(row[4])
+            )
+            for row in partition
+        ]
+
+def _stream_csv(batch_id, person_id, start_time, end_time):
+    """逐批生成CSV字节流，内存占用与总行数无关"""
+    db = SessionLocal()
+    total = 0
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_HEADERS)
+        # UTF-8 BOM，保证Excel直接打开时中文不乱码
+        yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+        
+        for rows in _iter_export_rows(db, batch_id, person_id, start_time, end_time):
+            buffer.seek(0)
+            buffer.truncate(0)
+            writer.writerows(rows)
+            total += len(rows)
+            yield buffer.getvalue().encode("utf-8")
+        
+        log_activity(db, "导出指尖血数据", f"流式导出了{total}条指尖血数据（CSV）")
+    finally:
+        db.close()
+
+def _stream_xlsx(batch_id, person_id, start_time, end_time):
+    """
+    使用 openpyxl 只写模式逐行写入临时文件，再分块输出
+
+    xlsx 为zip容器，须写完后才能输出完整文件；只写模式下内存占用与行数无关。
+    """
+    db = SessionLocal()
+    total = 0
+    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx")
+    tmp_file.close()
+    try:
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet("指尖血数据")
+        worksheet.append(EXPORT_HEADERS)
+        for rows in _iter_export_rows(db, batch_id, person_id, start_time, end_time):
+            for row in rows:
+                worksheet.append(row)
+            total += len(rows)
+        workbook.save(tmp_file.name)
+        
+        log_activity(db, "导出指尖血数据", f"流式导出了{total}条指尖血数据（Excel）")
+        
+        with open(tmp_file.name, "rb") as f:
+            while True:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        db.close()
+        os.remove(tmp_file.name)
+
+@router.get("/export/stream")
+def stream_export_finger_blood_data(
+    format: str = Query("csv", pattern="^(csv|xlsx)$", description="导出格式：csv 或 xlsx"),
+    batch_id: Optional[int] = Query(None, description="按批次筛选"),
+    person_id: Optional[int] = Query(None, description="按人员筛选"),
+    start_time: Optional[datetime] = Query(None, description="开始时间筛选"),
+    end_time: Optional[datetime] = Query(None, description="结束时间筛选"),
+    current_user: User = Depends(check_module_permission(ModuleEnum.FINGER_BLOOD_DATA, "read"))
+):
+    """流式导出指尖血数据，边查询边输出，峰值内存不随数据量增长"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"指尖血数据导出_{timestamp}.{format}"
+    
+    if format == "csv":
+        content = _stream_csv(batch_id, person_id, start_time, end_time)
+        media_type = "text/csv"
+    else:
+        content = _stream_xlsx(batch_id, person_id, start_time, end_time)
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"}
+    )
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from database import get_db
+from database import get_db, get_async_db
 from models import Person, Batch, User
 from schemas import PersonCreate, PersonUpdate, PersonResponse, MessageResponse, BatchResponse
 from routers.auth import get_current_user, check_module_permission
+from pagination import paginate, set_next_cursor
 from models import ModuleEnum
 
 router = APIRouter(prefix="/api/persons", tags=["人员管理"])
@@ -19,20 +22,24 @@ def get_batches_for_person(
     return batches
 
 @router.get("/", response_model=List[PersonResponse])
-def get_persons(
+async def get_persons(
+    response: Response,
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
     search: Optional[str] = Query(None, description="按姓名搜索"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="分页游标（来自上一页响应头 X-Next-Cursor），提供时忽略 skip"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(check_module_permission(ModuleEnum.PERSON_MANAGEMENT, "read"))
 ):
     """获取人员列表"""
-    query = db.query(Person).options(joinedload(Person.batch))
+    query = select(Person).options(joinedload(Person.batch))
     
     if search:
         query = query.filter(Person.person_name.contains(search))
     
-    persons = query.offset(skip).limit(limit).all()
+    query = paginate(query, [(Person.person_id, False)], skip, limit, cursor)
+    persons = (await db.execute(query)).scalars().all()
+    set_next_cursor(response, persons, limit, lambda p: [p.person_id])
     
     # 构建返回结果，包含批次信息
     result = []
@@ -1,25 +1,119 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import delete, or_, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from database import get_db
-from models import Sensor, Batch, Person, User
-from schemas import SensorCreate, SensorUpdate, SensorResponse, MessageResponse
+from datetime import datetime
+import heapq
+import pyarrow as pa
+from accuracy import accuracy_cache
+from config import settings
+from database import get_db, get_async_db
+from models import Sensor, SensorReading, Batch, Person, User
+from schemas import (
+    SensorCreate, SensorUpdate, SensorResponse, MessageResponse, SensorReadingIngestResponse,
+    SensorOverlap, SensorWindow
+)
+from sensor_readings import IngestError, VALUE_COLUMNS, decompress, ingest_readings, parse_readings, query_readings
+from timeseries import ARROW_STREAM_MEDIA_TYPE, METHOD_LTTB, METHODS, arrow_stream_bytes, downsample, to_epoch_ms
 from routers.auth import get_current_user, check_module_permission
 from models import ModuleEnum
+from pagination import paginate, set_next_cursor
+from fast_json import RowSerializer
 
 router = APIRouter(prefix="/api/sensors", tags=["传感器管理"])
 
+# 读数曲线接口返回的最大点数
+READINGS_MAX_POINTS = 5000
+_list_serializer = RowSerializer(SensorResponse)
+
+def _find_overlap(db: Session, person_id: int, start_time: datetime, end_time: Optional[datetime],
+                  exclude_id: Optional[int] = None) -> Optional[Sensor]:
+    """
+    查找与 [start_time, end_time) 重叠的同一人员的传感器（end_time 为空表示仍在使用）
+
+    直接按区间相交条件查询（已有时段开始于新时段结束之前，且未结束或结束于新时段开始之后），
+    不依赖已有时段互不相交，历史遗留的重叠数据也能正确判断；走 (person_id, start_time) 索引，只取一行。
+    """
+    query = db.query(Sensor).filter(
+        Sensor.person_id == person_id,
+        or_(Sensor.end_time.is_(None), Sensor.end_time > start_time),
+    )
+    if end_time is not None:
+        query = query.filter(Sensor.start_time < end_time)
+    if exclude_id is not None:
+        query = query.filter(Sensor.sensor_id != exclude_id)
+    return query.order_by(Sensor.start_time).first()
+
+def _check_window(db: Session, sensor, exclude_id: Optional[int] = None):
+    """校验使用时段合法且不与该人员的其他传感器重叠"""
+    if sensor.end_time is not None and sensor.end_time <= sensor.start_time:
+        raise HTTPException(status_code=400, detail="结束时间必须晚于开始时间")
+    
+    conflict = _find_overlap(db, sensor.person_id, sensor.start_time, sensor.end_time, exclude_id)
+    if conflict is not None:
+        end_text = conflict.end_time.strftime("%Y-%m-%d %H:%M:%S") if conflict.end_time else "至今"
+        raise HTTPException(
+            status_code=409,
+            detail=f"该人员的传感器 {conflict.sensor_name}（{conflict.start_time:%Y-%m-%d %H:%M:%S} ~ {end_text}）与此时段重叠"
+        )
+
+def _sweep_overlaps(windows):
+    """
+    一次扫描找出所有重叠的传感器对
+
+    windows 需按 (person_id, start_time) 排序；每个人员维护以结束时间为键的最小堆，
+    开始新时段前弹出已结束的时段，堆中剩余的即与其重叠。
+    """
+    result = []
+    active, current_person = [], None
+    for window in windows:
+        if window.person_id != current_person:
+            active, current_person = [], window.person_id
+        while active and active[0][0] <= window.start_time:
+            heapq.heappop(active)
+        for _, _, other in active:
+            ends = [end for end in (other.end_time, window.end_time) if end is not None]
+            result.append((other, window, min(ends) if ends else None))
+        # 未结束的时段以 datetime.max 参与排序
+        heapq.heappush(active, (window.end_time or datetime.max, window.sensor_id, window))
+    return result
+
+def _decode_readings(body: bytes, content_encoding: Optional[str], content_type: Optional[str],
+                     sensor_id: Optional[int], limit: int):
+    """解压并解析请求体（CPU 密集，在线程池中执行）"""
+    return parse_readings(decompress(body, content_encoding, limit), content_type, sensor_id)
+
 @router.get("/", response_model=List[SensorResponse])
-def get_sensors(
+async def get_sensors(
+    response: Response,
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
     batch_id: Optional[int] = Query(None, description="按批次筛选"),
     person_id: Optional[int] = Query(None, description="按人员筛选"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="分页游标（来自上一页响应头 X-Next-Cursor），提供时忽略 skip"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(check_module_permission(ModuleEnum.SENSOR_DATA, "read"))
 ):
     """获取传感器列表"""
-    query = db.query(Sensor).join(Batch).join(Person)
+    # 只查询响应所需的列，结果为 Row 元组，直接序列化（见 fast_json.py）
+    query = (
+        select(
+            Sensor.sensor_name,
+            Sensor.person_id,
+            Sensor.batch_id,
+            Sensor.start_time,
+            Sensor.end_time,
+            Sensor.end_reason,
+            Sensor.sensor_id,
+            Person.person_name,
+            Batch.batch_number,
+        )
+        .join(Person, Person.person_id == Sensor.person_id)
+        .join(Batch, Batch.batch_id == Sensor.batch_id)
+    )
     
     if batch_id:
         query = query.filter(Sensor.batch_id == batch_id)
@@ -27,25 +121,10 @@ def get_sensors(
     if person_id:
         query = query.filter(Sensor.person_id == person_id)
     
-    sensors = query.offset(skip).limit(limit).all()
-    
-    # 添加关联信息
-    result = []
-    for sensor in sensors:
-        sensor_dict = {
-            "sensor_id": sensor.sensor_id,
-            "sensor_name": sensor.sensor_name,
-            "person_id": sensor.person_id,
-            "batch_id": sensor.batch_id,
-            "start_time": sensor.start_time,
-            "end_time": sensor.end_time,
-            "end_reason": sensor.end_reason,
-            "person_name": sensor.person.person_name if sensor.person else None,
-            "batch_number": sensor.batch.batch_number if sensor.batch else None
-        }
-        result.append(SensorResponse(**sensor_dict))
-    
-    return result
+    query = paginate(query, [(Sensor.sensor_id, False)], skip, limit, cursor)
+    rows = (await db.execute(query)).all()
+    set_next_cursor(response, rows, limit, lambda r: [r.sensor_id])
+    return _list_serializer.response(rows, response)
 
 @router.post("/", response_model=SensorResponse)
 def create_sensor(
@@ -59,10 +138,13 @@ def create_sensor(
     if not batch:
         raise HTTPException(status_code=400, detail="指定的批次不存在")
     
-    person = db.query(Person).filter(Person.person_id == sensor.person_id).first()
+    # 锁定人员行，使同一人员的重叠校验与写入串行执行
+    person = db.query(Person).filter(Person.person_id == sensor.person_id).with_for_update().first()
     if not person:
         raise HTTPException(status_code=400, detail="指定的人员不存在")
     
+    _check_window(db, sensor)
+    
     db_sensor = Sensor(**sensor.dict())
     db.add(db_sensor)
     db.commit()
@@ -82,6 +164,105 @@ def create_sensor(
     
     return result
 
+@router.post("/readings", response_model=SensorReadingIngestResponse)
+async def ingest_sensor_readings(
+    request: Request,
+    sensor_id: Optional[int] = Query(None, description="数据中没有 sensor_id 列时使用的传感器ID"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.SENSOR_DATA, "write"))
+):
+    """
+    批量写入传感器读数
+
+    请求体为 CSV（text/csv，可 gzip 压缩）或 Arrow IPC 流（application/vnd.apache.arrow.stream），
+    列为 sensor_id、reading_time 及 current / glucose_value / temperature 中的至少一列。
+    相同传感器、相同时间的读数只保留首次写入。
+    """
+    limit = settings.sensor_ingest_max_bytes
+    if int(request.headers.get("content-length") or 0) > limit:
+        raise HTTPException(status_code=413, detail=f"请求体超过 {limit} 字节")
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail=f"请求体超过 {limit} 字节")
+
+    try:
+        df = await run_in_threadpool(
+            _decode_readings, bytes(body), request.headers.get("content-encoding"),
+            request.headers.get("content-type"), sensor_id, limit
+        )
+    except IngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = await run_in_threadpool(ingest_readings, db, df, settings.sensor_ingest_chunk_size)
+    accuracy_cache.invalidate_pairs((batch_id, person_id) for _, batch_id, person_id in result.pop("sensors"))
+    return SensorReadingIngestResponse(**result)
+
+@router.get("/{sensor_id}/readings")
+def get_sensor_readings(
+    sensor_id: int,
+    field: str = Query("glucose_value", description="读数列：glucose_value / current / temperature"),
+    start_time: Optional[datetime] = Query(None, description="开始时间筛选"),
+    end_time: Optional[datetime] = Query(None, description="结束时间筛选"),
+    max_points: int = Query(1000, ge=3, le=READINGS_MAX_POINTS, description="返回的最大点数"),
+    method: str = Query(METHOD_LTTB, description="降采样方法：lttb / minmax"),
+    format: str = Query("json", description="返回格式：json（列式数组）/ arrow（Arrow IPC 流）"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.SENSOR_DATA, "read"))
+):
+    """获取传感器读数曲线（按时间范围读取并降采样），t 为毫秒时间戳"""
+    if field not in VALUE_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"不支持的读数列: {field}")
+    if method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"不支持的降采样方法: {method}")
+    if format not in ("json", "arrow"):
+        raise HTTPException(status_code=400, detail=f"不支持的返回格式: {format}")
+    if db.get(Sensor, sensor_id) is None:
+        raise HTTPException(status_code=404, detail="传感器不存在")
+
+    times, values = query_readings(db, sensor_id, field, start_time, end_time)
+    t, v = downsample(to_epoch_ms(times), values, max_points, method)
+
+    if format == "arrow":
+        table = pa.table({"t": pa.array(t, pa.timestamp("ms", tz="UTC")), "v": pa.array(v, pa.float64())})
+        return Response(content=arrow_stream_bytes(table), media_type=ARROW_STREAM_MEDIA_TYPE)
+    return JSONResponse({
+        "sensor_id": sensor_id,
+        "field": field,
+        "method": method,
+        "total_points": len(times),
+        "t": t.tolist(),
+        "v": v.tolist(),
+    })
+
+@router.get("/overlaps", response_model=List[SensorOverlap])
+def get_sensor_overlaps(
+    batch_id: Optional[int] = Query(None, description="按批次筛选"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_module_permission(ModuleEnum.SENSOR_DATA, "read"))
+):
+    """查找同一人员使用时段重叠的传感器（单次按人员、开始时间排序扫描）"""
+    query = select(
+        Sensor.sensor_id, Sensor.sensor_name, Sensor.person_id, Sensor.batch_id,
+        Sensor.start_time, Sensor.end_time, Person.person_name
+    ).join(Person, Person.person_id == Sensor.person_id)
+    if batch_id:
+        query = query.where(Sensor.batch_id == batch_id)
+    windows = db.execute(query.order_by(Sensor.person_id, Sensor.start_time, Sensor.sensor_id)).all()
+    
+    result = []
+    for first, second, overlap_end in _sweep_overlaps(windows):
+        result.append(SensorOverlap(
+            person_id=first.person_id,
+            person_name=first.person_name,
+            first=SensorWindow(**{field: getattr(first, field) for field in SensorWindow.model_fields}),
+            second=SensorWindow(**{field: getattr(second, field) for field in SensorWindow.model_fields}),
+            overlap_start=second.start_time,
+            overlap_end=overlap_end
+        ))
+    return result
+
 @router.get("/{sensor_id}", response_model=SensorResponse)
 def get_sensor(
     sensor_id: int,
@@ -124,10 +305,12 @@ def update_sensor(
     if not batch:
         raise HTTPException(status_code=400, detail="指定的批次不存在")
     
-    person = db.query(Person).filter(Person.person_id == sensor.person_id).first()
+    person = db.query(Person).filter(Person.person_id == sensor.person_id).with_for_update().first()
     if not person:
         raise HTTPException(status_code=400, detail="指定的人员不存在")
     
+    _check_window(db, sensor, exclude_id=sensor_id)
+    
     for field, value in sensor.dict().items():
         setattr(db_sensor, field, value)
     
@@ -159,6 +342,7 @@ def delete_sensor(
     if not db_sensor:
         raise HTTPException(status_code=404, detail="传感器不存在")
     
+    db.execute(delete(SensorReading).where(SensorReading.sensor_id == sensor_id))
     db.delete(db_sensor)
     db.commit()
     return MessageResponse(message="传感器记录删除成功")
\ No newline at end of file
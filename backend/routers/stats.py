@@ -0,0 +1,161 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from threading import Lock
+import time
+
+from database import get_db, SessionLocal
+from models import Batch, Person, Experiment, ExperimentMember, CompetitorFile, FingerBloodFile, Sensor, User
+from schemas import StatsResponse
+from routers.auth import get_current_user
+
+router = APIRouter(prefix="/api/stats", tags=["统计信息"])
+
+# 统计结果缓存：写操作提交后失效，TTL 作为兜底（防止其他进程写入后长期不刷新）
+STATS_CACHE_TTL_SECONDS = 60
+# entries 以是否包含分组明细为键，值为 (结果, 过期时间)
+_stats_cache = {"entries": {}, "generation": 0}
+_stats_cache_lock = Lock()
+
+# 影响统计结果的模型，会话中这些对象发生增删改时使缓存失效
+_TRACKED_MODELS = (Batch, Person, Experiment, ExperimentMember, CompetitorFile, FingerBloodFile, Sensor)
+
+def invalidate_stats_cache():
+    """使统计缓存失效"""
+    with _stats_cache_lock:
+        _stats_cache["entries"].clear()
+        _stats_cache["generation"] += 1
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_stats_dirty(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _TRACKED_MODELS):
+            session.info["stats_dirty"] = True
+            return
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("stats_dirty", False):
+        invalidate_stats_cache()
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop("stats_dirty", None)
+
+def _count_by(column):
+    """按外键分组计数的子查询"""
+    return (
+        select(column.label("key"), func.count().label("cnt"))
+        .group_by(column)
+        .subquery()
+    )
+
+def _compute_totals(db: Session) -> dict:
+    """各模块记录总数（单条查询）"""
+    row = db.execute(select(
+        select(func.count()).select_from(Batch).scalar_subquery().label("batches"),
+        select(func.count()).select_from(Person).scalar_subquery().label("persons"),
+        select(func.count()).select_from(Experiment).scalar_subquery().label("experiments"),
+        select(func.count()).select_from(FingerBloodFile).scalar_subquery().label("finger_blood_data"),
+        select(func.count()).select_from(Sensor).scalar_subquery().label("sensors"),
+        select(func.count()).select_from(CompetitorFile).scalar_subquery().label("competitor_files"),
+    )).one()
+    return dict(row._mapping)
+
+def _compute_breakdowns(db: Session) -> dict:
+    """使用 COUNT / GROUP BY 计算按批次、按人员分组的计数（两条查询，行数与批次数、人员数成正比）"""
+    # 按批次统计
+    batch_persons = _count_by(Person.batch_id)
+    batch_experiments = _count_by(Experiment.batch_id)
+    batch_blood = _count_by(FingerBloodFile.batch_id)
+    batch_sensors = _count_by(Sensor.batch_id)
+    batch_files = _count_by(CompetitorFile.batch_id)
+    batch_rows = db.execute(
+        select(
+            Batch.batch_id,
+            Batch.batch_number,
+            func.coalesce(batch_persons.c.cnt, 0),
+            func.coalesce(batch_experiments.c.cnt, 0),
+            func.coalesce(batch_blood.c.cnt, 0),
+            func.coalesce(batch_sensors.c.cnt, 0),
+            func.coalesce(batch_files.c.cnt, 0),
+        )
+        .outerjoin(batch_persons, batch_persons.c.key == Batch.batch_id)
+        .outerjoin(batch_experiments, batch_experiments.c.key == Batch.batch_id)
+        .outerjoin(batch_blood, batch_blood.c.key == Batch.batch_id)
+        .outerjoin(batch_sensors, batch_sensors.c.key == Batch.batch_id)
+        .outerjoin(batch_files, batch_files.c.key == Batch.batch_id)
+        .order_by(Batch.batch_id)
+    ).all()
+
+    # 按人员统计
+    person_experiments = _count_by(ExperimentMember.person_id)
+    person_blood = _count_by(FingerBloodFile.person_id)
+    person_sensors = _count_by(Sensor.person_id)
+    person_files = _count_by(CompetitorFile.person_id)
+    person_rows = db.execute(
+        select(
+            Person.person_id,
+            Person.person_name,
+            Person.batch_id,
+            func.coalesce(person_experiments.c.cnt, 0),
+            func.coalesce(person_blood.c.cnt, 0),
+            func.coalesce(person_sensors.c.cnt, 0),
+            func.coalesce(person_files.c.cnt, 0),
+        )
+        .outerjoin(person_experiments, person_experiments.c.key == Person.person_id)
+        .outerjoin(person_blood, person_blood.c.key == Person.person_id)
+        .outerjoin(person_sensors, person_sensors.c.key == Person.person_id)
+        .outerjoin(person_files, person_files.c.key == Person.person_id)
+        .order_by(Person.person_id)
+    ).all()
+
+    return {
+        "by_batch": [
+            {
+                "batch_id": row[0],
+                "batch_number": row[1],
+                "persons": row[2],
+                "experiments": row[3],
+                "finger_blood_data": row[4],
+                "sensors": row[5],
+                "competitor_files": row[6],
+            }
+            for row in batch_rows
+        ],
+        "by_person": [
+            {
+                "person_id": row[0],
+                "person_name": row[1],
+                "batch_id": row[2],
+                "experiments": row[3],
+                "finger_blood_data": row[4],
+                "sensors": row[5],
+                "competitor_files": row[6],
+            }
+            for row in person_rows
+        ],
+    }
+
+@router.get("", response_model=StatsResponse)
+def get_stats(
+    details: bool = Query(False, description="是否返回按批次、按人员分组的计数（数据量随批次数和人员数增长）"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """获取各模块汇总统计；默认只返回总数，details=true 时附带按批次、按人员分组的计数"""
+    now = time.monotonic()
+    with _stats_cache_lock:
+        cached = _stats_cache["entries"].get(details)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        generation = _stats_cache["generation"]
+
+    data = {"totals": _compute_totals(db)}
+    if details:
+        data.update(_compute_breakdowns(db))
+    with _stats_cache_lock:
+        # 计算期间缓存已失效则不回填，避免缓存旧数据
+        if _stats_cache["generation"] == generation:
+            _stats_cache["entries"][details] = (data, now + STATS_CACHE_TTL_SECONDS)
+    return data
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -115,6 +115,25 @@ class CompetitorFileResponse(BaseModelWithConfig):
     batch_number: Optional[str] = None
     file_size: Optional[int] = None  # 文件大小（字节）
     filename: Optional[str] = None  # 从文件路径提取的文件名
+    sha256: Optional[str] = None  # 内容SHA-256
+    mime_type: Optional[str] = None
+    file_mtime: Optional[datetime] = None  # 存储文件的修改时间
+    storage_status: Optional[str] = None  # 存储校验状态：ok / missing / drifted
+
+class ChunkedUploadCreate(BaseModel):
+    batch_id: int
+    person_id: int
+    filename: str
+    total_size: int = Field(..., ge=0, description="文件总字节数")
+
+class ChunkedUploadComplete(BaseModel):
+    sha256: Optional[str] = None  # 客户端计算的哈希，提供时与服务端结果比对
+
+class ChunkedUploadStatus(BaseModel):
+    upload_id: str
+    filename: str
+    total_size: int
+    offset: int  # 已接收的字节数，续传时从该偏移量继续
 
 # 指尖血数据相关模式
 class FingerBloodDataBase(BaseModelWithConfig):
@@ -134,6 +153,31 @@ class FingerBloodDataResponse(FingerBloodDataBase):
     person_name: Optional[str] = None
     batch_number: Optional[str] = None
 
+class BulkImportError(BaseModel):
+    row: int  # 数据行号（从1开始，不含表头）
+    error: str
+
+class BulkImportResponse(BaseModel):
+    total: int
+    inserted: int
+    failed: int
+    errors: List[BulkImportError] = []
+    elapsed_seconds: float
+    rows_per_second: float
+
+class GlucoseSummaryResponse(BaseModelWithConfig):
+    batch_id: int
+    batch_number: Optional[str] = None
+    person_id: int
+    person_name: Optional[str] = None
+    count: int
+    mean: Optional[float] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    std: Optional[float] = None
+    first_time: Optional[datetime] = None
+    last_time: Optional[datetime] = None
+
 # 传感器相关模式
 class SensorBase(BaseModelWithConfig):
     sensor_name: str
@@ -154,6 +198,129 @@ class SensorResponse(SensorBase):
     person_name: Optional[str] = None
     batch_number: Optional[str] = None
 
+class SensorWindow(BaseModelWithConfig):
+    sensor_id: int
+    sensor_name: str
+    batch_id: int
+    start_time: datetime
+    end_time: Optional[datetime] = None
+
+class SensorOverlap(BaseModelWithConfig):
+    person_id: int
+    person_name: Optional[str] = None
+    first: SensorWindow
+    second: SensorWindow
+    overlap_start: datetime
+    overlap_end: Optional[datetime] = None  # 为空表示两个传感器均未结束
+
+# 批次建档（批次及其人员、传感器、实验一次提交）相关模式
+class OnboardPerson(BaseModel):
+    temp_id: str  # 客户端临时ID，供文档内的传感器与实验引用
+    person_name: str
+    gender: Optional[GenderEnum] = None
+    age: Optional[int] = None
+
+class OnboardSensor(BaseModelWithConfig):
+    person_ref: str  # 引用 persons 中的 temp_id
+    sensor_name: str
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    end_reason: Optional[str] = None
+
+class OnboardExperiment(BaseModel):
+    experiment_content: Optional[str] = None
+    member_refs: List[str] = []  # 引用 persons 中的 temp_id
+
+class BatchOnboardRequest(BaseModel):
+    batch: BatchCreate
+    persons: List[OnboardPerson] = []
+    sensors: List[OnboardSensor] = []
+    experiments: List[OnboardExperiment] = []
+
+class BatchOnboardResponse(BaseModelWithConfig):
+    batch: BatchResponse
+    person_ids: Dict[str, int]  # 临时ID -> 人员ID
+    sensor_ids: List[int]  # 与请求中 sensors 的顺序一致
+    experiment_ids: List[int]  # 与请求中 experiments 的顺序一致
+    elapsed_seconds: float
+
+# 统计相关模式
+class StatsTotals(BaseModel):
+    batches: int = 0
+    persons: int = 0
+    experiments: int = 0
+    finger_blood_data: int = 0
+    sensors: int = 0
+    competitor_files: int = 0
+
+class BatchStats(BaseModel):
+    batch_id: int
+    batch_number: str
+    persons: int = 0
+    experiments: int = 0
+    finger_blood_data: int = 0
+    sensors: int = 0
+    competitor_files: int = 0
+
+class PersonStats(BaseModel):
+    person_id: int
+    person_name: str
+    batch_id: Optional[int] = None
+    experiments: int = 0
+    finger_blood_data: int = 0
+    sensors: int = 0
+    competitor_files: int = 0
+
+class StatsResponse(BaseModel):
+    totals: StatsTotals
+    # 仅在 details=true 时返回
+    by_batch: Optional[List[BatchStats]] = None
+    by_person: Optional[List[PersonStats]] = None
+
+class SensorReadingIngestResponse(BaseModel):
+    total: int
+    inserted: int
+    duplicates: int  # 已存在（相同传感器、相同时间）而被忽略的行数
+    rejected: int
+    errors: List[str] = []
+    elapsed_seconds: float
+    rows_per_second: float
+
+# 准确性分析相关模式
+class ZoneCounts(BaseModel):
+    A: int = 0
+    B: int = 0
+    C: int = 0
+    D: int = 0
+    E: int = 0
+
+class AccuracyMetrics(BaseModel):
+    references: int = 0
+    pairs: int = 0
+    mard: Optional[float] = None
+    bias: Optional[float] = None
+    clarke: ZoneCounts = ZoneCounts()
+    parkes: ZoneCounts = ZoneCounts()
+
+class SensorAccuracy(AccuracyMetrics):
+    sensor_id: int
+    sensor_name: Optional[str] = None
+    person_id: int
+    person_name: Optional[str] = None
+
+class PersonAccuracy(AccuracyMetrics):
+    person_id: int
+    person_name: Optional[str] = None
+
+class AccuracyReport(BaseModel):
+    batch_id: int
+    batch_number: Optional[str] = None
+    total_references: int = 0
+    unmatched_references: int = 0
+    overall: AccuracyMetrics
+    by_sensor: List[SensorAccuracy] = []
+    by_person: List[PersonAccuracy] = []
+
 # 通用响应模式
 class MessageResponse(BaseModel):
     message: str
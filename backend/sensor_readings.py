@@ -0,0 +1,199 @@
+"""传感器读数写入与查询
+
+读数存储在窄表 sensor_readings 中，主键 (sensor_id, reading_time) 同时是 InnoDB 的聚簇索引：
+同一传感器的读数按时间顺序连续存放，按传感器和时间范围查询只需一次索引范围扫描。
+
+批量写入接受两种请求体：
+- CSV（text/csv），可使用 gzip 压缩（Content-Encoding: gzip 或 .gz 内容）
+- Arrow IPC 流（application/vnd.apache.arrow.stream）
+
+列名为 sensor_id / reading_time / current / glucose_value / temperature（也支持中文列名）。
+解析由 pyarrow 完成，合法行按块使用 INSERT IGNORE 批量插入：相同传感器、相同时间的读数只保留首次写入，
+重传的数据不会重复入库。
+"""
+
+import time
+import zlib
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from sqlalchemy import insert, select
+
+from models import Sensor, SensorReading
+from timeseries import ARROW_STREAM_MEDIA_TYPE, LOCAL_TIMEZONE
+
+READING_COLUMN_ALIASES = {
+    "传感器ID": "sensor_id",
+    "时间": "reading_time",
+    "读数时间": "reading_time",
+    "电流": "current",
+    "血糖": "glucose_value",
+    "血糖值": "glucose_value",
+    "温度": "temperature",
+}
+VALUE_COLUMNS = ("current", "glucose_value", "temperature")
+TIMESTAMP_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", pa_csv.ISO8601]
+# glucose_value 为 DECIMAL(5, 2)；超出范围的值在 MySQL 的 INSERT IGNORE 下会被静默截断为边界值
+GLUCOSE_VALUE_MAX = 999.99
+# 错误信息最多返回的条数
+MAX_ERRORS = 20
+
+
+class IngestError(Exception):
+    """请求体无法解析"""
+
+
+def decompress(body: bytes, content_encoding: Optional[str], limit: int) -> bytes:
+    """
+    按 Content-Encoding 或 gzip 文件头解压，解压后超过 limit 字节时报错
+
+    支持多个 gzip 成员首尾相接（分段压缩后拼接的文件）；数据流被截断时报错，避免只写入部分数据。
+    """
+    if (content_encoding or "").lower() != "gzip" and body[:2] != b"\x1f\x8b":
+        return body
+    chunks = []
+    size = 0
+    remaining = body
+    try:
+        while remaining:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            chunk = decompressor.decompress(remaining, limit + 1 - size)
+            size += len(chunk)
+            if size > limit:
+                raise IngestError(f"解压后数据超过 {limit} 字节")
+            if not decompressor.eof:
+                raise IngestError("gzip 数据不完整")
+            chunks.append(chunk)
+            remaining = decompressor.unused_data
+    except zlib.error as e:
+        raise IngestError(f"gzip 解压失败: {e}")
+    return b"".join(chunks)
+
+
+def parse_readings(data: bytes, content_type: Optional[str], default_sensor_id: Optional[int] = None) -> pd.DataFrame:
+    """解析请求体，返回 sensor_id / reading_time 及数值列的 DataFrame"""
+    try:
+        if (content_type or "").split(";")[0].strip() == ARROW_STREAM_MEDIA_TYPE:
+            table = pa.ipc.open_stream(data).read_all()
+        else:
+            table = pa_csv.read_csv(
+                pa.BufferReader(data),
+                convert_options=pa_csv.ConvertOptions(timestamp_parsers=TIMESTAMP_FORMATS),
+            )
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise IngestError(f"数据解析失败: {e}")
+
+    table = table.rename_columns([READING_COLUMN_ALIASES.get(name.strip(), name.strip()) for name in table.column_names])
+    if "reading_time" not in table.column_names:
+        raise IngestError("缺少必要的列: reading_time")
+    if "sensor_id" not in table.column_names and default_sensor_id is None:
+        raise IngestError("缺少必要的列: sensor_id")
+    if not any(column in table.column_names for column in VALUE_COLUMNS):
+        raise IngestError(f"至少需要一列读数: {', '.join(VALUE_COLUMNS)}")
+
+    df = pd.DataFrame(index=range(table.num_rows))
+    if "sensor_id" in table.column_names:
+        df["sensor_id"] = pd.to_numeric(table.column("sensor_id").to_pandas(), errors="coerce")
+    else:
+        df["sensor_id"] = default_sensor_id
+    times = table.column("reading_time").to_pandas()
+    if isinstance(times.dtype, pd.DatetimeTZDtype):
+        # 带时区的时间戳转换为服务器本地时间，与其他采集时间保持一致
+        times = times.dt.tz_convert(LOCAL_TIMEZONE).dt.tz_localize(None)
+    df["reading_time"] = pd.to_datetime(times, errors="coerce").dt.floor("s")
+    for column in VALUE_COLUMNS:
+        if column in table.column_names:
+            df[column] = pd.to_numeric(table.column(column).to_pandas(), errors="coerce").astype(np.float64)
+        else:
+            df[column] = np.nan
+    return df
+
+
+def ingest_readings(db, df: pd.DataFrame, chunk_size: int) -> dict:
+    """
+    校验并写入读数，返回写入统计
+
+    传感器ID通过一次 IN 查询集中校验，超出列范围的读数计为拒绝（不依赖数据库截断）；每块单独提交。
+    返回结果中的 sensors 为本次有新读数写入的 (sensor_id, batch_id, person_id)。
+    """
+    started = time.perf_counter()
+    total = len(df)
+    errors = []
+
+    invalid = df["sensor_id"].isna() | df["reading_time"].isna()
+    if invalid.any():
+        errors.append(f"{int(invalid.sum())} 行缺少传感器ID或时间")
+    empty = ~invalid & df[list(VALUE_COLUMNS)].isna().all(axis=1)
+    if empty.any():
+        errors.append(f"{int(empty.sum())} 行没有读数")
+    values = df[list(VALUE_COLUMNS)]
+    out_of_range = ~invalid & ~empty & (
+        np.isinf(values).any(axis=1) | (values["glucose_value"].round(2).abs() > GLUCOSE_VALUE_MAX)
+    )
+    if out_of_range.any():
+        errors.append(f"{int(out_of_range.sum())} 行读数超出范围（血糖值绝对值不超过 {GLUCOSE_VALUE_MAX}，读数不能为无穷大）")
+    df = df[~invalid & ~empty & ~out_of_range].astype({"sensor_id": np.int64})
+
+    sensor_ids = df["sensor_id"].unique().tolist()
+    sensors = {}
+    if sensor_ids:
+        sensors = {
+            row.sensor_id: (row.batch_id, row.person_id)
+            for row in db.execute(
+                select(Sensor.sensor_id, Sensor.batch_id, Sensor.person_id).where(Sensor.sensor_id.in_(sensor_ids))
+            )
+        }
+    unknown = ~df["sensor_id"].isin(list(sensors))
+    if unknown.any():
+        for sensor_id, count in df.loc[unknown, "sensor_id"].value_counts().sort_index().items():
+            errors.append(f"传感器ID {sensor_id} 不存在（{count} 行）")
+    df = df[~unknown]
+    accepted = len(df)
+    df = df.drop_duplicates(["sensor_id", "reading_time"], keep="first").sort_values(["sensor_id", "reading_time"])
+
+    # 已存在的 (sensor_id, reading_time) 忽略，重传数据不会报错
+    statement = (
+        insert(SensorReading.__table__)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+    rows = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    inserted = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        inserted += db.execute(statement, chunk).rowcount
+        db.commit()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "total": total,
+        "inserted": inserted,
+        "duplicates": accepted - inserted,
+        "rejected": total - accepted,
+        "errors": errors[:MAX_ERRORS],
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(inserted / elapsed, 1) if elapsed > 0 else float(inserted),
+        "sensors": [(sensor_id, *sensors[sensor_id]) for sensor_id in df["sensor_id"].unique().tolist()] if inserted else [],
+    }
+
+
+def query_readings(db, sensor_id: int, field: str, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None):
+    """按时间范围读取单个传感器的一列读数，返回 (读数时间, 值) 两个按时间排序的数组"""
+    column = getattr(SensorReading, field)
+    query = (
+        select(SensorReading.reading_time, column)
+        .where(SensorReading.sensor_id == sensor_id, column.is_not(None))
+        .order_by(SensorReading.reading_time)
+    )
+    if start_time:
+        query = query.where(SensorReading.reading_time >= start_time)
+    if end_time:
+        query = query.where(SensorReading.reading_time <= end_time)
+    rows = db.execute(query).all()
+    times = np.array([row[0] for row in rows], dtype="datetime64[ms]")
+    values = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+    return times, values
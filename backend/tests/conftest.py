@@ -0,0 +1,36 @@
+"""测试配置：使用临时 SQLite 数据库，需在导入应用模块之前设置"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+_db_dir = tempfile.mkdtemp(prefix="experiment-ms-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import database
+    from main import app
+    from migrations import upgrade
+    from models import RoleEnum, User
+    from routers.auth import get_current_user
+
+    upgrade(database.engine)
+    db = database.SessionLocal()
+    admin = User(username="admin", password_hash="-", role=RoleEnum.Admin)
+    db.add(admin)
+    db.commit()
+    db.refresh(admin)
+    db.expunge(admin)
+    db.close()
+    # 跳过令牌校验与权限查询，只测试接口本身
+    app.dependency_overrides[get_current_user] = lambda: admin
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user, None)
@@ -0,0 +1,60 @@
+"""活动日志写入器重试测试
+
+写入失败时队列保持满载，后台线程应按退避间隔重试，而不是不停地立即重试。
+"""
+
+import time
+
+from activity_writer import ActivityLogWriter
+
+FLUSH_INTERVAL = 0.05
+BATCH_SIZE = 10
+
+
+def make_writer(fail: bool) -> ActivityLogWriter:
+    writer = ActivityLogWriter(flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE, max_queue_size=BATCH_SIZE)
+    writer.written_rows = []
+
+    def write(rows):
+        if writer.fail:
+            raise RuntimeError("数据库不可用")
+        writer.written_rows.extend(rows)
+
+    writer.fail = fail
+    writer._write = write
+    return writer
+
+
+def test_failed_flush_backs_off():
+    writer = make_writer(fail=True)
+    for i in range(BATCH_SIZE):
+        assert writer.enqueue("测试", f"记录{i}")
+    writer.start()
+    try:
+        time.sleep(1.0)
+        failures = writer.flush_failures
+    finally:
+        writer.fail = False
+        writer.stop()
+    # 退避间隔 0.05、0.1、0.2、0.4 秒：1 秒内约 4-5 次失败；忙等重试会是成千上万次
+    assert 2 <= failures <= 8
+    assert len(writer.written_rows) == BATCH_SIZE
+    assert writer.dropped == 0
+
+
+def test_backoff_resets_after_success():
+    writer = make_writer(fail=True)
+    writer.enqueue("测试", "记录")
+    writer.start()
+    try:
+        time.sleep(0.3)
+        writer.fail = False
+        time.sleep(0.5)
+        assert writer.stats()["pending"] == 0
+        # 恢复后按正常间隔刷写新记录
+        writer.enqueue("测试", "恢复后")
+        time.sleep(FLUSH_INTERVAL * 4)
+        assert writer.stats()["pending"] == 0
+    finally:
+        writer.stop()
+    assert [row["description"] for row in writer.written_rows] == ["记录", "恢复后"]
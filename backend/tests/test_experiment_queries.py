@@ -0,0 +1,91 @@
+"""实验接口 SQL 语句数回归测试
+
+列表、详情、创建和更新接口的查询条数应为固定值，与每页实验数和成员数无关（防止 N+1 查询回归）。
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+import database
+from models import Batch, Experiment, ExperimentMember, Person
+
+MEMBERS_PER_EXPERIMENT = 5
+
+
+@contextmanager
+def count_statements():
+    """统计同步与异步引擎上执行的 SQL 语句"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engines = (database.engine, database.async_engine.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+
+def seed_batch(batch_number: str, experiments: int) -> dict:
+    """创建一个批次及其人员与实验，每个实验 MEMBERS_PER_EXPERIMENT 名成员"""
+    db = database.SessionLocal()
+    try:
+        batch = Batch(batch_number=batch_number, start_time=datetime(2026, 1, 1))
+        persons = [Person(person_name=f"{batch_number}-人员{i}", batch=batch) for i in range(experiments + MEMBERS_PER_EXPERIMENT)]
+        db.add_all(persons)
+        for i in range(experiments):
+            db.add(Experiment(
+                batch=batch,
+                experiment_content=f"{batch_number}-实验{i}",
+                members=[ExperimentMember(person=person) for person in persons[i:i + MEMBERS_PER_EXPERIMENT]],
+            ))
+        db.commit()
+        return {
+            "batch_id": batch.batch_id,
+            "person_ids": [person.person_id for person in persons],
+            "experiment_id": db.query(Experiment.experiment_id).filter(Experiment.batch_id == batch.batch_id).first()[0],
+        }
+    finally:
+        db.close()
+
+
+def run(client, method: str, url: str, **kwargs):
+    with count_statements() as statements:
+        response = client.request(method, url, **kwargs)
+    assert response.status_code == 200, response.text
+    return response, len(statements)
+
+
+@pytest.mark.parametrize("method,url,body,expected", [
+    ("GET", "/api/experiments/?batch_id={batch_id}&limit=1000", None, 2),
+    ("GET", "/api/experiments/{experiment_id}", None, 2),
+    ("POST", "/api/experiments/", "create", 7),
+    ("PUT", "/api/experiments/{experiment_id}", "update", 9),
+])
+def test_statement_count_independent_of_page_size(client, method, url, body, expected):
+    counts = []
+    for size in (3, 30):
+        seeded = seed_batch(f"{method}{url}-{size}", size)
+        members = seeded["person_ids"][:size]
+        payload = None
+        if body == "create":
+            payload = {"batch_id": seeded["batch_id"], "experiment_content": "新实验", "member_ids": members}
+        elif body == "update":
+            payload = {"batch_id": seeded["batch_id"], "experiment_content": "已更新", "member_ids": members}
+        response, count = run(client, method, url.format(**seeded), json=payload)
+        data = response.json()
+        if isinstance(data, list):
+            assert len(data) == size
+            assert all(len(item["members"]) == MEMBERS_PER_EXPERIMENT for item in data)
+            assert all(member["person_name"] for item in data for member in item["members"])
+        elif payload is not None:
+            assert sorted(member["person_id"] for member in data["members"]) == sorted(members)
+        counts.append(count)
+    assert counts == [expected, expected]
@@ -0,0 +1,61 @@
+"""指尖血批量导入测试
+
+某一块写入失败时只回滚该块，其各行按行号报告为失败；已提交的块保留，缓存照常失效。
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+import database
+from models import Batch, FingerBloodFile, Person
+from routers import finger_blood_data
+
+CHUNK_SIZE = 3
+
+
+def test_failed_chunk_is_reported_and_committed_chunks_invalidate_caches(client, monkeypatch):
+    db = database.SessionLocal()
+    person = Person(person_name="批量导入", batch=Batch(batch_number="BULK-IMPORT", start_time=datetime(2026, 1, 1)))
+    db.add(person)
+    db.commit()
+    batch_id, person_id = person.batch_id, person.person_id
+    db.close()
+
+    calls = {"record_added": 0}
+    record_added = finger_blood_data.record_added
+
+    def failing_record_added(db, readings):
+        calls["record_added"] += 1
+        if calls["record_added"] == 2:
+            raise OperationalError("INSERT", {}, Exception("连接中断"))
+        return record_added(db, readings)
+
+    invalidated = []
+    monkeypatch.setattr(finger_blood_data, "IMPORT_CHUNK_SIZE", CHUNK_SIZE)
+    monkeypatch.setattr(finger_blood_data, "record_added", failing_record_added)
+    monkeypatch.setattr(finger_blood_data.accuracy_cache, "invalidate_pairs", lambda keys: invalidated.append(set(keys)))
+
+    start = datetime(2026, 1, 2)
+    records = [
+        {
+            "batch_id": batch_id, "person_id": person_id,
+            "collection_time": f"{start + timedelta(minutes=i):%Y-%m-%d %H:%M:%S}", "blood_glucose_value": 5.5,
+        }
+        for i in range(CHUNK_SIZE * 3)
+    ]
+    response = client.post("/api/fingerBloodData/bulk", json=records)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["inserted"] == CHUNK_SIZE * 2
+    assert result["failed"] == CHUNK_SIZE
+    assert [err["row"] for err in result["errors"]] == [4, 5, 6]
+
+    db = database.SessionLocal()
+    try:
+        count = db.scalar(select(func.count()).select_from(FingerBloodFile).where(FingerBloodFile.person_id == person_id))
+    finally:
+        db.close()
+    assert count == CHUNK_SIZE * 2
+    assert invalidated == [{(batch_id, person_id)}]
@@ -0,0 +1,37 @@
+"""迁移测试
+
+迁移脚本使用各自冻结的表定义，在空数据库上依次执行后的表、列和索引应与当前模型一致。
+"""
+
+from sqlalchemy import create_engine, inspect
+
+from migrations import VERSION_TABLE, head_revision, upgrade
+from models import Base
+
+
+def schema(inspector, table_names):
+    return {
+        name: (
+            sorted(col["name"] for col in inspector.get_columns(name)),
+            sorted((ix["name"], tuple(ix["column_names"]), bool(ix["unique"])) for ix in inspector.get_indexes(name)),
+        )
+        for name in table_names
+    }
+
+
+def test_upgrade_from_empty_database_matches_models(tmp_path):
+    migrated = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    expected = create_engine(f"sqlite:///{tmp_path / 'models.db'}")
+    try:
+        executed = upgrade(migrated)
+        assert executed[-1] == head_revision()
+        Base.metadata.create_all(expected)
+
+        migrated_tables = set(inspect(migrated).get_table_names()) - {VERSION_TABLE}
+        assert migrated_tables == set(Base.metadata.tables)
+        assert schema(inspect(migrated), migrated_tables) == schema(inspect(expected), migrated_tables)
+        # 重复执行不做任何操作
+        assert upgrade(migrated) == []
+    finally:
+        migrated.dispose()
+        expected.dispose()
@@ -0,0 +1,103 @@
+"""传感器使用时段重叠校验测试
+
+同一人员的传感器使用时段不能重叠；已有数据中遗留的重叠时段不应影响判断。
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+from models import Batch, Person, Sensor
+
+BASE = datetime(2026, 3, 1)
+
+
+def at(day: int) -> datetime:
+    return BASE + timedelta(days=day)
+
+
+@pytest.fixture
+def person():
+    """创建一个批次和人员，返回 (batch_id, person_id)"""
+    db = database.SessionLocal()
+    try:
+        person = Person(person_name="重叠校验", batch=Batch(batch_number=f"OVERLAP-{datetime.now():%H%M%S%f}", start_time=BASE))
+        db.add(person)
+        db.commit()
+        return person.batch_id, person.person_id
+    finally:
+        db.close()
+
+
+def add_sensor(person, name: str, start: int, end):
+    """绕过接口直接写入（模拟历史数据），返回 sensor_id"""
+    batch_id, person_id = person
+    db = database.SessionLocal()
+    try:
+        sensor = Sensor(
+            sensor_name=name, batch_id=batch_id, person_id=person_id,
+            start_time=at(start), end_time=at(end) if end is not None else None,
+        )
+        db.add(sensor)
+        db.commit()
+        return sensor.sensor_id
+    finally:
+        db.close()
+
+
+def payload(person, name: str, start: int, end):
+    batch_id, person_id = person
+    return {
+        "sensor_name": name, "batch_id": batch_id, "person_id": person_id,
+        "start_time": f"{at(start):%Y-%m-%d %H:%M:%S}",
+        "end_time": f"{at(end):%Y-%m-%d %H:%M:%S}" if end is not None else None,
+    }
+
+
+@pytest.mark.parametrize("start,end,conflict", [
+    (5, 15, "A"),      # 与前一个时段尾部重叠
+    (15, 25, "B"),     # 与后一个时段头部重叠
+    (22, 28, "B"),     # 包含于已有时段
+    (8, 30, "A"),      # 覆盖多个时段
+    (25, None, "B"),   # 未结束的新时段
+    (10, 20, None),    # 首尾相接不算重叠
+    (30, 40, None),
+])
+def test_create_rejects_overlap(client, person, start, end, conflict):
+    add_sensor(person, "A", 0, 10)
+    add_sensor(person, "B", 20, 30)
+    response = client.post("/api/sensors/", json=payload(person, "新", start, end))
+    if conflict is None:
+        assert response.status_code == 200, response.text
+    else:
+        assert response.status_code == 409, response.text
+        assert f"传感器 {conflict}" in response.json()["detail"]
+
+
+def test_create_rejects_overlap_with_open_window(client, person):
+    add_sensor(person, "使用中", 10, None)
+    assert client.post("/api/sensors/", json=payload(person, "新", 100, 110)).status_code == 409
+    assert client.post("/api/sensors/", json=payload(person, "新", 0, 10)).status_code == 200
+
+
+def test_create_rejects_overlap_with_legacy_overlapping_windows(client, person):
+    # 历史数据：A=[0,100) 包含 B=[10,20)，开始时间紧邻的是 B，但新时段 [30,40) 与 A 重叠
+    add_sensor(person, "A", 0, 100)
+    add_sensor(person, "B", 10, 20)
+    response = client.post("/api/sensors/", json=payload(person, "新", 30, 40))
+    assert response.status_code == 409, response.text
+    assert "传感器 A" in response.json()["detail"]
+
+
+def test_update_rejects_overlap(client, person):
+    add_sensor(person, "A", 0, 100)
+    add_sensor(person, "B", 10, 20)
+    sensor_id = add_sensor(person, "C", 200, 210)
+    # 移动到与 A 重叠的位置被拒绝
+    response = client.put(f"/api/sensors/{sensor_id}", json=payload(person, "C", 30, 40))
+    assert response.status_code == 409, response.text
+    assert "传感器 A" in response.json()["detail"]
+    # 只与自身原时段重叠时允许更新
+    response = client.put(f"/api/sensors/{sensor_id}", json=payload(person, "C", 205, None))
+    assert response.status_code == 200, response.text
@@ -0,0 +1,71 @@
+"""传感器读数写入测试"""
+
+import gzip
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+import database
+from models import Batch, Person, Sensor, SensorReading
+from sensor_readings import IngestError, decompress
+
+LIMIT = 1000
+
+
+def test_decompress_concatenated_members():
+    body = gzip.compress(b"sensor_id,reading_time\n") + gzip.compress(b"1,2026-01-01 00:00:00\n")
+    assert decompress(body, "gzip", LIMIT) == b"sensor_id,reading_time\n1,2026-01-01 00:00:00\n"
+
+
+def test_decompress_plain_body_passes_through():
+    assert decompress(b"sensor_id\n1\n", None, LIMIT) == b"sensor_id\n1\n"
+
+
+@pytest.mark.parametrize("body,message", [
+    (gzip.compress(b"x" * 100)[:-4], "不完整"),
+    (gzip.compress(b"x" * 100) + gzip.compress(b"x" * LIMIT), "超过"),
+    (gzip.compress(b"x" * 100) + b"trailing", "解压失败"),
+])
+def test_decompress_rejects_truncated_oversized_and_corrupt_input(body, message):
+    with pytest.raises(IngestError, match=message):
+        decompress(body, "gzip", LIMIT)
+
+
+def test_ingest_rejects_out_of_range_values(client):
+    db = database.SessionLocal()
+    try:
+        person = Person(person_name="读数范围", batch=Batch(batch_number="READINGS-RANGE", start_time=datetime(2026, 1, 1)))
+        sensor = Sensor(sensor_name="范围", person=person, batch=person.batch, start_time=datetime(2026, 1, 1))
+        db.add(sensor)
+        db.commit()
+        sensor_id = sensor.sensor_id
+    finally:
+        db.close()
+
+    body = "\n".join([
+        "reading_time,glucose_value,temperature",
+        "2026-01-01 00:00:00,5.5,36.5",
+        "2026-01-01 00:01:00,1000,36.5",
+        "2026-01-01 00:02:00,-999.996,36.5",
+        "2026-01-01 00:03:00,6.1,inf",
+        "2026-01-01 00:04:00,999.99,36.5",
+    ])
+    response = client.post(
+        f"/api/sensors/readings?sensor_id={sensor_id}",
+        content=gzip.compress(body.encode()),
+        headers={"Content-Type": "text/csv", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["total"], result["inserted"], result["rejected"]) == (5, 2, 3)
+    assert any("超出范围" in error for error in result["errors"])
+
+    db = database.SessionLocal()
+    try:
+        stored = db.execute(
+            select(SensorReading.glucose_value).where(SensorReading.sensor_id == sensor_id).order_by(SensorReading.reading_time)
+        ).scalars().all()
+    finally:
+        db.close()
+    assert [float(value) for value in stored] == [5.5, 999.99]
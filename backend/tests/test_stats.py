@@ -0,0 +1,36 @@
+"""统计接口测试：默认只用一条查询返回总数，分组明细需显式请求"""
+
+from sqlalchemy import event
+
+import database
+from routers.stats import invalidate_stats_cache
+
+
+def get_stats(client, url):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    invalidate_stats_cache()
+    event.listen(database.engine, "before_cursor_execute", record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(database.engine, "before_cursor_execute", record)
+    assert response.status_code == 200, response.text
+    return response.json(), len(statements)
+
+
+def test_totals_only_by_default(client):
+    data, count = get_stats(client, "/api/stats")
+    assert count == 1
+    assert set(data["totals"]) == {"batches", "persons", "experiments", "finger_blood_data", "sensors", "competitor_files"}
+    assert data["by_batch"] is None and data["by_person"] is None
+
+
+def test_details_include_breakdowns(client):
+    data, count = get_stats(client, "/api/stats?details=true")
+    assert count == 3
+    assert len(data["by_batch"]) == data["totals"]["batches"]
+    assert len(data["by_person"]) == data["totals"]["persons"]
@@ -0,0 +1,113 @@
+"""时间序列降采样
+
+曲线展示只需要与屏幕像素相当的点数，服务端先按时间窗口取数，再降采样到指定点数后返回：
+
+- lttb：Largest-Triangle-Three-Buckets，保留曲线形状，适合折线图
+- minmax：每个分桶保留最小值与最大值（按时间先后），保证峰值与谷值不丢失，适合告警/极值查看
+
+输入的时间戳需已按升序排列；点数不超过目标点数时原样返回。
+"""
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from dateutil.tz import gettz, tzlocal
+
+METHOD_LTTB = "lttb"
+METHOD_MINMAX = "minmax"
+METHODS = (METHOD_LTTB, METHOD_MINMAX)
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# 服务器本地时区（数据库中的时间均为本地时间，不带时区）：取 TZ 环境变量或 /etc/localtime 对应的时区文件，
+# 包含历史夏令时切换规则；均不可用时退回 tzlocal()
+LOCAL_TIMEZONE = gettz() or tzlocal()
+
+
+def to_epoch_ms(times: np.ndarray) -> np.ndarray:
+    """
+    本地时间（datetime64）转换为 UTC 毫秒时间戳
+
+    按每个时间点所在日期的时区偏移换算（夏令时前后的数据不会错位一小时）。
+    夏令时结束时重复的一小时按升序数据推断，无法推断时视为标准时间；
+    夏令时开始时不存在的时间顺延到切换后。
+    """
+    index = pd.DatetimeIndex(times.astype("datetime64[ms]"))
+    try:
+        local = index.tz_localize(LOCAL_TIMEZONE, ambiguous="infer", nonexistent="shift_forward")
+    except ValueError:
+        local = index.tz_localize(
+            LOCAL_TIMEZONE, ambiguous=np.zeros(len(index), dtype=bool), nonexistent="shift_forward"
+        )
+    return local.tz_convert("UTC").tz_localize(None).values.astype("datetime64[ms]").astype(np.int64)
+
+
+def arrow_stream_bytes(table: pa.Table) -> bytes:
+    """将 Arrow 表序列化为 IPC 流格式"""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """返回 LTTB 选出的点的下标（包含首尾点，n_out 最小为 3）"""
+    size = len(x)
+    n_out = max(n_out, 3)
+    if n_out >= size:
+        return np.arange(size)
+
+    x = x.astype("float64")
+    y = y.astype("float64")
+    # 首尾点单独保留，其余点均分为 n_out - 2 个分桶
+    edges = np.linspace(1, size - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个分桶的平均点（最后一个分桶以尾点代替）
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        areas = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev]) - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(areas))
+        selected[i + 1] = prev
+    return selected
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """返回每个分桶最小值与最大值所在点的下标（每桶最多 2 个点，总数不超过 n_out）"""
+    size = len(x)
+    if n_out >= size:
+        return np.arange(size)
+    buckets = max(n_out // 2, 1)
+    edges = np.linspace(0, size, buckets + 1).astype(np.int64)
+    starts = edges[:-1][edges[:-1] < edges[1:]]
+    # reduceat 按分桶求极值，再在各桶内定位极值下标
+    mins = np.minimum.reduceat(y, starts)
+    maxs = np.maximum.reduceat(y, starts)
+    bucket_of = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, size)))
+    is_min = y == mins[bucket_of]
+    is_max = y == maxs[bucket_of]
+    first_min = np.unique(bucket_of[is_min], return_index=True)[1]
+    first_max = np.unique(bucket_of[is_max], return_index=True)[1]
+    selected = np.concatenate([np.flatnonzero(is_min)[first_min], np.flatnonzero(is_max)[first_max]])
+    return np.unique(selected)
+
+
+def downsample(x: np.ndarray, y: np.ndarray, n_out: int, method: str = METHOD_LTTB) -> Tuple[np.ndarray, np.ndarray]:
+    """按指定方法降采样，返回 (x, y)"""
+    if method == METHOD_MINMAX:
+        index = minmax(x, y, n_out)
+    elif method == METHOD_LTTB:
+        index = lttb(x, y, n_out)
+    else:
+        raise ValueError(f"不支持的降采样方法: {method}")
+    return x[index], y[index]
@@ -1,5 +1,8 @@
 """公共工具函数模块"""
 
+import threading
+import time
+
 def format_file_size(file_size_bytes: int) -> str:
     """
     格式化文件大小为人类可读的格式
@@ -20,4 +23,49 @@ def format_file_size(file_size_bytes: int) -> str:
     elif file_size_bytes < 1024 * 1024 * 1024:
         return f"{file_size_bytes / (1024 * 1024):.1f} MB"
     else:
-        return f"{file_size_bytes / (1024 * 1024 * 1024):.1f} GB"
\ No newline at end of file
+        return f"{file_size_bytes / (1024 * 1024 * 1024):.1f} GB"
+
+class TTLCache:
+    """
+    线程安全的进程内 TTL 缓存
+
+    条目在写入 ttl_seconds 秒后过期；写操作应通过 pop / clear 显式失效。
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                # 超出容量时丢弃最早写入的条目
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_where(self, predicate):
+        """删除值满足条件的所有条目"""
+        with self._lock:
+            for key in [k for k, (_, v) in self._data.items() if predicate(v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,265 @@
+"""竞品工作簿解析与列式缓存
+
+上传的工作簿（xlsx/xls/csv）由后台线程解析一次，每个工作表保存为未压缩的 Arrow IPC 文件，
+位于内容块的派生目录 ``<sha256>.derived/sheets/`` 下，并写入 manifest.json 描述工作表与列。
+读取时通过内存映射打开 Arrow 文件（零拷贝），只取所需列与行，无需重新解析工作簿。
+
+工作表中表头行按“时间”等列名识别（表头上方的参数区会被跳过），未识别到时取首个非空行；
+时间列转换为时间戳，其余列按内容转换为数值或文本。
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from blob_store import blob_path, derived_dir
+
+PARSE_EXTENSIONS = {".xlsx", ".xlsm", ".xls", ".csv"}
+TIME_HEADERS = {"时间", "采集时间", "time", "timestamp", "datetime"}
+# 查找表头行时扫描的最大行数
+HEADER_SCAN_ROWS = 50
+
+STATUS_READY = "ready"
+STATUS_PENDING = "pending"
+STATUS_FAILED = "failed"
+STATUS_UNSUPPORTED = "unsupported"
+
+
+def _sheets_dir(sha256: str) -> str:
+    return os.path.join(derived_dir(sha256), "sheets")
+
+
+def is_supported(filename: str) -> bool:
+    return os.path.splitext(filename)[1].lower() in PARSE_EXTENSIONS
+
+
+def load_manifest(sha256: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(_sheets_dir(sha256), "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_error(sha256: str) -> Optional[str]:
+    try:
+        with open(os.path.join(derived_dir(sha256), "parse_error.txt"), encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _find_header_row(raw: pd.DataFrame) -> Optional[int]:
+    first_non_empty = None
+    for i in range(min(len(raw), HEADER_SCAN_ROWS)):
+        values = raw.iloc[i]
+        if values.notna().any() and first_non_empty is None:
+            first_non_empty = i
+        if any(isinstance(v, str) and v.strip().lower() in TIME_HEADERS for v in values):
+            return i
+    return first_non_empty
+
+
+def _column_names(header: pd.Series) -> List[Optional[str]]:
+    names, seen = [], {}
+    for i, value in enumerate(header):
+        if pd.isna(value) or str(value).strip() == "":
+            names.append(None)
+            continue
+        name = str(value).strip()
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _sheet_to_table(raw: pd.DataFrame):
+    """将原始单元格转换为 (Arrow 表, 时间列名)，无数据时返回 (None, None)"""
+    header_row = _find_header_row(raw)
+    if header_row is None:
+        return None, None
+
+    names = _column_names(raw.iloc[header_row])
+    body = raw.iloc[header_row + 1:].dropna(how="all")
+    columns, time_column = {}, None
+    for i, name in enumerate(names):
+        series = body.iloc[:, i]
+        if name is None:
+            if series.isna().all():
+                continue
+            name = f"列{i + 1}"
+        if time_column is None and name.strip().lower() in TIME_HEADERS:
+            time_column = name
+            columns[name] = pd.to_datetime(series, errors="coerce")
+            continue
+        numeric = pd.to_numeric(series, errors="coerce")
+        if numeric.notna().sum() >= series.notna().sum() / 2:
+            columns[name] = numeric.astype("float64")
+        else:
+            columns[name] = series.map(lambda v: None if pd.isna(v) else str(v)).astype("object")
+
+    if not columns:
+        return None, None
+    df = pd.DataFrame(columns)
+    if time_column is not None:
+        df = df[df[time_column].notna()].sort_values(time_column, kind="stable")
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False).replace_schema_metadata(None)
+    if time_column is not None:
+        index = table.schema.get_field_index(time_column)
+        table = table.set_column(index, time_column, pc.cast(table.column(index), pa.timestamp("ms")))
+    return table, time_column
+
+
+def _column_type(field: pa.Field) -> str:
+    if pa.types.is_timestamp(field.type):
+        return "timestamp"
+    if pa.types.is_floating(field.type) or pa.types.is_integer(field.type):
+        return "number"
+    return "string"
+
+
+def parse_workbook(sha256: str, filename: str) -> dict:
+    """解析内容块对应的工作簿，写入 Arrow 文件与 manifest，返回 manifest"""
+    src = blob_path(sha256)
+    if os.path.splitext(filename)[1].lower() == ".csv":
+        sheets = {"Sheet1": pd.read_csv(src, header=None, dtype=object, encoding="utf-8-sig")}
+    else:
+        sheets = pd.read_excel(src, sheet_name=None, header=None)
+
+    os.makedirs(derived_dir(sha256), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=derived_dir(sha256))
+    try:
+        manifest = {"sha256": sha256, "parsed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "sheets": []}
+        for index, (name, raw) in enumerate(sheets.items()):
+            table, time_column = _sheet_to_table(raw)
+            if table is None:
+                continue
+            file_name = f"{index}.arrow"
+            # 未压缩的 IPC 文件格式可直接内存映射读取
+            with pa.OSFile(os.path.join(tmp_dir, file_name), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            manifest["sheets"].append({
+                "index": index,
+                "name": str(name),
+                "file": file_name,
+                "rows": table.num_rows,
+                "time_column": time_column,
+                "columns": [{"name": field.name, "type": _column_type(field)} for field in table.schema],
+            })
+        with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+        target = _sheets_dir(sha256)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return manifest
+
+
+def open_sheet(sha256: str, sheet: dict) -> pa.Table:
+    """以内存映射方式打开已解析的工作表"""
+    source = pa.memory_map(os.path.join(_sheets_dir(sha256), sheet["file"]), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+class WorkbookIngestor:
+    """后台解析队列：每个内容块只解析一次，相同内容的多个文件记录共享结果"""
+
+    def __init__(self):
+        self._queue = deque()
+        self._pending = set()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.parsed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="workbook-ingestor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self, sha256: str, filename: str) -> str:
+        if not is_supported(filename):
+            return STATUS_UNSUPPORTED
+        if load_manifest(sha256) is not None:
+            return STATUS_READY
+        with self._condition:
+            if sha256 in self._pending:
+                return STATUS_PENDING
+        return STATUS_FAILED if load_error(sha256) is not None else None
+
+    def enqueue(self, sha256: str, filename: str, retry: bool = False) -> str:
+        """加入解析队列，返回当前状态；已解析或已失败（retry=False）时不重复解析"""
+        status = self.status(sha256, filename)
+        if status in (STATUS_READY, STATUS_PENDING, STATUS_UNSUPPORTED):
+            return status
+        if status == STATUS_FAILED and not retry:
+            return status
+        with self._condition:
+            self._pending.add(sha256)
+            self._queue.append((sha256, filename))
+            self._condition.notify()
+        return STATUS_PENDING
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {"running": self.running, "pending": len(self._pending), "parsed": self.parsed, "failed": self.failed}
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                sha256, filename = self._queue.popleft()
+            try:
+                parse_workbook(sha256, filename)
+                error_path = os.path.join(derived_dir(sha256), "parse_error.txt")
+                if os.path.exists(error_path):
+                    os.remove(error_path)
+                with self._condition:
+                    self.parsed += 1
+            except Exception as e:
+                print(f"竞品工作簿解析失败 {sha256}: {e}")
+                os.makedirs(derived_dir(sha256), exist_ok=True)
+                with open(os.path.join(derived_dir(sha256), "parse_error.txt"), "w", encoding="utf-8") as f:
+                    f.write(str(e))
+                with self._condition:
+                    self.failed += 1
+            finally:
+                with self._condition:
+                    self._pending.discard(sha256)
+
+
+workbook_ingestor = WorkbookIngestor()
@@ -76,6 +76,21 @@ export interface FingerBloodData {
   batch_number?: string
 }
 
+export interface GlucoseSeries {
+  person_id: number
+  person_name: string
+  total_points: number
+  // 毫秒时间戳与对应血糖值，按列存储
+  t: number[]
+  v: number[]
+}
+
+export interface GlucoseTimeSeries {
+  method: 'lttb' | 'minmax'
+  max_points: number
+  series: GlucoseSeries[]
+}
+
 export interface Sensor {
   sensor_id: number
   sensor_name: string
@@ -88,6 +103,37 @@ export interface Sensor {
   batch_number?: string
 }
 
+export interface StatsTotals {
+  batches: number
+  persons: number
+  experiments: number
+  finger_blood_data: number
+  sensors: number
+  competitor_files: number
+}
+
+export interface Stats {
+  totals: StatsTotals
+  by_batch?: Array<{
+    batch_id: number
+    batch_number: string
+    persons: number
+    experiments: number
+    finger_blood_data: number
+    sensors: number
+    competitor_files: number
+  }>
+  by_person?: Array<{
+    person_id: number
+    person_name: string
+    batch_id?: number
+    experiments: number
+    finger_blood_data: number
+    sensors: number
+    competitor_files: number
+  }>
+}
+
 // API服务类
 export class ApiService {
   // 用户认证管理
@@ -241,6 +287,19 @@ export class ApiService {
     return response.data
   }
 
+  // 降采样后的血糖曲线，用于图表展示
+  static async getGlucoseTimeSeries(params: {
+    batch_id?: number
+    person_id?: number
+    start_time?: string
+    end_time?: string
+    max_points?: number
+    method?: 'lttb' | 'minmax'
+  }): Promise<GlucoseTimeSeries> {
+    const response = await api.get('/api/fingerBloodData/timeseries', { params })
+    return response.data
+  }
+
   static async createFingerBloodData(data: Omit<FingerBloodData, 'finger_blood_file_id'>): Promise<FingerBloodData> {
     const response = await api.post('/api/fingerBloodData/', data)
     return response.data
@@ -304,6 +363,12 @@ export class ApiService {
     return response.data
   }
 
+  // 统计信息
+  static async getStats(details = false): Promise<Stats> {
+    const response = await api.get('/api/stats', { params: details ? { details: true } : undefined })
+    return response.data
+  }
+
   // 竞品数据导出
   static async exportCompetitorData(batchId?: number, personId?: number): Promise<Blob> {
     const params = new URLSearchParams()